@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark the In-Process Batch AI Classifier Against a Fake OpenAI Endpoint
+
+This script:
+1. Starts a local HTTP server that serves fixture pages and a fake
+   OpenAI-compatible /v1/chat/completions endpoint. The fake model asks for
+   'fetch' and then 'get_categories', and answers with a category dict
+   derived from the page (or answers at once in JSON mode).
+2. Classifies URLS pages the old way: one
+   `python clasificar_url_y_contenido_service.py <url>` subprocess per URL,
+   with the dict regex-scraped from its stdout.
+3. Classifies them again with classify_urls() (one process, one client,
+   WORKERS threads), still with the function-calling conversation.
+4. Checks both give the same categories and prints the timings and the
+   number of connections opened to the API.
+
+How to use:
+1. Adjust URLS, WORKERS and MODEL_LATENCY below if needed.
+2. Run: python src/AI/benchmark_batch_classifier.py
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+import subprocess
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import clasificar_url_y_contenido_service as service
+
+URLS = 24
+WORKERS = 8
+MODEL_LATENCY = 0.2
+SERVICE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clasificar_url_y_contenido_service.py")
+CODES = ["NEWS", "GMB", "POLR", "REL", "SRCH"]
+
+
+def fake_categories(page):
+    """
+    Return the categories the fake model gives a page.
+    """
+    index = int(re.search(r"Sitio (\d+)", page).group(1))
+    return {CODES[index % len(CODES)]: 3, CODES[(index + 1) % len(CODES)]: 1}
+
+
+def fake_answer(messages):
+    """
+    Return the fake model's next message for a conversation.
+    """
+    function_results = [m for m in messages if m["role"] == "function"]
+    if not function_results:
+        url = re.search(r"webpage at (\S+)\. ", messages[1]["content"]).group(1)
+        arguments = json.dumps({"url": url})
+        return {"role": "assistant", "content": None,
+                "function_call": {"name": "fetch", "arguments": arguments}}
+    if function_results[-1]["name"] == "fetch":
+        return {"role": "assistant", "content": None,
+                "function_call": {"name": "get_categories", "arguments": "{}"}}
+    page = next(m["content"] for m in function_results if m["name"] == "fetch")
+    return {"role": "assistant", "content": f"Classification: {fake_categories(page)}"}
+
+
+def fake_json_answer(messages):
+    """
+    Return the fake model's answer to a single JSON-mode call.
+    """
+    answer = {"categories": fake_categories(messages[-1]["content"])}
+    return {"role": "assistant", "content": json.dumps(answer)}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Serve /page/<n> fixture pages and a fake /v1/chat/completions.
+    """
+
+    protocol_version = "HTTP/1.1"
+    api_connections = set()
+    api_usage = {"calls": 0, "bytes": 0}
+    lock = threading.Lock()
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        index = int(self.path.rsplit("/", 1)[1])
+        page = f"<html><body><h1>Sitio {index}</h1><p>Noticias y política del día.</p></body></html>"
+        self.send_body(page.encode("utf-8"), "text/html")
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        with self.lock:
+            self.api_connections.add(self.client_address)
+            self.api_usage["calls"] += 1
+            self.api_usage["bytes"] += length
+        request = json.loads(self.rfile.read(length))
+        time.sleep(MODEL_LATENCY)
+        answer = fake_json_answer if request.get("response_format") else fake_answer
+        body = json.dumps({"choices": [{"index": 0, "message": answer(request["messages"])}]})
+        self.send_body(body.encode("utf-8"), "application/json")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_taxonomy(folder):
+    """
+    Write small categorias1.csv and tags.csv fixtures into a folder.
+    """
+    with open(os.path.join(folder, "categorias1.csv"), "w", encoding="utf-8") as f:
+        f.write("Code,Category,Description\n")
+        for code in CODES:
+            f.write(f'{code},{code.title()},"ejemplo, {code.lower()}"\n')
+    with open(os.path.join(folder, "tags.csv"), "w", encoding="utf-8") as f:
+        f.write("code,tags\n")
+        for code in CODES:
+            f.write(f'{code},"{code.lower()}, ejemplo"\n')
+
+
+def run_subprocesses(urls, folder, api_base):
+    """
+    The old path: one service subprocess per URL; returns ({url: categories}, seconds).
+    """
+    env = dict(os.environ, OPENAI_BASE_URL=api_base)
+    results = {}
+    start = time.perf_counter()
+    for url in urls:
+        output = subprocess.run(
+            [sys.executable, SERVICE_PATH, url, "--functions"], capture_output=True, text=True, cwd=folder, env=env
+        ).stdout
+        results[url] = service.parse_classification(output)
+    return results, time.perf_counter() - start
+
+
+def run_batch(urls, folder, api_base):
+    """
+    The new path: classify_urls() in this process; returns ({url: categories}, seconds).
+    """
+    service.CATEGORIES_CSV = os.path.join(folder, "categorias1.csv")
+    service.TAGS_CSV = os.path.join(folder, "tags.csv")
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        batch = service.classify_urls(urls, max_workers=WORKERS, api_base=api_base,
+                                      dedup_domains=False, single_call=False)
+        results = {r["url"]: r["categories"] for r in batch}
+    return results, time.perf_counter() - start
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    api_base = f"{base}/v1"
+    urls = [f"{base}/page/{i}" for i in range(URLS)]
+    print(f"Classifying {URLS} URLs against a fake model with {MODEL_LATENCY}s latency per call")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_taxonomy(tmp)
+        old_results, old_time = run_subprocesses(urls, tmp, api_base)
+        old_connections = len(FakeOpenAIHandler.api_connections)
+        FakeOpenAIHandler.api_connections.clear()
+        new_results, new_time = run_batch(urls, tmp, api_base)
+        new_connections = len(FakeOpenAIHandler.api_connections)
+
+    server.shutdown()
+
+    classified = sum(1 for r in new_results.values() if r)
+    print(f"Subprocess per URL: {old_time:6.2f}s ({old_connections} API connections)")
+    print(f"Batch, {WORKERS} workers:   {new_time:6.2f}s ({new_connections} API connections)")
+    print(f"Speedup: {old_time / new_time:.1f}x")
+    print(f"Classified: {classified}/{URLS}, identical results: {old_results == new_results}")
+
+
+if __name__ == "__main__":
+    main()
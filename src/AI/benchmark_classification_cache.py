@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the AI Classification Cache and Site Deduplication
+
+This script:
+1. Starts SITES local stub sites (each one also answers the fake
+   OpenAI-compatible endpoint of benchmark_batch_classifier.py).
+2. Builds an input list with PAGES_PER_SITE pages per site plus some
+   exact duplicates.
+3. Classifies it three times with classify_urls(): without cache or
+   deduplication, with site deduplication and an empty cache, and again
+   with the now warm cache.
+4. Prints the time, model calls and bytes sent to the model for each run.
+
+How to use:
+1. Adjust SITES and PAGES_PER_SITE below if needed.
+2. Run: python src/AI/benchmark_classification_cache.py
+"""
+
+import io
+import os
+import time
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer
+
+import clasificar_url_y_contenido_service as service
+from classification_cache import ClassificationCache
+from benchmark_batch_classifier import FakeOpenAIHandler, write_taxonomy
+
+SITES = 6
+PAGES_PER_SITE = 4
+DUPLICATES = 6
+WORKERS = 8
+
+
+def build_urls(servers):
+    """
+    Return PAGES_PER_SITE pages on every site, then DUPLICATES repeated URLs.
+    """
+    urls = [
+        f"http://127.0.0.1:{server.server_address[1]}/page/{s * PAGES_PER_SITE + p}"
+        for s, server in enumerate(servers)
+        for p in range(PAGES_PER_SITE)
+    ]
+    return urls + urls[:DUPLICATES]
+
+
+def run(urls, api_base, **kwargs):
+    """
+    Classify the URLs; returns (results, seconds, model calls, bytes sent).
+    """
+    FakeOpenAIHandler.api_usage.update({"calls": 0, "bytes": 0})
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        results = list(service.classify_urls(urls, max_workers=WORKERS, api_base=api_base, **kwargs))
+    elapsed = time.perf_counter() - start
+    return results, elapsed, FakeOpenAIHandler.api_usage["calls"], FakeOpenAIHandler.api_usage["bytes"]
+
+
+def main():
+    servers = []
+    for _ in range(SITES):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    api_base = f"http://127.0.0.1:{servers[0].server_address[1]}/v1"
+    urls = build_urls(servers)
+    print(f"Classifying {len(urls)} URLs on {SITES} sites")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_taxonomy(tmp)
+        service.CATEGORIES_CSV = os.path.join(tmp, "categorias1.csv")
+        service.TAGS_CSV = os.path.join(tmp, "tags.csv")
+        cache = ClassificationCache(os.path.join(tmp, "cache.sqlite"))
+
+        runs = [
+            ("no cache, no dedup", run(urls, api_base, dedup_domains=False)),
+            ("site dedup, cold cache", run(urls, api_base, cache=cache)),
+            ("site dedup, warm cache", run(urls, api_base, cache=cache)),
+        ]
+        cache.close()
+
+    for server in servers:
+        server.shutdown()
+
+    for name, (results, elapsed, calls, sent) in runs:
+        reused = sum(1 for r in results if r["cached"] or r["duplicate_of"])
+        errors = sum(1 for r in results if r["error"])
+        print(f"{name:<24} {elapsed:6.2f}s  {calls:3d} model calls  {sent / 1024:7.1f} KiB sent  "
+              f"{reused} reused, {errors} errors")
+    warm = [r["categories"] for r in runs[2][1][0]]
+    cold = [r["categories"] for r in runs[1][1][0]]
+    print(f"Warm cache matches the cold run: {warm == cold}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Single-Call JSON Mode Against the Function-Calling Conversation
+
+This script:
+1. Starts the local fake OpenAI-compatible endpoint and fixture pages of
+   benchmark_batch_classifier.py (MODEL_LATENCY seconds per chat call).
+2. Classifies URLS pages one at a time with the function-calling
+   conversation (fetch, get_categories, answer) and then with the single
+   JSON-mode call (taxonomy in the system prompt).
+3. Prints the chat calls and mean latency per URL for each mode, and
+   checks both give the same categories.
+
+How to use:
+1. Adjust URLS below if needed.
+2. Run: python src/AI/benchmark_single_call.py
+"""
+
+import io
+import os
+import time
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer
+
+import clasificar_url_y_contenido_service as service
+from benchmark_batch_classifier import MODEL_LATENCY, FakeOpenAIHandler, write_taxonomy
+
+URLS = 12
+
+
+def run(urls, api_base, single_call):
+    """
+    Classify the URLs sequentially; returns ({url: categories}, seconds per URL, calls per URL).
+    """
+    FakeOpenAIHandler.api_usage.update({"calls": 0, "bytes": 0})
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        results = service.classify_urls(urls, max_workers=1, api_base=api_base,
+                                        dedup_domains=False, single_call=single_call)
+        categories = {r["url"]: r["categories"] for r in results}
+    elapsed = time.perf_counter() - start
+    return categories, elapsed / len(urls), FakeOpenAIHandler.api_usage["calls"] / len(urls)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    api_base = f"{base}/v1"
+    urls = [f"{base}/page/{i}" for i in range(URLS)]
+    print(f"Classifying {URLS} URLs one at a time against a fake model with {MODEL_LATENCY}s latency per call")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_taxonomy(tmp)
+        service.CATEGORIES_CSV = os.path.join(tmp, "categorias1.csv")
+        service.TAGS_CSV = os.path.join(tmp, "tags.csv")
+        old_results, old_latency, old_calls = run(urls, api_base, single_call=False)
+        new_results, new_latency, new_calls = run(urls, api_base, single_call=True)
+
+    server.shutdown()
+
+    classified = sum(1 for r in new_results.values() if r)
+    print(f"Function calling: {old_latency:5.2f}s per URL ({old_calls:.1f} chat calls per URL)")
+    print(f"Single JSON call: {new_latency:5.2f}s per URL ({new_calls:.1f} chat calls per URL)")
+    print(f"Speedup: {old_latency / new_latency:.1f}x")
+    print(f"Classified: {classified}/{URLS}, identical results: {old_results == new_results}")
+
+
+if __name__ == "__main__":
+    main()
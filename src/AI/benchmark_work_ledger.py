@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark a Crashed and Resumed AI Classification Run on the Work Ledger
+
+This script:
+1. Starts the fake OpenAI-compatible endpoint and fixture pages of
+   benchmark_batch_classifier.py. Every URL is on its own loopback host
+   (127.0.0.x), and every FLAKY_EVERY-th page fails twice before loading.
+2. Runs classification_BY_AI.main() in a subprocess and kills it (with
+   its whole process group) after KILL_AFTER seconds.
+3. Runs it again with PROCESSES worker processes on the same ledger; it
+   resumes without any row number.
+4. Prints the model calls per URL over both runs, the retries and whether
+   the output CSV has the right categories for every URL.
+5. Classifies SITE_URLS URLs spread over SITES sites, first half of them,
+   then all of them on the same ledger, and checks the model is called
+   once per site: later URLs of a site, in other batches or runs, reuse
+   the site's result.
+
+How to use:
+1. Adjust URLS, PROCESSES and KILL_AFTER below if needed.
+2. Run: python src/AI/benchmark_work_ledger.py
+"""
+
+import os
+import csv
+import sys
+import time
+import signal
+import tempfile
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer
+
+from benchmark_batch_classifier import CODES, FakeOpenAIHandler, fake_categories, write_taxonomy
+
+URLS = 60
+PROCESSES = 3
+KILL_AFTER = 2.0
+FLAKY_EVERY = 10
+SITES = 6
+SITE_URLS = 48
+AI_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RUN_SCRIPT = """
+import sys
+import work_ledger, classification_BY_AI
+work_ledger.BACKOFF_SECONDS = 0.5
+classification_BY_AI.POLL_SECONDS = 0.2
+classification_BY_AI.main(sys.argv[1], sys.argv[2], procesos=int(sys.argv[3]), lote=8)
+"""
+
+
+class FlakyHandler(FakeOpenAIHandler):
+    """
+    FakeOpenAIHandler whose /flaky/<n> pages answer 500 twice before loading.
+    """
+
+    failures = {}
+
+    def do_GET(self):
+        if self.path.startswith("/flaky/"):
+            with self.lock:
+                self.failures[self.path] = self.failures.get(self.path, 0) + 1
+                failing = self.failures[self.path] <= 2
+            if failing:
+                self.send_response(500)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        super().do_GET()
+
+
+class QuietServer(ThreadingHTTPServer):
+    """
+    Do not print the broken pipes of the killed run.
+    """
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def run(folder, api_base, processes, kill_after=None):
+    """
+    Run classification_BY_AI.main() in a subprocess; returns seconds.
+    """
+    env = dict(os.environ, OPENAI_BASE_URL=api_base, PYTHONPATH=AI_DIR)
+    args = [sys.executable, "-c", RUN_SCRIPT, "input.csv", "output.csv", str(processes)]
+    start = time.perf_counter()
+    process = subprocess.Popen(args, cwd=folder, env=env, stdout=subprocess.DEVNULL, start_new_session=True)
+    try:
+        process.wait(timeout=kill_after)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    return time.perf_counter() - start
+
+
+def write_input(folder, urls):
+    with open(os.path.join(folder, "input.csv"), "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([["url"]] + [[url] for url in urls])
+
+
+def read_output(folder):
+    with open(os.path.join(folder, "output.csv"), newline="", encoding="utf-8") as f:
+        return {row["url"]: {code: int(row[code]) for code in CODES if int(row[code])} for row in csv.DictReader(f)}
+
+
+def site_dedup(api_base, port):
+    """
+    Classify URLs of a few sites in two runs; returns (model calls, output correct).
+    """
+    # Sites interleaved, so each site's URLs are spread over every batch
+    urls = [f"http://127.0.1.{i % SITES + 2}:{port}/page/{i}" for i in range(SITE_URLS)]
+    expected = {url: fake_categories(f"Sitio {i % SITES}") for i, url in enumerate(urls)}
+    calls = FakeOpenAIHandler.api_usage["calls"]
+    with tempfile.TemporaryDirectory() as tmp:
+        write_taxonomy(tmp)
+        write_input(tmp, urls[:SITE_URLS // 2])
+        run(tmp, api_base, PROCESSES)
+        write_input(tmp, urls)
+        run(tmp, api_base, PROCESSES)
+        results = read_output(tmp)
+    return FakeOpenAIHandler.api_usage["calls"] - calls, results == expected
+
+
+def main():
+    server = QuietServer(("", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    api_base = f"http://127.0.0.1:{port}/v1"
+    urls = [
+        f"http://127.0.0.{i + 2}:{port}/{'flaky' if i % FLAKY_EVERY == 0 else 'page'}/{i}"
+        for i in range(URLS)
+    ]
+    expected = {url: fake_categories(f"Sitio {i}") for i, url in enumerate(urls)}
+    print(f"Classifying {URLS} URLs, killing the first run after {KILL_AFTER}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_taxonomy(tmp)
+        write_input(tmp, urls)
+
+        killed_time = run(tmp, api_base, 1, kill_after=KILL_AFTER)
+        killed_calls = FakeOpenAIHandler.api_usage["calls"]
+        resumed_time = run(tmp, api_base, PROCESSES)
+        total_calls = FakeOpenAIHandler.api_usage["calls"]
+        results = read_output(tmp)
+
+    site_calls, site_correct = site_dedup(api_base, port)
+    server.shutdown()
+
+    retries = sum(count - 1 for count in FlakyHandler.failures.values())
+    print(f"Killed run:  {killed_time:5.2f}s, {killed_calls} model calls")
+    print(f"Resumed run: {resumed_time:5.2f}s with {PROCESSES} processes, {total_calls - killed_calls} model calls")
+    print(f"Model calls per URL over both runs: {total_calls / URLS:.2f}, page retries: {retries}")
+    print(f"Output rows: {len(results)}/{URLS}, all categories correct: {results == expected}")
+    print(f"{SITE_URLS} URLs of {SITES} sites in two runs: {site_calls} model calls, "
+          f"all categories correct: {site_correct}")
+
+
+if __name__ == "__main__":
+    main()
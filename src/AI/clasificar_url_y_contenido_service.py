@@ -1,18 +1,124 @@
 import os
 import sys
+import re
 import json
 import typer
 import requests
-import openai
 import csv
+from functools import lru_cache
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from classification_cache import text_hash
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.urls import normalize_url, url_host  # noqa: E402
+
+# Any OpenAI-compatible chat completions endpoint
+API_BASE = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+API_KEY = os.environ.get("OPENAI_API_KEY", "secret_key")  # Replace with your actual OpenAI API key
+MODEL = "gpt-4o-mini"
+CATEGORIES_CSV = "categorias1.csv"
+TAGS_CSV = "tags.csv"
+MAX_WORKERS = 8
+REQUEST_TIMEOUT = 60
+# Change when a prompt or FUNCTIONS change, so cached answers are not reused
+# (the mode and the taxonomy are added to the cache key by prompt_version())
+PROMPT_VERSION = "1"
+# One chat call per URL with the taxonomy in the system prompt and a JSON answer,
+# instead of the function-calling conversation
+SINGLE_CALL = True
+# Tags per category included in the single-call prompt
+PROMPT_TAGS_PER_CATEGORY = 15
+# Classify only one URL per site (host without "www.") and reuse its result for the others
+DEDUP_DOMAINS = True
 
 app = typer.Typer()
 
-def fetch_and_extract_text(url: str, max_length: int = 2000) -> str:
+FUNCTIONS = [
+    {
+        "name": "fetch",
+        "description": "Fetches and extracts text content from a URL by removing HTML tags.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "url": {"type": "string", "description": "The URL to fetch text content from"}
+            },
+            "required": ["url"]
+        }
+    },
+    {
+        "name": "get_categories",
+        "description": "Provides a list of predefined categories from categorias1.csv.",
+        "parameters": {"type": "object", "properties": {}}
+    },
+    {
+        "name": "get_tags",
+        "description": "Provides a list of predefined tags from tags.csv.",
+        "parameters": {"type": "object", "properties": {}}
+    }
+]
+
+SYSTEM_PROMPT = (
+    "You are a classification assistant. Your task is to categorize webpages based on extracted text and URL structure. "
+    "Follow these guidelines:\n"
+    "1. Retrieve the full webpage text using the 'fetch' function.\n"
+    "2. Use the **predefined list of categories** from 'get_categories'. Only assign categories that exist in this list (use their **codes**).\n"
+    "3. Analyze the text and URL structure to determine the most relevant categories.\n"
+    "4. **Do not create new categories** beyond those provided in 'get_categories'.\n"
+    "5. If no relevant category is found, return an empty dictionary `{}`.\n"
+    "6. Return the classification as a dictionary where keys are **category codes** and values are relevance scores.\n"
+    "7. **Example output format:** `{'srch': 3, 'med': 1}`."
+)
+
+SINGLE_CALL_PROMPT = (
+    "You are a classification assistant. Categorize the webpage from its URL and extracted text.\n"
+    "Use only the category codes listed below (CODE: name | description | tags). Do not create new categories.\n"
+    "Answer with a JSON object of the form {{\"categories\": {{\"CODE\": score}}}}, where score is the relevance "
+    "from 1 to 3. If no category fits, answer {{\"categories\": {{}}}}.\n\n"
+    "{taxonomy}"
+)
+
+
+def create_client(api_key: str = API_KEY, pool_size: int = MAX_WORKERS) -> requests.Session:
+    # With api_key=None the session has no credentials (used to fetch pages)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if api_key:
+        session.headers.update({"Authorization": f"Bearer {api_key}"})
+    return session
+
+
+def chat_completion(client: requests.Session, messages: list, functions: list = None,
+                    api_base: str = API_BASE, model: str = MODEL, response_format: dict = None) -> dict:
+    payload = {"model": model, "messages": messages}
+    if functions:
+        payload["functions"] = functions
+        payload["function_call"] = "auto"
+    if response_format:
+        payload["response_format"] = response_format
+    response = client.post(f"{api_base}/chat/completions", json=payload, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]
+
+
+def parse_classification(content: str) -> dict:
+    match = re.search(r'\{(.+?)\}', content or "", re.DOTALL)
+    if not match:
+        return {}
+    try:
+        return json.loads(match.group(0).replace("'", '"'))
+    except json.JSONDecodeError:
+        return {}
+
+
+def fetch_and_extract_text(url: str, max_length: int = 2000, session: requests.Session = None) -> str:
     try:
         print("Fetching URL...")
-        response = requests.get(url, timeout=15)
+        response = (session or requests).get(url, timeout=15)
         response.raise_for_status()
         html = response.text
         
@@ -25,97 +131,103 @@ def fetch_and_extract_text(url: str, max_length: int = 2000) -> str:
     except Exception as e:
         raise Exception(f"Error fetching or extracting text from URL: {e}")
 
-def get_categories() -> list:
+@lru_cache(maxsize=None)
+def _read_categories(path: str) -> tuple:
     print("Reading categories...")
     try:
-        with open("categorias1.csv", newline="", encoding="utf-8") as f:
+        with open(path, newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
-            categories = [{"code": row["Code"], "name": row["Category"], "description": row["Description"].split(',')} for row in reader]
-        return categories
+            return tuple({"code": row["Code"], "name": row["Category"], "description": row["Description"].split(',')} for row in reader)
     except Exception as e:
         raise Exception(f"Error reading categorias1.csv: {e}")
 
-def get_tags() -> list:
+
+@lru_cache(maxsize=None)
+def _read_tags(path: str) -> tuple:
     print("Reading tags...")
     try:
-        with open("tags.csv", newline="", encoding="utf-8") as f:
+        with open(path, newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
-            tags = [{"code": row["code"], "tags": row["tags"].split(',')} for row in reader]
-        return tags
+            return tuple({"code": row["code"], "tags": row["tags"].split(',')} for row in reader)
     except Exception as e:
         raise Exception(f"Error reading tags.csv: {e}")
 
 
-@app.command()
-def main(
-    url: str,
-    max_length: int = typer.Option(2000, "--len", help="Maximum length of extracted text (in characters).")
-):
-    
-    openai.api_key = "secret_key"  # Replace with your actual OpenAI API key
+# The taxonomy files are read once per process (per path)
+def get_categories() -> list:
+    return list(_read_categories(CATEGORIES_CSV))
 
-    functions = [
-        {
-            "name": "fetch",
-            "description": "Fetches and extracts text content from a URL by removing HTML tags.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "url": {"type": "string", "description": "The URL to fetch text content from"}
-                },
-                "required": ["url"]
-            }
-        },
-        {
-            "name": "get_categories",
-            "description": "Provides a list of predefined categories from categorias1.csv.",
-            "parameters": {"type": "object", "properties": {}}
-        },
-        {
-            "name": "get_tags",
-            "description": "Provides a list of predefined tags from tags.csv.",
-            "parameters": {"type": "object", "properties": {}}
-        }
-    ]
-    
+
+def get_tags() -> list:
+    return list(_read_tags(TAGS_CSV))
+
+
+@lru_cache(maxsize=None)
+def _compact_taxonomy(categories_path: str, tags_path: str) -> str:
+    tags_by_code = {}
+    for row in _read_tags(tags_path):
+        tags = tags_by_code.setdefault(row["code"].strip().upper(), [])
+        tags.extend(t.strip() for t in row["tags"] if t.strip() and t.strip() not in tags)
+    lines = []
+    for category in _read_categories(categories_path):
+        code = category["code"].strip().upper()
+        description = ", ".join(d.strip() for d in category["description"] if d.strip())
+        tags = ", ".join(tags_by_code.get(code, [])[:PROMPT_TAGS_PER_CATEGORY])
+        lines.append(f"{code}: {category['name'].strip()} | {description} | {tags}")
+    return "\n".join(lines)
+
+
+def compact_taxonomy() -> str:
+    """One line per category: 'CODE: name | description | tags'."""
+    return _compact_taxonomy(CATEGORIES_CSV, TAGS_CSV)
+
+
+def prompt_version(single_call: bool = SINGLE_CALL) -> str:
+    """Version used in the cache key: PROMPT_VERSION, the mode and, for single calls, the taxonomy."""
+    if not single_call:
+        return f"{PROMPT_VERSION}-functions"
+    return f"{PROMPT_VERSION}-json-{text_hash(compact_taxonomy())[:12]}"
+
+
+def parse_json_classification(content: str) -> dict:
+    """Read {"categories": {"CODE": score}} and keep only known codes with numeric scores."""
+    try:
+        data = json.loads(content or "")
+    except json.JSONDecodeError:
+        return parse_classification(content)
+    if isinstance(data, dict) and isinstance(data.get("categories"), dict):
+        data = data["categories"]
+    if not isinstance(data, dict):
+        return {}
+    codes = {c["code"].strip().upper() for c in _read_categories(CATEGORIES_CSV)}
+    return {
+        code.strip().upper(): score for code, score in data.items()
+        if code.strip().upper() in codes and isinstance(score, (int, float)) and not isinstance(score, bool)
+    }
+
+
+def run_conversation(url: str, client: requests.Session, max_length: int = 2000,
+                     api_base: str = API_BASE, model: str = MODEL, page_session: requests.Session = None,
+                     page_text: str = None):
+    """Classify one URL; returns the model's final answer, or None on error.
+
+    page_text, if given, answers the model's 'fetch' call for this URL instead of downloading it again.
+    """
     messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a classification assistant. Your task is to categorize webpages based on extracted text and URL structure. "
-                "Follow these guidelines:\n"
-                "1. Retrieve the full webpage text using the 'fetch' function.\n"
-                "2. Use the **predefined list of categories** from 'get_categories'. Only assign categories that exist in this list (use their **codes**).\n"
-                "3. Analyze the text and URL structure to determine the most relevant categories.\n"
-                "4. **Do not create new categories** beyond those provided in 'get_categories'.\n"
-                "5. If no relevant category is found, return an empty dictionary `{}`.\n"
-                "6. Return the classification as a dictionary where keys are **category codes** and values are relevance scores.\n"
-                "7. **Example output format:** `{'srch': 3, 'med': 1}`."
-            )
-        },
+        {"role": "system", "content": SYSTEM_PROMPT},
         {
             "role": "user",
             "content": f"Analyze the webpage at {url}. Extract text **fully and consistently**, then determine the most relevant categories based on 'get_categories'."
         }
     ]
 
-    called_fetch = False
     called_get_categories = False
     called_get_tags = False
     max_iterations = 5
     iterations = 0
 
-    response = openai.ChatCompletion.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        functions=functions,
-        function_call="auto"
-    )
-    message = response.choices[0].message
-
-    categories = get_categories()
-    tags = get_tags()
-    
+    message = chat_completion(client, messages, FUNCTIONS, api_base, model)
+
     while iterations < max_iterations:
         iterations += 1
 
@@ -137,11 +249,13 @@ def main(
 
                 typer.echo(f"Fetching and extracting text from: {url_to_fetch}")
                 try:
-                    result = fetch_and_extract_text(url_to_fetch, max_length=max_length)
+                    if page_text is not None and url_to_fetch == url:
+                        result = page_text
+                    else:
+                        result = fetch_and_extract_text(url_to_fetch, max_length=max_length, session=page_session)
                 except Exception as e:
                     typer.echo(f"Error fetching URL: {e}", err=True)
                     return None
-                called_fetch = True
 
             elif function_name == "get_categories" and not called_get_categories:
                 typer.echo("Retrieving list of categories...")
@@ -170,14 +284,10 @@ def main(
             messages.append(message)
             messages.append({"role": "function", "name": function_name, "content": result})
 
-            response = openai.ChatCompletion.create(
-                model="gpt-4o-mini",
-                messages=messages
-            )
-            message = response.choices[0].message
+            message = chat_completion(client, messages, api_base=api_base, model=model)
 
         else:
-            content_lower = message.get("content", "").lower()
+            content_lower = (message.get("content") or "").lower()
             if ("get_categories" in content_lower or "categories" in content_lower) and not called_get_categories:
                 typer.echo("Detected instruction to call get_categories. Simulating function call...")
                 try:
@@ -193,11 +303,7 @@ def main(
                 })
                 called_get_categories = True
 
-                response = openai.ChatCompletion.create(
-                    model="gpt-4o-mini",
-                    messages=messages
-                )
-                message = response.choices[0].message
+                message = chat_completion(client, messages, api_base=api_base, model=model)
 
             if ("get_tags" in content_lower or "tags" in content_lower) and not called_get_tags:
                 typer.echo("Detected instruction to call get_tags. Simulating function call...")
@@ -214,15 +320,121 @@ def main(
                 })
                 called_get_tags = True
 
-                response = openai.ChatCompletion.create(
-                    model="gpt-4o-mini",
-                    messages=messages
-                )
-                message = response.choices[0].message
+                message = chat_completion(client, messages, api_base=api_base, model=model)
             else:
                 break
 
-    typer.echo(message.get("content", "No content received."))
+    return message.get("content") or ""
+
+
+def run_single_call(url: str, client: requests.Session, max_length: int = 2000,
+                    api_base: str = API_BASE, model: str = MODEL, page_session: requests.Session = None,
+                    page_text: str = None):
+    """Classify one URL with a single JSON-mode chat call; returns the model's answer, or None on error.
+
+    The page is fetched here (unless page_text is given) and sent with the URL;
+    the taxonomy is already in the system prompt.
+    """
+    try:
+        if page_text is None:
+            page_text = fetch_and_extract_text(url, max_length=max_length, session=page_session)
+        system_prompt = SINGLE_CALL_PROMPT.format(taxonomy=compact_taxonomy())
+    except Exception as e:
+        typer.echo(str(e), err=True)
+        return None
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"URL: {url}\nText: {page_text}"},
+    ]
+    message = chat_completion(client, messages, api_base=api_base, model=model,
+                              response_format={"type": "json_object"})
+    return message.get("content") or ""
+
+
+def classify_urls(urls, client: requests.Session = None, max_workers: int = MAX_WORKERS,
+                  max_length: int = 2000, api_base: str = API_BASE, model: str = MODEL,
+                  cache=None, dedup_domains: bool = DEDUP_DOMAINS, single_call: bool = SINGLE_CALL,
+                  on_start=None):
+    """Classify URLs concurrently with one shared client; yields results in input order.
+
+    With single_call, each URL costs one JSON-mode chat call (run_single_call);
+    otherwise the function-calling conversation is used (run_conversation).
+    Duplicate URLs (and, with dedup_domains, URLs of an already seen site) reuse
+    the result of the first one ("duplicate_of"). With a ClassificationCache, each
+    page's text is fetched first and the model is only called if no answer is
+    stored for (normalized URL, text hash, prompt_version(), model) ("cached").
+    on_start(urls), if given, is called with a URL and its duplicates when their
+    classification starts (e.g. to renew their lease in a WorkLedger).
+    """
+    own_client = client is None
+    client = client or create_client(pool_size=max_workers)
+    page_session = create_client(api_key=None, pool_size=max_workers)
+    run = run_single_call if single_call else run_conversation
+    parse = parse_json_classification if single_call else parse_classification
+    version = prompt_version(single_call)
+
+    def failed(url, error):
+        return {"url": url, "categories": {}, "content": None, "error": error, "cached": False}
+
+    def classify_one(url, group):
+        if on_start is not None:
+            on_start(group)
+        page_text = digest = None
+        if cache is not None:
+            try:
+                page_text = fetch_and_extract_text(url, max_length=max_length, session=page_session)
+            except Exception as e:
+                return failed(url, str(e))
+            digest = text_hash(page_text)
+            hit = cache.get(normalize_url(url), digest, version, model)
+            if hit is not None:
+                return {"url": url, "error": None, "cached": True, **hit}
+
+        try:
+            content = run(url, client, max_length, api_base, model, page_session, page_text)
+        except Exception as e:
+            return failed(url, str(e))
+        if content is None:
+            return failed(url, "classification failed")
+        categories = parse(content)
+        if cache is not None:
+            cache.put(normalize_url(url), digest, version, model, categories, content)
+        return {"url": url, "categories": categories, "content": content, "error": None, "cached": False}
+
+    representatives = {}
+    groups = {}
+    for url in urls:
+        key = url_host(url) if dedup_domains else normalize_url(url)
+        representatives.setdefault(key, url)
+        groups.setdefault(key, []).append(url)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {key: executor.submit(classify_one, url, groups[key]) for key, url in representatives.items()}
+            for url in urls:
+                key = url_host(url) if dedup_domains else normalize_url(url)
+                result = futures[key].result()
+                first = representatives[key]
+                yield {**result, "url": url, "duplicate_of": first if url != first else None}
+    finally:
+        page_session.close()
+        if own_client:
+            client.close()
+
+
+@app.command()
+def main(
+    url: str,
+    max_length: int = typer.Option(2000, "--len", help="Maximum length of extracted text (in characters)."),
+    single_call: bool = typer.Option(SINGLE_CALL, "--single-call/--functions",
+                                     help="One JSON-mode call with the taxonomy in the prompt, or the function-calling conversation.")
+):
+    run = run_single_call if single_call else run_conversation
+    with create_client(pool_size=1) as client:
+        content = run(url, client, max_length)
+    if content is not None:
+        typer.echo(content or "No content received.")
+
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -1,14 +1,135 @@
+import os
 import csv
-import subprocess
-import re
-import json
-
-def main(archivo_ejecutable: str, archivo_entrada: str, archivo_salida: str, fila_inicio: int = 1) -> None:
+import time
+import socket
+from concurrent.futures import ProcessPoolExecutor
+
+from classification_cache import ClassificationCache
+from clasificar_url_y_contenido_service import DEDUP_DOMAINS, MAX_WORKERS, classify_urls
+from work_ledger import WorkLedger
+
+CATEGORIES = ["ALDR", "REL", "PORN", "PROV", "POLR", "HUMR", "ENV", "MILX", "HATE", "NEWS", "XED", "PUBH",
+              "GMB", "ANON", "DATE", "GRP", "LGBT", "FILE", "HACK", "COMT", "MMED", "HOST", "SRCH", "GAME",
+              "CULTR", "ECON", "GOVT", "COMM", "CTRL", "IGO", "MISC"]
+# URLs claimed from the ledger at a time by each worker process
+BATCH_SIZE = 50
+# While other workers hold URLs or failed URLs wait for a retry, check the ledger this often
+POLL_SECONDS = 10
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def liberar_trabajadores_caidos(ledger: WorkLedger) -> int:
+    """
+    Return to pending the URLs left in_flight by worker processes of this
+    machine that are no longer running (a crashed or killed run).
+    """
+    liberadas = 0
+    host = socket.gethostname()
+    for worker in ledger.in_flight_workers():
+        worker_host, _, pid = (worker or "").rpartition(":")
+        if worker_host != host or not pid.isdigit():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            liberadas += ledger.release(worker)
+        except PermissionError:
+            pass
+    return liberadas
+
+
+def trabajar(ledger_path: str, max_workers: int = MAX_WORKERS, lote: int = BATCH_SIZE) -> dict:
+    """
+    Worker loop: claim URLs from the ledger, classify them and record the
+    result, until no URL is pending, in flight or waiting for a retry.
+    Several processes can run it at once on the same ledger file. The lease
+    of each URL is renewed when its classification starts, and a result
+    that arrives after another worker reclaimed the URL is discarded.
+
+    With DEDUP_DOMAINS, URLs are claimed by whole sites, and a URL whose site
+    was already classified in an earlier batch (by any worker) reuses that
+    result instead of going to the model.
+    """
+    worker = worker_id()
+    ledger = WorkLedger(ledger_path)
+    cache = ClassificationCache()
+    totales = {"clasificadas": 0, "reutilizadas": 0, "fallidas": 0, "descartadas": 0}
+
+    def renovar(urls):
+        ledger.renew(urls, worker)
+
+    while True:
+        urls = ledger.claim(worker, lote, by_site=DEDUP_DOMAINS)
+        if not urls:
+            espera = ledger.next_retry()
+            if espera is None:
+                break
+            time.sleep(min(espera, POLL_SECONDS))
+            continue
+
+        previas = ledger.earlier_results(urls) if DEDUP_DOMAINS else {}
+        for url, (primera, categories, content) in previas.items():
+            print(f"Procesando: {url} (reutiliza la clasificación de {primera})")
+            if ledger.done(url, worker, categories, content):
+                totales["clasificadas"] += 1
+                totales["reutilizadas"] += 1
+            else:
+                totales["descartadas"] += 1
+        urls = [url for url in urls if url not in previas]
+
+        for result in classify_urls(urls, max_workers=max_workers, cache=cache, on_start=renovar):
+            url = result["url"]
+            print(f"Procesando: {url}")
+            if result["error"]:
+                print(f"Error al clasificar la URL: {result['error']}")
+                if not ledger.fail(url, worker, result["error"]):
+                    print("La URL ya la tiene otro trabajador; se descarta el error.")
+                    totales["descartadas"] += 1
+                    continue
+                totales["fallidas"] += 1
+                continue
+            print("Datos extraídos:")
+            print(result["categories"])
+            if not ledger.done(url, worker, result["categories"], result["content"]):
+                print("La URL ya la tiene otro trabajador; se descarta el resultado.")
+                totales["descartadas"] += 1
+                continue
+            totales["clasificadas"] += 1
+            if result["cached"] or result["duplicate_of"]:
+                totales["reutilizadas"] += 1
+
+    cache.close()
+    ledger.close()
+    return totales
+
+
+def escribir_resultados(archivo_salida: str, resultados) -> None:
+    """
+    Write every URL of the ledger to the output CSV (atomically, so a crash
+    never leaves a half-written file). URLs that failed get all zeros.
+    """
+    header = ["url"] + CATEGORIES + ["output"]
+    tmp_path = f"{archivo_salida}.tmp"
+    with open(tmp_path, "w", newline='', encoding='utf-8') as f_out:
+        writer = csv.writer(f_out)
+        writer.writerow(header)
+        for url, category_counts, _ in resultados:
+            category_counts = category_counts or {}
+            detected_categories = {cat: 0 for cat in CATEGORIES}
+            for category, count in category_counts.items():
+                if category in detected_categories:
+                    detected_categories[category] = count
+            category_output = ", ".join([cat.lower() for cat in category_counts.keys()])
+            writer.writerow([url] + [detected_categories[cat] for cat in CATEGORIES] + [category_output])
+    os.replace(tmp_path, archivo_salida)
+
+
+def main(archivo_entrada: str, archivo_salida: str, fila_inicio: int = 1, max_workers: int = MAX_WORKERS,
+         procesos: int = 1, ledger_path: str = None, lote: int = BATCH_SIZE) -> None:
     try:
-        categories = ["ALDR", "REL", "PORN", "PROV", "POLR", "HUMR", "ENV", "MILX", "HATE", "NEWS", "XED", "PUBH",
-                      "GMB", "ANON", "DATE", "GRP", "LGBT", "FILE", "HACK", "COMT", "MMED", "HOST", "SRCH", "GAME",
-                      "CULTR", "ECON", "GOVT", "COMM", "CTRL", "IGO", "MISC"]
-
         with open(archivo_entrada, newline='', encoding='utf-8') as f:
             reader = csv.reader(f)
             rows = list(reader)
@@ -17,73 +138,41 @@ def main(archivo_ejecutable: str, archivo_entrada: str, archivo_salida: str, fil
             print("El archivo de entrada está vacío.")
             return
 
-        header = ["url"] + categories + ["output"]
-
-        file_is_empty = True  
-        try:
-            with open(archivo_salida, "r", encoding='utf-8') as f_out:
-                if f_out.read(1):  
-                    file_is_empty = False
-        except FileNotFoundError:
-            file_is_empty = True 
-
-        with open(archivo_salida, "a", newline='', encoding='utf-8') as f_out:
-            writer = csv.writer(f_out)
-
-            if file_is_empty:
-                writer.writerow(header)  
-
-            for i in range(1, len(rows)):
-                if i < fila_inicio:
-                    continue
-
-                row = rows[i]
-                url = row[0]
-                print(f"Procesando fila {i}: {url}")
-
-                result = subprocess.run(
-                    ["python", archivo_ejecutable, url],
-                    capture_output=True,
-                    text=True
-                )
-
-                detected_categories = {cat: 0 for cat in categories}
-                category_counts = {}
-                
-                print("Salida del script Python:")
-                print(result.stdout)
-
-                match = re.search(r'\{(.+?)\}', result.stdout, re.DOTALL)
-                if match:
-                    json_data = match.group(0)
-                    try:
-                        category_counts = json.loads(json_data.replace("'", '"'))
-                        print("Datos extraídos:")
-                        print(category_counts)
-
-                        for category, count in category_counts.items():
-                            if category in detected_categories:
-                                detected_categories[category] = count
-                    except json.JSONDecodeError:
-                        print(f"Error al procesar el JSON: {json_data}")
-
-                row_data = [url] + [detected_categories[cat] for cat in categories]
-
-                category_output = ", ".join([cat.lower() for cat in category_counts.keys()])
-
-                row_data.append(category_output)
-
-                writer.writerow(row_data)
+        # El registro de trabajo (ledger) guarda el estado de cada URL, así que
+        # al volver a ejecutar solo se procesan las pendientes, las que quedaron
+        # a medias y las fallidas que toca reintentar.
+        ledger_path = ledger_path or f"{os.path.splitext(archivo_salida)[0]}.ledger.sqlite"
+        ledger = WorkLedger(ledger_path)
+        nuevas = ledger.add(row[0] for row in rows[max(fila_inicio, 1):])
+        liberadas = liberar_trabajadores_caidos(ledger)
+        if liberadas:
+            print(f"{liberadas} URLs de una ejecución interrumpida vuelven a estar pendientes.")
+        print(f"{nuevas} URLs nuevas en el registro de trabajo. Estado: {ledger.counts()}")
+
+        if procesos > 1:
+            with ProcessPoolExecutor(max_workers=procesos) as executor:
+                futures = [executor.submit(trabajar, ledger_path, max_workers, lote) for _ in range(procesos)]
+                totales = [future.result() for future in futures]
+        else:
+            totales = [trabajar(ledger_path, max_workers, lote)]
+
+        escribir_resultados(archivo_salida, ledger.results())
+        estado = ledger.counts()
+        ledger.close()
 
         print(f"Proceso finalizado. Resultados guardados en '{archivo_salida}'.")
+        print(f"{sum(t['clasificadas'] for t in totales)} URLs clasificadas en esta ejecución, "
+              f"{sum(t['reutilizadas'] for t in totales)} reutilizaron una clasificación previa, "
+              f"{sum(t['fallidas'] for t in totales)} intentos fallidos.")
+        print(f"Estado del registro: {estado}")
 
     except Exception as e:
         print(f"Error: {e}")
 
-main(
-    "src/services/clasificar_url_y_contenido_service.py",
-    "data/url_classification/inputs_pre_tagging.csv",
-    "outputIA.csv",
-    "categoriasIA_output.csv",
-    fila_inicio=1
-)
\ No newline at end of file
+
+if __name__ == "__main__":
+    main(
+        "data/csv_output/url_classification/inputs_pre_tagging.csv",
+        "categoriasIA_output.csv",
+        fila_inicio=1
+    )
@@ -0,0 +1,57 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+CACHE_PATH = "data/cache/ai_classifications.sqlite"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ClassificationCache:
+    """
+    Thread-safe SQLite cache of AI classifications keyed by
+    (normalized URL, extracted-text hash, prompt version, model).
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            "url TEXT NOT NULL, text_hash TEXT NOT NULL, prompt_version TEXT NOT NULL, model TEXT NOT NULL, "
+            "categories TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (url, text_hash, prompt_version, model))"
+        )
+        self.conn.commit()
+
+    def get(self, url: str, digest: str, prompt_version: str, model: str):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT categories, content FROM classifications "
+                "WHERE url = ? AND text_hash = ? AND prompt_version = ? AND model = ?",
+                (url, digest, prompt_version, model),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"categories": json.loads(row[0]), "content": row[1]}
+
+    def put(self, url: str, digest: str, prompt_version: str, model: str, categories: dict, content: str) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO classifications "
+                "(url, text_hash, prompt_version, model, categories, content, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, prompt_version, model, json.dumps(categories), content, time.time()),
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.urls import url_host  # noqa: E402
+
+LEDGER_PATH = "data/cache/ai_ledger.sqlite"
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 60
+MAX_BACKOFF_SECONDS = 3600
+# An in-flight URL whose worker has not reported back after this long is claimed again
+LEASE_SECONDS = 900
+
+PENDING, IN_FLIGHT, DONE, FAILED = "pending", "in_flight", "done", "failed"
+# A URL can be claimed: pending, failed and due for a retry, or in_flight with an expired lease
+CLAIMABLE = "(state = ? OR (state = ? AND attempts < ? AND next_attempt_at <= ?) OR (state = ? AND claimed_at < ?))"
+
+
+def site_key(url: str) -> str:
+    """The host of a URL without "www." (the site classify_urls() deduplicates on), or the URL itself."""
+    try:
+        return url_host(url) or url
+    except ValueError:
+        return url
+
+
+class WorkLedger:
+    """
+    SQLite ledger of the URLs of a classification run and their state
+    (pending, in_flight, done, failed), attempts, last error and next retry.
+
+    Several processes can open the same file: claim() marks URLs in_flight
+    inside an IMMEDIATE transaction, so a URL is handed to only one worker.
+    done(), fail() and renew() only touch URLs the worker still holds, so a
+    worker whose lease expired and was reclaimed cannot overwrite the result.
+    Each URL also stores its site (site_key()), so claim() can hand out whole
+    sites and earlier_results() can reuse a site's result across batches.
+    """
+
+    def __init__(self, path: str = LEDGER_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS work ("
+            "url TEXT PRIMARY KEY, position INTEGER NOT NULL, state TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, next_attempt_at REAL NOT NULL DEFAULT 0, "
+            "worker TEXT, claimed_at REAL, categories TEXT, content TEXT, updated_at REAL, host TEXT)"
+        )
+        if "host" not in [row[1] for row in self.conn.execute("PRAGMA table_info(work)")]:
+            # Ledgers written before sites were recorded
+            with self.immediate():
+                self.conn.execute("ALTER TABLE work ADD COLUMN host TEXT")
+                urls = [row[0] for row in self.conn.execute("SELECT url FROM work")]
+                self.conn.executemany("UPDATE work SET host = ? WHERE url = ?", [(site_key(url), url) for url in urls])
+        self.conn.execute("CREATE INDEX IF NOT EXISTS work_state ON work (state, next_attempt_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS work_host ON work (host, state)")
+
+    @contextmanager
+    def immediate(self):
+        """
+        Run the block in an IMMEDIATE transaction (the caller holds the lock);
+        it is rolled back if the block or the commit raises, so a failed
+        statement (e.g. "database is locked") does not leave it open.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+
+    def add(self, urls) -> int:
+        """Queue URLs not already in the ledger; returns how many were added."""
+        with self.lock:
+            with self.immediate():
+                start = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM work").fetchone()[0]
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO work (url, position, state, updated_at, host) VALUES (?, ?, ?, ?, ?)",
+                    [(url, start + i, PENDING, time.time(), site_key(url)) for i, url in enumerate(urls)],
+                )
+                added = self.conn.total_changes - before
+        return added
+
+    def claim(self, worker: str, limit: int, by_site: bool = False) -> list:
+        """
+        Mark up to limit URLs in_flight for this worker and return them: pending
+        ones, failed ones due for a retry, and in_flight ones whose lease expired.
+
+        With by_site, whole sites are claimed: the sites of the first limit
+        claimable URLs, skipping sites another worker holds URLs of, with all
+        their claimable URLs (so a batch can be longer than limit).
+        """
+        now = time.time()
+        claimable = (PENDING, FAILED, MAX_ATTEMPTS, now, IN_FLIGHT, now - LEASE_SECONDS)
+        with self.lock:
+            with self.immediate():
+                if by_site:
+                    hosts = sorted({row[0] for row in self.conn.execute(
+                        f"SELECT host FROM work WHERE {CLAIMABLE} AND host NOT IN ("
+                        "SELECT host FROM work WHERE state = ? AND claimed_at >= ? AND worker != ?) "
+                        "ORDER BY position LIMIT ?",
+                        (*claimable, IN_FLIGHT, now - LEASE_SECONDS, worker, limit),
+                    )})
+                    urls = [row[0] for row in self.conn.execute(
+                        f"SELECT url FROM work WHERE {CLAIMABLE} AND host IN ({', '.join('?' * len(hosts))}) "
+                        "ORDER BY position",
+                        (*claimable, *hosts),
+                    )] if hosts else []
+                else:
+                    urls = [row[0] for row in self.conn.execute(
+                        f"SELECT url FROM work WHERE {CLAIMABLE} ORDER BY position LIMIT ?", (*claimable, limit),
+                    )]
+                self.conn.executemany(
+                    "UPDATE work SET state = ?, worker = ?, claimed_at = ?, updated_at = ? WHERE url = ?",
+                    [(IN_FLIGHT, worker, now, now, url) for url in urls],
+                )
+        return urls
+
+    def renew(self, urls, worker: str) -> None:
+        """Restart the lease of URLs this worker holds, when their work starts."""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE work SET claimed_at = ?, updated_at = ? WHERE url = ? AND worker = ? AND state = ?",
+                [(now, now, url, worker, IN_FLIGHT) for url in urls],
+            )
+
+    def done(self, url: str, worker: str, categories: dict, content: str) -> bool:
+        """Record a result; returns False if the worker no longer holds the URL."""
+        with self.lock:
+            return self.conn.execute(
+                "UPDATE work SET state = ?, attempts = attempts + 1, last_error = NULL, "
+                "categories = ?, content = ?, updated_at = ? WHERE url = ? AND worker = ? AND state = ?",
+                (DONE, json.dumps(categories), content, time.time(), url, worker, IN_FLIGHT),
+            ).rowcount == 1
+
+    def fail(self, url: str, worker: str, error: str) -> bool:
+        """
+        Record a failed attempt; the URL is retried after an exponential backoff.
+        Returns False if the worker no longer holds the URL.
+        """
+        now = time.time()
+        with self.lock:
+            with self.immediate():
+                row = self.conn.execute(
+                    "SELECT attempts FROM work WHERE url = ? AND worker = ? AND state = ?", (url, worker, IN_FLIGHT)
+                ).fetchone()
+                if row is not None:
+                    attempts = row[0] + 1
+                    delay = min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+                    self.conn.execute(
+                        "UPDATE work SET state = ?, attempts = ?, last_error = ?, next_attempt_at = ?, updated_at = ? "
+                        "WHERE url = ?",
+                        (FAILED, attempts, error, now + delay, now, url),
+                    )
+        return row is not None
+
+    def earlier_results(self, urls) -> dict:
+        """
+        Return {url: (done URL, categories, content)} for the URLs whose site
+        already has a done URL (the first one added).
+        """
+        found = {}
+        with self.lock:
+            for url in urls:
+                row = self.conn.execute(
+                    "SELECT done.url, done.categories, done.content FROM work AS claimed "
+                    "JOIN work AS done ON done.host = claimed.host AND done.state = ? "
+                    "WHERE claimed.url = ? ORDER BY done.position LIMIT 1",
+                    (DONE, url),
+                ).fetchone()
+                if row is not None:
+                    found[url] = (row[0], json.loads(row[1]), row[2])
+        return found
+
+    def release(self, worker: str) -> int:
+        """Put the in_flight URLs of a worker that is known to be gone back to pending."""
+        with self.lock:
+            return self.conn.execute(
+                "UPDATE work SET state = ?, worker = NULL, claimed_at = NULL, updated_at = ? "
+                "WHERE state = ? AND worker = ?",
+                (PENDING, time.time(), IN_FLIGHT, worker),
+            ).rowcount
+
+    def in_flight_workers(self) -> set:
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT DISTINCT worker FROM work WHERE state = ?", (IN_FLIGHT,))}
+
+    def next_retry(self):
+        """
+        Seconds until a failed URL is due for a retry or an in_flight lease
+        expires, or None if no URL is failed-but-retryable or in_flight.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(due) FROM ("
+                "SELECT next_attempt_at AS due FROM work WHERE state = ? AND attempts < ? "
+                "UNION ALL SELECT claimed_at + ? FROM work WHERE state = ?)",
+                (FAILED, MAX_ATTEMPTS, LEASE_SECONDS, IN_FLIGHT),
+            ).fetchone()
+        return None if row[0] is None else max(row[0] - time.time(), 0)
+
+    def counts(self) -> dict:
+        with self.lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM work GROUP BY state").fetchall())
+
+    def results(self):
+        """Return [(url, categories or None, last error)] for every URL, in the order they were added."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url, state, categories, last_error FROM work ORDER BY position"
+            ).fetchall()
+        return [(url, json.loads(categories) if state == DONE else None, error) for url, state, categories, error in rows]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Page Crawler for URL Classification
+
+Downloads many pages concurrently with asyncio/aiohttp and hands each one
+to a callback, in three stages joined by bounded queues:
+download -> parse (optional, in a process pool) -> handle_page callback.
+- At most CONCURRENCY requests are in flight, and at most PER_HOST to the
+  same host, over one shared connection pool.
+- DNS answers are cached for DNS_CACHE_SECONDS.
+- Each attempt is limited to REQUEST_TIMEOUT seconds (CONNECT_TIMEOUT to
+  connect); failed attempts are retried like fetch_html_text() does.
+- With parse_page, each page is parsed in a pool of parse_workers
+  processes, so CPU-bound HTML parsing runs on other cores instead of
+  stalling the downloads.
+- The callback runs in a worker thread, one page at a time, so it can do
+  CPU work and write files without blocking the other stages. Pages arrive
+  in completion order, not input order.
+- When a queue is full the stage before it waits, so memory stays bounded.
+- With a PageStore (page_store.py), stored pages skip the download and
+  the parse stages, and can go to a separate handle_stored callback.
+
+A page that cannot be downloaded is passed to the callback as "" (never
+parsed), which is what the serial fetch_html_text() returned in that case.
+If the callback or a parse raises, the other stages are cancelled and the
+error is raised by crawl(), instead of the downloads waiting forever on a
+full queue.
+
+Used by generate_unique_inputs.py; not meant to be run.
+"""
+
+import os
+import time
+import asyncio
+import aiohttp
+from concurrent.futures import ProcessPoolExecutor
+
+from page_store import PageStore
+
+CONCURRENCY = 32
+PER_HOST = 2
+REQUEST_TIMEOUT = 30
+CONNECT_TIMEOUT = 10
+RETRIES = 2
+RETRY_DELAY = 5
+DNS_CACHE_SECONDS = 300
+QUEUE_SIZE = 100
+
+REQUEST_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+        " AppleWebKit/537.36 (KHTML, like Gecko)"
+        " Chrome/123.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+}
+
+
+async def fetch_page(session, url, retries=RETRIES, retry_delay=RETRY_DELAY, headers=None):
+    """
+    Download a page.
+
+    Returns (status, html, response headers); status is 0 and html "" when
+    no response could be read, and html is "" for 304 and for any error
+    status (400 or more); other 2xx/3xx responses return their body.
+    """
+    status, response_headers = 0, {}
+    for attempt in range(1, retries + 1):
+        try:
+            async with session.get(url, headers=headers) as response:
+                status, response_headers = response.status, response.headers
+                if status == 304:
+                    return status, "", response_headers
+                response.raise_for_status()
+                html = await response.text(encoding="utf-8", errors="replace")
+                return status, html, response_headers
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error fetching URL (attempt {attempt}/{retries}): {url}: {e!r}")
+            if attempt < retries:
+                await asyncio.sleep(retry_delay)
+    return status, "", response_headers
+
+
+async def crawl(
+    urls,
+    handle_page,
+    concurrency=CONCURRENCY,
+    per_host=PER_HOST,
+    timeout=REQUEST_TIMEOUT,
+    connect_timeout=CONNECT_TIMEOUT,
+    retries=RETRIES,
+    retry_delay=RETRY_DELAY,
+    queue_size=QUEUE_SIZE,
+    parse_page=None,
+    parse_workers=None,
+    store=None,
+    handle_stored=None,
+):
+    """
+    Download every URL and call handle_page(url, page) for each one.
+
+    page is the HTML, or parse_page(html) when parse_page is given (a
+    top-level function, since it runs in another process).
+
+    With a PageStore, fresh stored pages are not downloaded, stale ones are
+    revalidated with a conditional GET, and new downloads are stored. If a
+    stored page cannot be downloaded again, the stored copy is used.
+    Pages taken from the store unchanged (fresh, revalidated with a 304, or
+    kept after a failed download) go to handle_stored(url, page) instead
+    of handle_page when it is given.
+
+    Returns {"pages", "failed", "cached", "revalidated", "elapsed"}.
+    An exception raised by handle_page or parse_page stops the crawl and is
+    raised again here.
+    """
+    start = time.perf_counter()
+    pending = asyncio.Queue()
+    for url in urls:
+        pending.put_nowait(url)
+    pages = asyncio.Queue(maxsize=queue_size)
+    stats = {"pages": 0, "failed": 0, "cached": 0, "revalidated": 0}
+
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=per_host,
+        ttl_dns_cache=DNS_CACHE_SECONDS,
+        ssl=False,
+    )
+    client_timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+
+    def stored_page(entry):
+        return entry["text"] if parse_page else entry["html"]
+
+    async def download(session):
+        # Queue items are (url, page, record); record holds the fetch
+        # metadata of a new download, and is None for a stored page.
+        while True:
+            try:
+                url = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            entry = store.get(url, with_html=not parse_page) if store else None
+            if entry and store.is_fresh(entry):
+                stats["cached"] += 1
+                await pages.put((url, stored_page(entry), None))
+                continue
+
+            status, html, headers = await fetch_page(
+                session, url, retries, retry_delay, PageStore.conditional_headers(entry)
+            )
+            if entry and entry["status"] == 200 and (status == 304 or not html):
+                if status == 304:
+                    stats["revalidated"] += 1
+                    store.refresh(url)
+                await pages.put((url, stored_page(entry), None))
+                continue
+
+            record = {
+                "status": status,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+            }
+            await pages.put((url, html, record if store else None))
+
+    async def parse(pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await pages.get()
+            if item is None:
+                return
+            url, page, record = item
+            if record is not None:
+                record["html"] = page
+            if page and (record is not None or not store):
+                page = await loop.run_in_executor(pool, parse_page, page)
+            await parsed.put((url, page, record))
+
+    def finish_page(url, page, record):
+        if record is not None:
+            html = record.pop("html", page)
+            store.put(url, html=html, text=page if parse_page else "", **record)
+        elif store and handle_stored:
+            handle_stored(url, page)
+            return
+        handle_page(url, page)
+
+    async def consume():
+        while True:
+            item = await parsed.get()
+            if item is None:
+                return
+            url, page, record = item
+            stats["pages"] += 1
+            if not page:
+                stats["failed"] += 1
+            await asyncio.to_thread(finish_page, url, page, record)
+
+    pool = None
+    parsed = pages
+    if parse_page:
+        parse_workers = parse_workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=parse_workers)
+        parsed = asyncio.Queue(maxsize=queue_size)
+
+    parsers = []
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=client_timeout, headers=REQUEST_HEADERS
+    ) as session:
+        consumer = asyncio.create_task(consume())
+        if pool:
+            parsers = [asyncio.create_task(parse(pool)) for _ in range(parse_workers)]
+        downloaders = [
+            asyncio.create_task(download(session))
+            for _ in range(min(concurrency, pending.qsize()))
+        ]
+
+        async def finish():
+            await asyncio.gather(*downloaders)
+            if pool:
+                for _ in parsers:
+                    await pages.put(None)
+                await asyncio.gather(*parsers)
+            await parsed.put(None)
+            await consumer
+
+        # Watch every stage, not only finish(): if the consumer or a parser
+        # dies, the queues fill up and finish() would wait forever.
+        stages = [consumer] + parsers + downloaders + [asyncio.create_task(finish())]
+        try:
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for task in stages:
+                if task in done and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in stages:
+                task.cancel()
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def crawl_urls(urls, handle_page, **kwargs):
+    """
+    Synchronous wrapper around crawl().
+    """
+    return asyncio.run(crawl(urls, handle_page, **kwargs))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Async Crawler Against Local Stub Sites
+
+This script:
+1. Starts SITES local HTTP servers serving fixture pages. Some pages are
+   slow (longer than the timeout), some always fail with HTTP 500, some
+   fail once with 503, and a few URLs point to a closed port.
+2. Downloads every page serially with fetch_html_text().
+3. Downloads them again with the async crawler, parsing in its process pool.
+4. Checks both give the same text for every URL, that no site saw more
+   than PER_HOST parallel requests, and prints the speedup.
+
+How to use:
+1. Adjust PAGES, SITES, STUB_LATENCY and TIMEOUT below if needed.
+2. Run: python src/classification/benchmark_async_crawler.py
+"""
+
+import io
+import time
+import socket
+import threading
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from async_crawler import crawl_urls
+from page_parser import extract_text
+from generate_unique_inputs import fetch_html_text
+
+PAGES = 200
+SITES = 16
+STUB_LATENCY = 0.05
+TIMEOUT = 1
+SLOW_SECONDS = 2
+RETRIES = 2
+RETRY_DELAY = 0.2
+CONCURRENCY = 32
+PER_HOST = 2
+
+
+def make_page(index):
+    """
+    Build a fixture HTML page with scripts, styles and accented text.
+    """
+    return (
+        "<html><head><title>Página {0}</title><style>p {{color: red}}</style>"
+        "<script>var casino = {0};</script></head><body>"
+        "<h1>Noticias   del día {0}</h1><p>Información sobre política, "
+        "apuestas y niños.</p><p>Contáctenos &amp; términos</p></body></html>"
+    ).format(index)
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    """
+    Serve /page/<n>: every 25th page is slow, every 25th+1 always fails and
+    every 25th+2 fails on its first attempt.
+    """
+
+    attempts = {}
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        port = self.server.server_address[1]
+        index = int(self.path.rsplit("/", 1)[1])
+        if index % 25 == 0:
+            # The client gives up on slow pages before they finish, so they
+            # would inflate the parallel request count.
+            self.respond(index, 1)
+            return
+        with self.lock:
+            self.attempts[self.path, port] = self.attempts.get((self.path, port), 0) + 1
+            attempt = self.attempts[self.path, port]
+            self.active[port] = self.active.get(port, 0) + 1
+            self.peak[port] = max(self.peak.get(port, 0), self.active[port])
+        try:
+            self.respond(index, attempt)
+        finally:
+            with self.lock:
+                self.active[port] -= 1
+
+    def respond(self, index, attempt):
+        time.sleep(SLOW_SECONDS if index % 25 == 0 else STUB_LATENCY)
+        if index % 25 == 1 or (index % 25 == 2 and attempt == 1):
+            self.send_response(500 if index % 25 == 1 else 503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = make_page(index).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_sites():
+    """
+    Start SITES stub servers in background threads and return them.
+    """
+    servers = []
+    for _ in range(SITES):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubSiteHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def closed_port():
+    """
+    Return a local port with nothing listening on it.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_urls(servers):
+    """
+    Spread PAGES URLs over the stub sites, plus a few dead ones.
+    """
+    urls = [
+        f"http://127.0.0.1:{servers[i % SITES].server_address[1]}/page/{i}"
+        for i in range(PAGES)
+    ]
+    dead = closed_port()
+    urls += [f"http://127.0.0.1:{dead}/page/{i}" for i in range(3)]
+    return urls
+
+
+def run_serial(urls):
+    """
+    Fetch every URL with fetch_html_text(); returns ({url: text}, seconds).
+    """
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        texts = {
+            url: fetch_html_text(url, retries=RETRIES, delay=RETRY_DELAY, timeout=TIMEOUT)
+            for url in urls
+        }
+    return texts, time.perf_counter() - start
+
+
+def run_crawler(urls):
+    """
+    Fetch every URL with the async crawler; returns ({url: text}, stats).
+    """
+    texts = {}
+
+    def handle_page(url, text):
+        texts[url] = text
+
+    with redirect_stdout(io.StringIO()):
+        stats = crawl_urls(
+            urls,
+            handle_page,
+            concurrency=CONCURRENCY,
+            per_host=PER_HOST,
+            timeout=TIMEOUT,
+            retries=RETRIES,
+            retry_delay=RETRY_DELAY,
+            parse_page=extract_text,
+        )
+    return texts, stats
+
+
+def main():
+    servers = start_stub_sites()
+    urls = build_urls(servers)
+    print(f"Fetching {len(urls)} URLs from {SITES} stub sites (timeout {TIMEOUT}s)")
+
+    serial_texts, serial_time = run_serial(urls)
+    StubSiteHandler.attempts.clear()
+    StubSiteHandler.peak.clear()
+    crawler_texts, stats = run_crawler(urls)
+    peak_per_site = max(StubSiteHandler.peak.values())
+
+    for server in servers:
+        server.shutdown()
+
+    crawler_time = stats["elapsed"]
+    print(f"Serial:  {serial_time:6.2f}s ({len(urls) / serial_time:.1f} pages/s)")
+    print(f"Crawler: {crawler_time:6.2f}s ({len(urls) / crawler_time:.1f} pages/s, "
+          f"concurrency {CONCURRENCY}, {PER_HOST} per host)")
+    print(f"Speedup: {serial_time / crawler_time:.1f}x")
+    print(f"Failed pages: {stats['failed']}, peak parallel requests per site: {peak_per_site}")
+    print(f"Identical text: {serial_texts == crawler_texts}")
+
+
+if __name__ == "__main__":
+    main()
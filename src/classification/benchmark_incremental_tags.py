@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark Incremental Reclassification After a Tag Dictionary Edit
+
+This script:
+1. Fills a temporary page store with a synthetic page per URL of
+   inputs_pre_tagging.csv and counts every tag of the current dictionary.
+2. Edits the dictionary: adds ADDED_TAGS to one category and drops the
+   last tags of another.
+3. Reclassifies the whole corpus from scratch with the edited dictionary.
+4. Reclassifies it incrementally (only the added tags are counted).
+5. Checks both CSVs are identical and prints the timings.
+
+How to use:
+1. Adjust ADDED_TAGS and PAGE_WORDS below if needed.
+2. Run: python src/classification/benchmark_incremental_tags.py
+"""
+
+import io
+import os
+import csv
+import time
+import random
+import tempfile
+from contextlib import redirect_stdout
+
+from page_store import PageStore, normalize_url
+from tag_counts import TagCountStore
+from tag_matcher import get_tag_matcher
+from benchmark_tag_matcher import make_page
+from generate_unique_inputs import (
+    TAGS_CSV_PATH, INPUT_URLS_PATH, CATEGORIES, load_tags, deduce_categories,
+    classify_text_and_url, update_tag_counts, write_classification_csv,
+)
+
+ADDED_TAGS = {"news": ["diario", "periodico", "titulares"], "gmb": ["ruleta", "tragamonedas"]}
+DROPPED_CATEGORY = "porn"
+DROPPED_TAGS = 5
+SEED = 7
+
+
+def edit_dictionary(categories):
+    """
+    Return a copy of the dictionary with ADDED_TAGS added and some tags dropped.
+    """
+    edited = {c: list(tags) for c, tags in categories.items()}
+    for category, tags in ADDED_TAGS.items():
+        edited[category] += tags
+    edited[DROPPED_CATEGORY] = edited[DROPPED_CATEGORY][:-DROPPED_TAGS]
+    return edited
+
+
+def write_full_csv(output_path, pages, categories):
+    """
+    The non-incremental path: classify every page text again.
+    """
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "detected_tags"] + CATEGORIES + ["deduction"])
+        for url, text in pages:
+            counts, tags = classify_text_and_url(text, categories, url)
+            writer.writerow(
+                [url, tags] + [counts.get(cat, 0) for cat in CATEGORIES] + [deduce_categories(counts)]
+            )
+
+
+def main():
+    categories = load_tags(TAGS_CSV_PATH)
+    edited = edit_dictionary(categories)
+    vocabulary = [t for tags in categories.values() for t in tags if t]
+    vocabulary += [t for tags in ADDED_TAGS.values() for t in tags]
+
+    with open(INPUT_URLS_PATH, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        # One URL per page store key, since each one gets a different page
+        urls = list({normalize_url(row[0]): row[0] for row in reader}.values())
+    rng = random.Random(SEED)
+    pages = [(url, make_page(rng, vocabulary)) for url in urls]
+    print(f"{len(pages)} stored pages, {len(vocabulary)} tags; "
+          f"adding {sum(len(t) for t in ADDED_TAGS.values())} tags and dropping {DROPPED_TAGS}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        page_store = PageStore(os.path.join(tmp, "pages.sqlite"))
+        count_store = TagCountStore(os.path.join(tmp, "tag_counts.sqlite"))
+        matcher = get_tag_matcher(categories)
+        for url, text in pages:
+            page_store.put(url, 200, text=text)
+            count_store.put(url, matcher.count_tags(text, url))
+        count_store.save_dictionary(categories)
+
+        full_csv = os.path.join(tmp, "full.csv")
+        start = time.perf_counter()
+        write_full_csv(full_csv, pages, edited)
+        full_time = time.perf_counter() - start
+
+        incremental_csv = os.path.join(tmp, "incremental.csv")
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            update_tag_counts(count_store, page_store, edited)
+            write_classification_csv(incremental_csv, urls, edited, count_store.counts())
+        incremental_time = time.perf_counter() - start
+
+        with open(full_csv, encoding="utf-8") as a, open(incremental_csv, encoding="utf-8") as b:
+            identical = a.read() == b.read()
+        page_store.close()
+        count_store.close()
+
+    print(f"Full reclassification:        {full_time:6.2f}s")
+    print(f"Incremental reclassification: {incremental_time:6.2f}s ({full_time / incremental_time:.1f}x faster)")
+    print(f"Identical CSV: {identical}")
+
+
+if __name__ == "__main__":
+    main()
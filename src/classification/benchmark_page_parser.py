@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML Text Extraction Over a Folder of Saved Pages
+
+This script:
+1. Loads every .html file in FIXTURES_DIR. If the folder is missing or
+   empty, SYNTHETIC_PAGES generated pages are used instead.
+2. Extracts the text of every page serially with html.parser (the old path).
+3. Extracts it again in a process pool with 1, 2, 4... workers up to the
+   number of cores, with html.parser and, when installed, lxml.
+4. Prints pages/s for each run and checks the texts against the serial run.
+
+How to use:
+1. Save pages as .html files in FIXTURES_DIR (or rely on the synthetic ones).
+2. Run: python src/classification/benchmark_page_parser.py
+"""
+
+import os
+import time
+import random
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from page_parser import extract_text
+
+FIXTURES_DIR = "data/cache/html_fixtures"
+SYNTHETIC_PAGES = 300
+PARAGRAPHS = 300
+SEED = 7
+WORDS = [
+    "noticias", "información", "política", "casino", "apuestas", "niños", "términos",
+    "contáctenos", "inicio", "gobierno", "elecciones", "salud", "vpn", "descargar",
+]
+
+
+def make_page(rng):
+    """
+    Build a fake page shaped like a real one: head, scripts, nav, paragraphs.
+    """
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Inicio</title>",
+        "<style>body {font-family: sans-serif} .nav a {margin: 0 4px}</style>",
+        "<script>window.dataLayer = [];function gtag(){dataLayer.push(arguments);}</script>",
+        "</head><body><div class='nav'>",
+    ]
+    parts += [f"<a href='/s/{i}'>{rng.choice(WORDS)}</a>" for i in range(40)]
+    parts.append("</div><main>")
+    for i in range(PARAGRAPHS):
+        words = " ".join(rng.choice(WORDS) for _ in range(25))
+        parts.append(f"<div class='c{i % 7}'><p>{words} &amp; <b>{rng.choice(WORDS)}</b></p></div>")
+    parts.append("</main><script>console.log('ok');</script></body></html>")
+    return "".join(parts)
+
+
+def load_pages():
+    """
+    Return (source description, [html]) for the fixture pages.
+    """
+    if os.path.isdir(FIXTURES_DIR):
+        names = sorted(f for f in os.listdir(FIXTURES_DIR) if f.endswith(".html"))
+        if names:
+            pages = []
+            for name in names:
+                with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+                    pages.append(f.read().decode("utf-8", errors="replace"))
+            return FIXTURES_DIR, pages
+
+    rng = random.Random(SEED)
+    return "synthetic pages", [make_page(rng) for _ in range(SYNTHETIC_PAGES)]
+
+
+def parse_in_pool(pages, parser, workers):
+    """
+    Extract every page's text in a process pool; returns (texts, seconds).
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        texts = list(pool.map(partial(extract_text, parser=parser), pages, chunksize=4))
+    return texts, time.perf_counter() - start
+
+
+def main():
+    source, pages = load_pages()
+    megabytes = sum(len(p) for p in pages) / 2**20
+    cores = os.cpu_count() or 1
+    print(f"Parsing {len(pages)} pages ({megabytes:.1f} MiB) from {source} on {cores} cores")
+
+    start = time.perf_counter()
+    reference = [extract_text(page, parser="html.parser") for page in pages]
+    serial_time = time.perf_counter() - start
+    print(f"serial html.parser:        {len(pages) / serial_time:7.1f} pages/s")
+
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        print("lxml is not installed; skipping it.")
+
+    worker_counts = sorted({2**i for i in range(cores.bit_length()) if 2**i <= cores} | {cores})
+    for parser in parsers:
+        for workers in worker_counts:
+            texts, elapsed = parse_in_pool(pages, parser, workers)
+            mismatches = sum(1 for a, b in zip(reference, texts) if a != b)
+            print(f"pool {parser:<11} {workers:>2} workers: {len(pages) / elapsed:7.1f} pages/s "
+                  f"({serial_time / elapsed:.1f}x, {mismatches} texts differ from html.parser)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark Re-Tagging From the Page Store Against a Local Stub Site
+
+This script:
+1. Starts a local HTTP server serving PAGES fixture pages with ETag and
+   Last-Modified headers, answering conditional GETs with 304.
+2. Crawls and classifies every page into an empty page store (cold run).
+3. Re-classifies the corpus offline, from the page store only.
+4. Re-crawls with a zero TTL, so every page is revalidated.
+5. Checks all three runs give the same classification and prints timings.
+
+How to use:
+1. Adjust PAGES and STUB_LATENCY below if needed.
+2. Run: python src/classification/benchmark_page_store.py
+"""
+
+import io
+import os
+import time
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from page_store import PageStore
+from page_parser import extract_text
+from async_crawler import crawl_urls
+from generate_unique_inputs import TAGS_CSV_PATH, load_tags, classify_text_and_url, classify_offline
+
+PAGES = 500
+STUB_LATENCY = 0.2
+LAST_MODIFIED = formatdate(0, usegmt=True)
+WORDS = ["casino", "apuestas", "noticias", "política", "salud", "vpn", "elecciones", "iglesia"]
+
+
+def make_page(index):
+    """
+    Build a fixture page whose words depend on its index.
+    """
+    words = " ".join(WORDS[(index * k) % len(WORDS)] for k in range(1, 40))
+    return (
+        f"<html><head><title>Sitio {index}</title><script>var x = {index};</script></head>"
+        f"<body><h1>Inicio</h1><p>{words}</p></body></html>"
+    )
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    """
+    Serve /page/<n> with an ETag; counts full and 304 responses.
+    """
+
+    counts = {"200": 0, "304": 0}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        index = int(self.path.rsplit("/", 1)[1])
+        etag = f'"page-{index}"'
+        time.sleep(STUB_LATENCY)
+        if self.headers.get("If-None-Match") == etag:
+            with self.lock:
+                self.counts["304"] += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        with self.lock:
+            self.counts["200"] += 1
+        body = make_page(index).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(urls, tags, classify):
+    """
+    Run one pass; returns ({url: classification}, stats, server counts).
+    """
+    results = {}
+    StubSiteHandler.counts.update({"200": 0, "304": 0})
+
+    def handle_page(url, text):
+        results[url] = classify_text_and_url(text, tags, url)
+
+    with redirect_stdout(io.StringIO()):
+        stats = classify(urls, handle_page)
+    return results, stats, dict(StubSiteHandler.counts)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page/{i}" for i in range(PAGES)]
+    tags = load_tags(TAGS_CSV_PATH)
+    print(f"Classifying {PAGES} pages from {base} ({STUB_LATENCY}s latency per request)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "pages.sqlite")
+
+        def crawl_with(store):
+            return lambda urls, handle_page: crawl_urls(
+                urls, handle_page, per_host=PAGES, parse_page=extract_text, parse_workers=1, store=store
+            )
+
+        store = PageStore(store_path)
+        cold, cold_stats, cold_counts = run(urls, tags, crawl_with(store))
+        offline, offline_stats, offline_counts = run(
+            urls, tags, lambda urls, handle_page: classify_offline(urls, handle_page, store)
+        )
+        store.close()
+
+        store = PageStore(store_path, ttl_days=0)
+        revalidated, revalidated_stats, revalidated_counts = run(urls, tags, crawl_with(store))
+        store.close()
+        store_mb = os.path.getsize(store_path) / 2**20
+
+    server.shutdown()
+
+    print(f"Cold crawl:     {cold_stats['elapsed']:6.2f}s ({cold_counts['200']} full downloads)")
+    print(f"Offline re-tag: {offline_stats['elapsed']:6.2f}s ({offline_counts['200']} requests, "
+          f"{cold_stats['elapsed'] / offline_stats['elapsed']:.0f}x faster)")
+    print(f"Revalidation:   {revalidated_stats['elapsed']:6.2f}s ({revalidated_counts['304']} x 304, "
+          f"{revalidated_counts['200']} full downloads)")
+    print(f"Page store size: {store_mb:.1f} MiB")
+    print(f"Identical classification: {cold == offline == revalidated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Precompiled Tag Matcher on the inputs_pre_tagging.csv Corpus
+
+This script:
+1. Loads the tag dictionary and every URL in inputs_pre_tagging.csv.
+2. Builds a synthetic page text per URL (tags, accented filler words,
+   random capitalization and punctuation), so no network is needed.
+3. Classifies every page with classify_text_and_url(), and the first
+   REFERENCE_PAGES pages with the original per-tag re.findall loop (it
+   recompiles its patterns on every call, so it is slow).
+4. Checks the results are identical and prints the per-page timings.
+
+How to use:
+1. Adjust PAGE_WORDS and REFERENCE_PAGES below if needed.
+2. Run: python src/classification/benchmark_tag_matcher.py
+"""
+
+import re
+import csv
+import time
+import random
+
+from generate_unique_inputs import TAGS_CSV_PATH, INPUT_URLS_PATH, load_tags, classify_text_and_url
+
+PAGE_WORDS = 400
+REFERENCE_PAGES = 200
+SEED = 7
+FILLER = [
+    "el", "la", "de", "que", "en", "información", "contáctenos", "inicio", "PÁGINA",
+    "Noticias", "términos", "año", "niño", "©", "2025", "login", "casino-online", "www",
+]
+
+
+def classify_reference(text, categories, url):
+    """
+    The original implementation: two re.findall calls per tag.
+    """
+    results = {}
+    detected_tags = []
+    for category, tags in categories.items():
+        for tag in tags:
+            count_text = len(re.findall(rf"\b{re.escape(tag)}\b", text, re.IGNORECASE))
+            count_url = len(re.findall(re.escape(tag), url, re.IGNORECASE))
+            total = count_text + count_url
+            if total > 0:
+                results[category] = results.get(category, 0) + total
+                detected_tags.append(tag)
+    return results, detected_tags
+
+
+def make_page(rng, vocabulary):
+    """
+    Build a fake page text mixing tags and filler words.
+    """
+    words = []
+    for _ in range(PAGE_WORDS):
+        word = rng.choice(vocabulary) if rng.random() < 0.15 else rng.choice(FILLER)
+        style = rng.random()
+        if style < 0.1:
+            word = word.upper()
+        elif style < 0.2:
+            word = word.title()
+        words.append(word + rng.choice(["", "", "", ",", ".", ":", "!"]))
+    return " ".join(words)
+
+
+def main():
+    categories = load_tags(TAGS_CSV_PATH)
+    vocabulary = [t for tags in categories.values() for t in tags if t]
+
+    with open(INPUT_URLS_PATH, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        urls = [row[0] for row in reader]
+
+    rng = random.Random(SEED)
+    pages = [(make_page(rng, vocabulary), url) for url in urls]
+    print(f"Classifying {len(pages)} pages of {PAGE_WORDS} words with {len(vocabulary)} tags")
+
+    start = time.perf_counter()
+    matched = [classify_text_and_url(text, categories, url) for text, url in pages]
+    matcher_time = time.perf_counter() - start
+
+    sample = pages[:REFERENCE_PAGES]
+    start = time.perf_counter()
+    reference = [classify_reference(text, categories, url) for text, url in sample]
+    reference_time = time.perf_counter() - start
+
+    reference_per_page = reference_time / len(sample)
+    matcher_per_page = matcher_time / len(pages)
+    mismatches = sum(1 for a, b in zip(reference, matched) if a != b)
+    print(f"re.findall per tag: {reference_per_page * 1000:7.1f} ms/page "
+          f"(~{reference_per_page * len(pages) / 60:.0f} min for the corpus, {len(sample)} pages timed)")
+    print(f"TagMatcher:         {matcher_per_page * 1000:7.1f} ms/page ({matcher_time:.1f}s for the corpus)")
+    print(f"Speedup:            {reference_per_page / matcher_per_page:.1f}x")
+    print(f"Identical results:  {mismatches == 0} ({mismatches} mismatches in {len(sample)} pages)")
+
+
+if __name__ == "__main__":
+    main()
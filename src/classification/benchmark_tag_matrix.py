@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark Vectorized Category Scoring on a URL x Tag Matrix
+
+This script:
+1. Builds synthetic {tag: count} dicts for URLS URLs from the real tag
+   dictionary (TAGS_PER_URL random tags each, with duplicated categories
+   and ties).
+2. Scores them URL by URL with TagMatcher.categorize() and
+   deduce_categories() (the old path).
+3. Scores them with TagMatrix (sparse, and dense if SciPy is installed).
+4. Times a what-if run that doubles the weight of one category's tags.
+5. Checks totals, detected tags and deductions are identical.
+
+How to use:
+1. Adjust URLS and TAGS_PER_URL below if needed.
+2. Run: python src/classification/benchmark_tag_matrix.py
+"""
+
+import time
+import random
+
+import tag_matrix
+from tag_matrix import TagMatrix
+from tag_matcher import get_tag_matcher
+from generate_unique_inputs import TAGS_CSV_PATH, load_tags, deduce_categories
+
+URLS = 20_000
+TAGS_PER_URL = 40
+SEED = 7
+WHAT_IF_CATEGORY = "gmb"
+
+
+def make_counts(categories):
+    """
+    Return {url: {tag: count}} with small random counts.
+    """
+    rng = random.Random(SEED)
+    vocabulary = list(dict.fromkeys(t for tags in categories.values() for t in tags))
+    return {
+        f"https://site-{i}.example/": {
+            tag: rng.randint(1, 3) for tag in rng.sample(vocabulary, rng.randint(0, TAGS_PER_URL))
+        }
+        for i in range(URLS)
+    }
+
+
+def score_per_url(urls, categories, url_counts):
+    """
+    The old path: one dict-based categorize() and deduce_categories() per URL.
+    """
+    matcher = get_tag_matcher(categories)
+    results = []
+    for url in urls:
+        counts, tags = matcher.categorize(url_counts[url])
+        results.append(([counts.get(c, 0) for c in categories], tags, deduce_categories(counts)))
+    return results
+
+
+def score_matrix(urls, categories, url_counts, tag_weights=None):
+    """
+    The vectorized path; returns the same tuples as score_per_url().
+    """
+    matrix = TagMatrix(urls, categories, url_counts)
+    totals = matrix.category_totals(tag_weights)
+    return list(zip(totals.tolist(), matrix.detected_tags(), matrix.deductions(totals)))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    categories = load_tags(TAGS_CSV_PATH)
+    url_counts = make_counts(categories)
+    urls = list(url_counts)
+    print(f"Scoring {len(urls):,} URLs over {len(categories)} categories")
+
+    reference, per_url_time = timed(score_per_url, urls, categories, url_counts)
+    print(f"Per-URL dicts:       {per_url_time:6.2f}s")
+
+    modes = [("sparse", True), ("dense", False)] if tag_matrix.SCIPY_AVAILABLE else [("dense", False)]
+    for name, use_scipy in modes:
+        tag_matrix.SCIPY_AVAILABLE = use_scipy
+        result, matrix_time = timed(score_matrix, urls, categories, url_counts)
+        print(f"TagMatrix ({name}):  {matrix_time:6.2f}s ({per_url_time / matrix_time:.1f}x), "
+              f"identical: {result == reference}")
+
+    weights = {t: 2.0 for t in categories[WHAT_IF_CATEGORY]}
+    matrix, build_time = timed(TagMatrix, urls, categories, url_counts)
+    _, what_if_time = timed(lambda: matrix.deductions(matrix.category_totals(weights)))
+    print(f"What-if ({WHAT_IF_CATEGORY} tags x2): {what_if_time:.2f}s on a prebuilt matrix "
+          f"(built once in {build_time:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,25 @@ Classify URLs Based on Tag Occurrences
 
 This script:
 1. Loads a CSV with tags per category.
-2. Downloads and cleans HTML content from each URL.
+2. Downloads the URLs concurrently (async_crawler.py) and extracts their
+   text in a process pool (page_parser.py).
 3. Counts occurrences of tags in the content and URL.
 4. Generates a CSV with classifications and detected tags.
 
+Tag counting goes through tag_matcher.TagMatcher, which is built once from
+the tag dictionary and scans each page a fixed number of times instead of
+twice per tag.
+
+Downloaded pages are kept in a local page store (page_store.py). Re-runs
+only download pages that are missing or older than its TTL, and with
+OFFLINE = True nothing is downloaded at all.
+
+Per-URL tag counts are kept too (tag_counts.py). After an edit to the tag
+dictionary only the new tags are counted, and the output CSV is rebuilt
+from the stored counts (in input order, replaced atomically), so the corpus
+can be re-tagged in seconds. Pages the crawl takes unchanged from the page
+store keep their counts; only new or changed pages are counted again.
+
 How to use:
 1. Adjust TAGS_CSV_PATH, INPUT_URLS_PATH, and OUTPUT_CSV_PATH below.
 2. Run: python classify_urls_by_tags.py
@@ -16,15 +31,22 @@ How to use:
 import os
 import time
 import csv
-import re
 import requests
 import pandas as pd
-from bs4 import BeautifulSoup
 import urllib3
 
+from tag_matcher import get_tag_matcher
+from page_parser import PARSE_WORKERS, extract_text
+from page_store import PageStore
+from tag_counts import TagCountStore, diff_dictionaries
+from tag_matrix import TagMatrix
+from async_crawler import REQUEST_HEADERS, REQUEST_TIMEOUT, crawl_urls
+
 TAGS_CSV_PATH = "data/csv_output/url_classification/tags_dictionary.csv"
 INPUT_URLS_PATH = "data/csv_output/url_classification/inputs_pre_tagging.csv"
 OUTPUT_CSV_PATH = "data/csv_output/url_classification/categorized_tags.csv"
+# True: classify only from the page store (no network), e.g. after editing the tags
+OFFLINE = False
 
 CATEGORIES = [
     "ALDR", "REL", "PORN", "PROV", "POLR", "HUMR", "ENV", "MILX", "HATE", "NEWS", "XED", "PUBH",
@@ -44,34 +66,21 @@ def remove_duplicate_urls(file_path):
     print(f"Duplicates removed: {file_path}")
 
 
-def fetch_html_text(url, retries=2, delay=5):
+def fetch_html_text(url, retries=2, delay=5, timeout=REQUEST_TIMEOUT):
     """
     Download and clean text from a URL.
     """
     attempt = 0
     session = requests.Session()
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-            " AppleWebKit/537.36 (KHTML, like Gecko)"
-            " Chrome/123.0.0.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Connection": "keep-alive",
-    }
-    session.headers.update(headers)
+    session.headers.update(REQUEST_HEADERS)
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     while attempt < retries:
         try:
-            response = session.get(url, timeout=30, verify=False)
+            response = session.get(url, timeout=timeout, verify=False)
             response.raise_for_status()
             response.encoding = "utf-8"
-            soup = BeautifulSoup(response.text, "html.parser")
-            for element in soup(["script", "style"]):
-                element.extract()
-            return " ".join(soup.get_text().split()).strip()
+            return extract_text(response.text)
         except requests.exceptions.RequestException as e:
             attempt += 1
             print(f"Error fetching URL (attempt {attempt}/{retries}): {e}")
@@ -99,20 +108,7 @@ def classify_text_and_url(text, categories, url):
     """
     Count occurrences of each tag in text and URL.
     """
-    results = {}
-    detected_tags = []
-
-    for category, tags in categories.items():
-        for tag in tags:
-            count_text = len(re.findall(rf"\b{re.escape(tag)}\b", text, re.IGNORECASE))
-            count_url = len(re.findall(re.escape(tag), url, re.IGNORECASE))
-            total = count_text + count_url
-
-            if total > 0:
-                results[category] = results.get(category, 0) + total
-                detected_tags.append(tag)
-
-    return results, detected_tags
+    return get_tag_matcher(categories).classify(text, url)
 
 
 def deduce_categories(counts):
@@ -134,22 +130,75 @@ def deduce_categories(counts):
     return [sorted_items[0][0]]
 
 
-def save_classification_row(output_path, url, counts, tags):
+def write_classification_csv(output_path, urls, categories, url_counts, tag_weights=None):
     """
-    Append classification row to output CSV.
+    Write the classification of every URL from its stored {tag: count}.
+
+    Totals and deductions are computed for all URLs at once with a
+    TagMatrix; tag_weights ({tag: weight}) scales the tags for what-if runs.
+    The file is written to a temporary path and then renamed, so readers
+    never see a half-written CSV.
     """
-    write_header = not os.path.exists(output_path)
+    matrix = TagMatrix(urls, categories, url_counts)
+    totals = matrix.category_totals(tag_weights)
+    deductions = matrix.deductions(totals)
+    detected_tags = matrix.detected_tags()
+    columns = [matrix.categories.index(c) if c in matrix.categories else None for c in CATEGORIES]
     header = ["url", "detected_tags"] + CATEGORIES + ["deduction"]
+    tmp_path = output_path + ".tmp"
 
-    with open(output_path, "a", encoding="utf-8", newline="") as f:
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
         writer = csv.writer(f)
-        if write_header:
-            writer.writerow(header)
-        writer.writerow(
-            [url, tags]
-            + [counts.get(cat, 0) for cat in CATEGORIES]
-            + [deduce_categories(counts)]
-        )
+        writer.writerow(header)
+        for url, row, tags, deduction in zip(urls, totals.tolist(), detected_tags, deductions):
+            writer.writerow(
+                [url, tags]
+                + [row[c] if c is not None and row[c] > 0 else 0 for c in columns]
+                + [deduction]
+            )
+    os.replace(tmp_path, output_path)
+    print(f"Classification written to {output_path}")
+
+
+def update_tag_counts(count_store, page_store, categories):
+    """
+    Count the tags added to the dictionary since the last run on every URL
+    with stored counts, from the page store texts.
+    """
+    changed, new_tags = diff_dictionaries(count_store.load_dictionary(), categories)
+    if changed:
+        print(f"Categories changed since the last run: {', '.join(changed)}")
+
+    urls = count_store.urls()
+    if new_tags and urls:
+        print(f"Counting {len(new_tags)} new tags on {len(urls)} stored pages")
+        matcher = get_tag_matcher({"new": new_tags})
+        missing = 0
+        for url in urls:
+            entry = page_store.get(url)
+            missing += entry is None
+            text = entry["text"] if entry else ""
+            count_store.put(url, matcher.count_tags(text, url), replace=False)
+        if missing:
+            print(f"Warning: {missing} pages are not in the page store; new tags were only counted in their URL")
+    count_store.save_dictionary(categories)
+
+
+def classify_offline(urls, handle_page, store):
+    """
+    Call handle_page(url, text) for every URL using only the stored text.
+    """
+    start = time.perf_counter()
+    stats = {"pages": 0, "failed": 0, "cached": 0, "revalidated": 0}
+    for url in urls:
+        entry = store.get(url)
+        text = entry["text"] if entry else ""
+        stats["pages"] += 1
+        stats["cached"] += entry is not None
+        stats["failed"] += not text
+        handle_page(url, text)
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
 
 
 def main():
@@ -160,11 +209,37 @@ def main():
         next(reader)
         urls = [row[0] for row in reader]
 
-    for url in urls:
+    page_store = PageStore()
+    count_store = TagCountStore()
+    update_tag_counts(count_store, page_store, tags)
+    matcher = get_tag_matcher(tags)
+
+    def handle_page(url, text):
         print(f"Processing URL: {url}")
-        text = fetch_html_text(url)
-        counts, detected_tags = classify_text_and_url(text, tags, url)
-        save_classification_row(OUTPUT_CSV_PATH, url, counts, detected_tags)
+        count_store.put(url, matcher.count_tags(text, url))
+
+    # update_tag_counts() brought these up to date with the dictionary
+    counted = count_store.urls()
+
+    def handle_stored(url, text):
+        if url not in counted:
+            handle_page(url, text)
+
+    if OFFLINE:
+        stats = classify_offline([u for u in urls if u not in counted], handle_page, page_store)
+    else:
+        stats = crawl_urls(
+            urls, handle_page, parse_page=extract_text, parse_workers=PARSE_WORKERS, store=page_store,
+            handle_stored=handle_stored,
+        )
+    write_classification_csv(OUTPUT_CSV_PATH, urls, tags, count_store.counts())
+    page_store.close()
+    count_store.close()
+    print(
+        f"Counted tags on {stats['pages']} pages in {stats['elapsed']:.1f}s: "
+        f"{stats['cached']} from the page store, {stats['revalidated']} revalidated, "
+        f"{stats['failed']} without text"
+    )
 
 
 if __name__ == "__main__":
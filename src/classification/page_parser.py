@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+HTML Text Extraction for URL Classification
+
+Turns a downloaded HTML page into the whitespace-normalized visible text
+the tag matcher counts on (scripts and styles removed).
+
+Parsing is CPU-bound, so the crawler runs extract_text() in a process pool
+of PARSE_WORKERS processes, separate from the downloads. When lxml is
+installed it is used directly (over ten times faster than BeautifulSoup's
+pure-Python html.parser). The two can disagree on badly broken markup, so
+set HTML_PARSER = "html.parser" to reproduce older runs exactly.
+
+Used by async_crawler.py and generate_unique_inputs.py; not meant to be run.
+"""
+
+import os
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+PARSE_WORKERS = os.cpu_count() or 1
+
+
+def extract_text_lxml(html):
+    """
+    extract_text() with lxml; falls back to html.parser if lxml rejects the page.
+    """
+    if not html.strip():
+        return ""
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    try:
+        root = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"), parser=parser)
+    except (etree.ParserError, ValueError):
+        return extract_text(html, parser="html.parser")
+    etree.strip_elements(root, "script", "style", with_tail=False)
+    return " ".join(root.text_content().split()).strip()
+
+
+def extract_text(html, parser=None):
+    """
+    Return the visible text of an HTML page, whitespace-normalized.
+    """
+    parser = parser or HTML_PARSER
+    if parser == "lxml":
+        return extract_text_lxml(html)
+    soup = BeautifulSoup(html, parser)
+    for element in soup(["script", "style"]):
+        element.extract()
+    return " ".join(soup.get_text().split()).strip()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Persistent Store of Fetched Pages for URL Classification
+
+Keeps every downloaded page in a local SQLite file so the classifiers can
+be re-run after editing tags_dictionary.csv without downloading anything:
+- One row per normalized URL with the fetch time, HTTP status, ETag and
+  Last-Modified headers, and the zlib-compressed extracted text and raw HTML.
+- Entries younger than PAGE_TTL_DAYS (FAILED_TTL_DAYS for failed fetches)
+  are used as they are. Older ones are revalidated with a conditional GET,
+  and a 304 answer only refreshes the fetch time.
+- Entries are evicted least-recently-used first once the compressed size
+  goes over PAGE_STORE_MAX_MB (see common/lru_store.py).
+
+Used by async_crawler.py, generate_unique_inputs.py and tag_classifier.py;
+not meant to be run.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.lru_store import CompressedLRUStore, compress, decompress  # noqa: E402
+from common.urls import normalize_url  # noqa: E402
+
+PAGE_STORE_PATH = "data/cache/pages.sqlite"
+PAGE_STORE_MAX_MB = 2048
+PAGE_TTL_DAYS = 30
+FAILED_TTL_DAYS = 1
+
+
+class PageStore(CompressedLRUStore):
+    """
+    Thread-safe SQLite store of fetched pages keyed by normalized URL.
+    """
+
+    def __init__(self, path=PAGE_STORE_PATH, max_mb=PAGE_STORE_MAX_MB,
+                 ttl_days=PAGE_TTL_DAYS, failed_ttl_days=FAILED_TTL_DAYS):
+        super().__init__(
+            path, "pages", "url",
+            "status INTEGER NOT NULL, fetched_at REAL NOT NULL, etag TEXT, last_modified TEXT, "
+            "text BLOB NOT NULL, html BLOB NOT NULL",
+            max_mb,
+        )
+        self.ttl = ttl_days * 86400
+        self.failed_ttl = failed_ttl_days * 86400
+
+    def get(self, url, with_html=False):
+        """
+        Return the stored entry for a URL as a dict, or None.
+
+        The raw HTML is only decompressed when with_html is True.
+        """
+        key = normalize_url(url)
+        row = self.select(key, "status, fetched_at, etag, last_modified, text" + (", html" if with_html else ""))
+        if row is None:
+            return None
+        entry = {
+            "url": key,
+            "status": row[0],
+            "fetched_at": row[1],
+            "etag": row[2],
+            "last_modified": row[3],
+            "text": decompress(row[4]),
+        }
+        if with_html:
+            entry["html"] = decompress(row[5])
+        return entry
+
+    def is_fresh(self, entry):
+        """
+        Return True if an entry is young enough to be used without revalidation.
+        """
+        ttl = self.ttl if entry["status"] == 200 else self.failed_ttl
+        return time.time() - entry["fetched_at"] < ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Return the If-None-Match / If-Modified-Since headers for an entry.
+        """
+        headers = {}
+        if entry and entry["status"] == 200:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, status, html="", text="", etag=None, last_modified=None):
+        """
+        Store a fetched page and evict old entries if the store is full.
+        """
+        self.write(normalize_url(url), {
+            "status": status,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "text": compress(text),
+            "html": compress(html),
+        })
+
+    def refresh(self, url):
+        """
+        Mark an entry as just revalidated (after a 304 Not Modified).
+        """
+        self.update(normalize_url(url), {"fetched_at": time.time()})
@@ -5,7 +5,9 @@ import requests
 from bs4 import BeautifulSoup
 import csv
 import urllib3
-import re
+
+from tag_matcher import get_tag_matcher
+from page_store import PageStore
 
 headers = [header.lower() for header in ["ALDR", "REL", "PORN", "PROV", "POLR", "HUMR", "ENV", "MILX", "HATE", "NEWS", "XED", "PUBH",
                 "GMB", "ANON", "DATE", "GRP", "LGBT", "FILE", "HACK", "COMT", "MMED", "HOST", "SRCH", "GAME",
@@ -18,8 +20,11 @@ def eliminar_urls_duplicadas(archivo):
     df_sin_duplicados.to_csv(archivo, index=False)
 
 
-def fetch_text(url, max_reintentos=2, espera=5):
+def fetch_text(url, max_reintentos=2, espera=5, store=None):
     intentos = 0 
+    entrada = store.get(url) if store else None
+    if entrada and store.is_fresh(entrada):
+        return entrada["text"] if entrada["status"] == 200 else None
 
     headers = {    
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
@@ -31,16 +36,23 @@ def fetch_text(url, max_reintentos=2, espera=5):
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
     session = requests.Session()
     session.headers.update(headers)
+    session.headers.update(PageStore.conditional_headers(entrada))
 
     while intentos < max_reintentos:
         try:
             r = session.get(url, timeout=30, verify=False)
+            if r.status_code == 304 and entrada:
+                store.refresh(url)
+                return entrada["text"]
             r.raise_for_status()
             r.encoding = 'utf-8'
             soup = BeautifulSoup(r.text, 'html.parser')
             for script in soup(["script", "style"]):
                 script.extract()
             texto = ' '.join(soup.get_text().split()).strip()
+            if store:
+                store.put(url, r.status_code, html=r.text, text=texto,
+                          etag=r.headers.get('ETag'), last_modified=r.headers.get('Last-Modified'))
             return texto
         except requests.exceptions.RequestException as e:
             intentos += 1
@@ -48,6 +60,10 @@ def fetch_text(url, max_reintentos=2, espera=5):
             if intentos < max_reintentos:
                 time.sleep(espera)
 
+    if entrada and entrada["status"] == 200:
+        return entrada["text"]
+    if store:
+        store.put(url, 0)
     return None
 
 
@@ -65,19 +81,7 @@ def fetch_tags(tags_csv_path):
 
 
 def clasify_web(web, categories, url):
-    categories_found = {}
-    words = []
-    for category, tags in categories.items():
-        for tag in tags:
-            count_web = len(re.findall(rf"\b{re.escape(tag)}\b", web, re.IGNORECASE))
-            count_url = len(re.findall(re.escape(tag), url, re.IGNORECASE))
-
-            total_count = count_web + count_url
-
-            if total_count > 0:
-                categories_found[category] = categories_found.get(category, 0) + total_count
-                words.append(tag)
-    return categories_found, words
+    return get_tag_matcher(categories).classify(web, url)
 
 
 def save_csv(clasification, url, archivo_output):
@@ -114,8 +118,9 @@ def main(tags_csv, archivo_input, archivo_output):
         next(reader)
         urls = [row[0] for row in reader]
         tags = fetch_tags(tags_csv)
+        store = PageStore()
         for url in urls:
-            web = fetch_text(url)
+            web = fetch_text(url, store=store)
                 
             if web is None:
                 web = ""
@@ -123,6 +128,7 @@ def main(tags_csv, archivo_input, archivo_output):
             print(f'Procesando la URL: {url}')
             clasification = clasify_web(web, tags, url)
             save_csv(clasification, url, archivo_output)
+        store.close()
                 
                 
 main(
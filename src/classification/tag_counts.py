@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Persistent Per-URL Tag Counts for Incremental Reclassification
+
+Stores how many times each tag was found in each URL's page text and URL,
+plus the tag dictionary those counts were made with. The count of a tag
+does not depend on the rest of the dictionary, so after an edit to
+tags_dictionary.csv:
+- diff_dictionaries() finds the categories whose tag lists changed and the
+  tags that were never counted;
+- only those new tags are counted, on the stored page texts;
+- the category totals and deductions are rebuilt from the stored counts.
+
+Used by generate_unique_inputs.py; not meant to be run.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+
+TAG_COUNTS_PATH = "data/cache/tag_counts.sqlite"
+
+
+def diff_dictionaries(old, new):
+    """
+    Compare two {category: [tags]} dictionaries.
+
+    Returns (changed categories, tags in new that are not in old).
+    """
+    changed = [c for c in new if old.get(c) != new[c]]
+    changed += [c for c in old if c not in new]
+    old_tags = {t for tags in old.values() for t in tags}
+    new_tags = list(dict.fromkeys(t for tags in new.values() for t in tags if t not in old_tags))
+    return changed, new_tags
+
+
+class TagCountStore:
+    """
+    Thread-safe SQLite store of {tag: count} per URL and of the dictionary
+    the counts cover.
+    """
+
+    def __init__(self, path=TAG_COUNTS_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS counts ("
+            "url TEXT NOT NULL, tag TEXT NOT NULL, count INTEGER NOT NULL, "
+            "PRIMARY KEY (url, tag)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS dictionary ("
+            "position INTEGER PRIMARY KEY, category TEXT NOT NULL, tags TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def load_dictionary(self):
+        """
+        Return the dictionary the stored counts cover ({} if none yet).
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT category, tags FROM dictionary ORDER BY position"
+            ).fetchall()
+        return {category: json.loads(tags) for category, tags in rows}
+
+    def save_dictionary(self, categories):
+        """
+        Record that every stored URL now has counts for these tags.
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM dictionary")
+            self.conn.executemany(
+                "INSERT INTO dictionary (position, category, tags) VALUES (?, ?, ?)",
+                [(i, c, json.dumps(tags, ensure_ascii=False)) for i, (c, tags) in enumerate(categories.items())],
+            )
+            self.conn.commit()
+
+    def put(self, url, tag_counts, replace=True):
+        """
+        Store a URL's {tag: count}; with replace, its older counts are dropped.
+        """
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,))
+            if replace:
+                self.conn.execute("DELETE FROM counts WHERE url = ?", (url,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO counts (url, tag, count) VALUES (?, ?, ?)",
+                [(url, tag, count) for tag, count in tag_counts.items() if count],
+            )
+            self.conn.commit()
+
+    def urls(self):
+        """
+        Return the set of URLs with stored counts.
+        """
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT url FROM urls")}
+
+    def counts(self):
+        """
+        Return {url: {tag: count}} for every stored URL.
+        """
+        with self.lock:
+            result = {row[0]: {} for row in self.conn.execute("SELECT url FROM urls")}
+            for url, tag, count in self.conn.execute("SELECT url, tag, count FROM counts"):
+                result[url][tag] = count
+        return result
+
+    def close(self):
+        self.conn.close()
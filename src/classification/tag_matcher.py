@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Precompiled Tag Matcher for URL Classification
+
+Counts every tag of a tag dictionary in a page text and its URL, giving the
+same counts as running, for each tag,
+    re.findall(rf"\\b{re.escape(tag)}\\b", text, re.IGNORECASE)
+    re.findall(re.escape(tag), url, re.IGNORECASE)
+but with a fixed number of passes over the text instead of two per tag:
+- Tags made only of word characters are looked up in one tokenization of
+  the text (a match is a whole word run equal to the tag, ignoring case).
+- Other tags (several words, punctuation) use a pattern compiled once.
+- URL counts are substring counts on the lowercased URL.
+Unusual non-ASCII casing falls back to the regular expressions, so the
+counts stay identical.
+
+Used by generate_unique_inputs.py and tag_classifier.py; not meant to be run.
+"""
+
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+WORD_RE = re.compile(r"\w+")
+
+
+class TagMatcher:
+    """
+    Tag counter built once from a {category: [tags]} dictionary.
+    """
+
+    def __init__(self, categories):
+        self.categories = {category: list(tags) for category, tags in categories.items()}
+        unique_tags = list(dict.fromkeys(t for tags in self.categories.values() for t in tags))
+
+        self.word_tags = {t for t in unique_tags if WORD_RE.fullmatch(t)}
+        self.phrase_patterns = {
+            t: re.compile(rf"\b{re.escape(t)}\b", re.IGNORECASE)
+            for t in unique_tags if t not in self.word_tags
+        }
+        self.url_patterns = {
+            t: re.compile(re.escape(t), re.IGNORECASE) for t in unique_tags
+        }
+
+        # Slow-path lookups for words whose lowercase form is not a tag but
+        # that may still match one under re.IGNORECASE (same length only).
+        by_length = defaultdict(list)
+        for tag in self.word_tags:
+            by_length[len(tag)].append(tag)
+        self.length_buckets = {
+            length: (re.compile("|".join(map(re.escape, tags)), re.IGNORECASE), tags)
+            for length, tags in by_length.items()
+        }
+
+        # If a non-ASCII tag character matches an ASCII letter ignoring case,
+        # ASCII words and URLs cannot use the lowercase fast path either.
+        tag_chars = {c for t in unique_tags for c in t if not c.isascii()}
+        self.ascii_safe = not any(
+            re.fullmatch(re.escape(c), chr(a), re.IGNORECASE)
+            for c in tag_chars for a in range(128)
+        )
+
+    def match_word(self, word):
+        """
+        Return the word tags that a word run matches, ignoring case.
+        """
+        lowered = word.lower()
+        if lowered in self.word_tags:
+            return [lowered]
+        if word.isascii() and self.ascii_safe:
+            return []
+        bucket = self.length_buckets.get(len(word))
+        if bucket is None or not bucket[0].fullmatch(word):
+            return []
+        return [
+            t for t in bucket[1]
+            if re.fullmatch(re.escape(t), word, re.IGNORECASE)
+        ]
+
+    def count_text(self, text):
+        """
+        Return {tag: count} for the tags found in the text.
+        """
+        counts = Counter()
+        for word, occurrences in Counter(WORD_RE.findall(text)).items():
+            for tag in self.match_word(word):
+                counts[tag] += occurrences
+        for tag, pattern in self.phrase_patterns.items():
+            found = len(pattern.findall(text))
+            if found:
+                counts[tag] += found
+        return counts
+
+    def count_url(self, url):
+        """
+        Return {tag: count} for the tags found in the URL.
+        """
+        counts = Counter()
+        if url.isascii() and self.ascii_safe:
+            lowered = url.lower()
+            for tag in self.url_patterns:
+                found = lowered.count(tag)
+                if found:
+                    counts[tag] = found
+        else:
+            for tag, pattern in self.url_patterns.items():
+                found = len(pattern.findall(url))
+                if found:
+                    counts[tag] = found
+        return counts
+
+    def count_tags(self, text, url):
+        """
+        Return {tag: text count + URL count} for the tags found.
+
+        The count of a tag does not depend on the other tags, so counts made
+        with different dictionaries can be combined.
+        """
+        counts = self.count_text(text)
+        counts.update(self.count_url(url))
+        return counts
+
+    def categorize(self, tag_counts):
+        """
+        Sum {tag: count} per category; returns ({category: total}, detected_tags).
+        """
+        results = {}
+        detected_tags = []
+        for category, tags in self.categories.items():
+            for tag in tags:
+                total = tag_counts.get(tag, 0)
+                if total > 0:
+                    results[category] = results.get(category, 0) + total
+                    detected_tags.append(tag)
+        return results, detected_tags
+
+    def classify(self, text, url):
+        """
+        Count tags per category; returns ({category: total}, detected_tags).
+        """
+        return self.categorize(self.count_tags(text, url))
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(frozen_categories):
+    return TagMatcher(dict(frozen_categories))
+
+
+def get_tag_matcher(categories):
+    """
+    Return a TagMatcher for a {category: [tags]} dict, building it only once.
+    """
+    return _cached_matcher(tuple((c, tuple(tags)) for c, tags in categories.items()))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+URL x Tag Count Matrix with Vectorized Category Scoring
+
+Holds the tag counts of every URL as one matrix (rows: URLs, columns: the
+unique tags of the dictionary) plus a tag -> category mapping matrix, so:
+- category totals for all URLs are one matrix product, optionally with a
+  weight per tag for what-if experiments;
+- the deduce_categories() top-1 / top-2 rule is a stable argsort per row;
+- detected tags are one column gather.
+Without weights the results are identical to TagMatcher.categorize() and
+deduce_categories() applied URL by URL.
+
+The matrix is a SciPy CSR matrix when SciPy is installed, otherwise a
+dense NumPy array.
+
+Used by generate_unique_inputs.py; not meant to be run.
+"""
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+class TagMatrix:
+    """
+    Tag counts of a list of URLs for a {category: [tags]} dictionary.
+    """
+
+    def __init__(self, urls, categories, url_counts):
+        self.urls = list(urls)
+        self.categories = list(categories)
+        self.tags = list(dict.fromkeys(t for tags in categories.values() for t in tags))
+        tag_index = {tag: i for i, tag in enumerate(self.tags)}
+
+        rows, cols, values = [], [], []
+        for row, url in enumerate(self.urls):
+            for tag, count in url_counts.get(url, {}).items():
+                col = tag_index.get(tag)
+                if col is not None and count:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append(count)
+        shape = (len(self.urls), len(self.tags))
+        if SCIPY_AVAILABLE:
+            self.counts = sparse.csr_matrix((values, (rows, cols)), shape=shape, dtype=np.int64)
+        else:
+            self.counts = np.zeros(shape, dtype=np.float64)
+            self.counts[rows, cols] = values
+
+        # A tag listed twice in a category counts twice, as in categorize()
+        self.entry_tags = [t for tags in categories.values() for t in tags]
+        self.entry_columns = np.array([tag_index[t] for t in self.entry_tags], dtype=np.int64)
+        entry_categories = [c for c, tags in enumerate(categories.values()) for _ in tags]
+        self.mapping = np.zeros((len(self.tags), len(self.categories)), dtype=np.int64)
+        np.add.at(self.mapping, (self.entry_columns, entry_categories), 1)
+
+    def category_totals(self, tag_weights=None):
+        """
+        Return the URL x category totals, with an optional {tag: weight}.
+
+        The product runs in float64 (BLAS); unweighted totals are returned
+        as exact integers.
+        """
+        mapping = self.mapping.astype(np.float64)
+        if tag_weights:
+            mapping *= np.array([tag_weights.get(t, 1.0) for t in self.tags])[:, None]
+        totals = np.asarray(self.counts @ mapping)
+        return totals if tag_weights else np.rint(totals).astype(np.int64)
+
+    def deductions(self, totals):
+        """
+        Apply the deduce_categories() rule to every row of a totals matrix.
+
+        Only positive totals count. Ties keep the dictionary's category order.
+        """
+        positive = np.where(totals > 0, totals, 0)
+        order = np.argsort(-positive, axis=1, kind="stable")
+        n_positive = (positive > 0).sum(axis=1)
+        n_top = (positive == positive.max(axis=1, keepdims=True)).sum(axis=1)
+        keep = np.where(n_top >= 2, n_top, np.minimum(n_positive, 2))
+
+        names = np.array(self.categories, dtype=object)
+        return [
+            list(names[order[i, :k]]) if n else None
+            for i, (n, k) in enumerate(zip(n_positive, keep))
+        ]
+
+    def detected_tags(self):
+        """
+        Return the detected tag list of every URL, in categorize() order.
+        """
+        found = (self.counts > 0)[:, self.entry_columns]
+        if SCIPY_AVAILABLE:
+            found = found.tocsr()
+            found.sort_indices()
+            indptr, indices = found.indptr, found.indices
+        else:
+            rows, indices = np.nonzero(found)
+            indptr = np.searchsorted(rows, np.arange(found.shape[0] + 1))
+        entry_tags = np.array(self.entry_tags, dtype=object)
+        return [entry_tags[indices[indptr[i]:indptr[i + 1]]].tolist() for i in range(found.shape[0])]
@@ -0,0 +1,3 @@
+"""
+Helpers shared by the scripts in src/ooni, src/processing and src/classification.
+"""
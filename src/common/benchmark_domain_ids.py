@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark Integer Domain Keys Against String Keys for Cross-Dataset Joins
+
+This script:
+1. Builds a synthetic measurement table of TARGET_ROWS rows over DOMAINS
+   distinct canonical domains, and a classification table with one row per
+   domain.
+2. Encodes both key columns with a DomainDictionary (in a temporary file),
+   once cold (every domain new) and once warm.
+3. Times the left join on the string keys and on the int32 keys, checks
+   both give the same rows and prints the memory of the key columns.
+
+How to use:
+1. Adjust TARGET_ROWS and DOMAINS below if needed.
+2. Run: python src/common/benchmark_domain_ids.py
+"""
+
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+from domain_ids import DomainDictionary
+
+TARGET_ROWS = 1_000_000
+DOMAINS = 100_000
+REPEATS = 3
+SUFFIXES = ["com", "com.ar", "gob.ve", "org.ni", "net", "com.uy", "org"]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def best_of(func, *args):
+    """
+    Return (result, best seconds) over REPEATS calls.
+    """
+    runs = [timed(func, *args) for _ in range(REPEATS)]
+    return runs[0][0], min(seconds for _, seconds in runs)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    domains = np.array([f"site{i}.{SUFFIXES[i % len(SUFFIXES)]}" for i in range(DOMAINS)], dtype=object)
+    measurements = pd.DataFrame({
+        "domain": domains[rng.integers(0, DOMAINS, TARGET_ROWS)],
+        "accessible": rng.integers(0, 2, TARGET_ROWS).astype(bool),
+    })
+    classification = pd.DataFrame({
+        "domain": domains[: DOMAINS // 2],
+        "deduccion": rng.choice(["NEWS", "GMB", "POLR", "REL"], DOMAINS // 2),
+    })
+    print(f"{TARGET_ROWS} measurement rows, {len(classification)} classified domains")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dictionary = DomainDictionary(os.path.join(tmp, "domain_ids.sqlite"))
+        _, cold_time = timed(dictionary.encode, measurements["domain"])
+        measurements["domain_id"], warm_time = timed(dictionary.encode, measurements["domain"])
+        classification["domain_id"] = dictionary.encode(classification["domain"])
+        dictionary.close()
+
+    by_string, string_time = best_of(
+        pd.merge, measurements[["domain", "accessible"]], classification[["domain", "deduccion"]], "left", "domain"
+    )
+    by_id, id_time = best_of(
+        pd.merge, measurements[["domain_id", "accessible"]], classification[["domain_id", "deduccion"]], "left", "domain_id"
+    )
+
+    string_bytes = measurements["domain"].memory_usage(deep=True, index=False)
+    id_bytes = measurements["domain_id"].memory_usage(deep=True, index=False)
+    same = by_string["deduccion"].fillna("").equals(by_id["deduccion"].fillna(""))
+    print(f"Encode: cold {cold_time:.2f}s, warm {warm_time:.2f}s")
+    print(f"Join on strings: {string_time:.3f}s, on int32 IDs: {id_time:.3f}s ({string_time / id_time:.1f}x)")
+    print(f"Key column memory: strings {string_bytes / 2**20:.1f} MiB, IDs {id_bytes / 2**20:.1f} MiB")
+    print(f"Identical joined labels: {same}")
+
+
+if __name__ == "__main__":
+    main()
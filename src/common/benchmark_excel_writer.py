@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Streaming Excel Writer Against DataFrame.to_excel()
+
+This script:
+1. Builds a synthetic merged report of TARGET_ROWS rows shaped like the
+   output of merge_and_export() (input, date, test, accessibility,
+   blocking, manual label), split in COUNTRIES sheets.
+2. Writes it, in a fresh process each, with DataFrame.to_excel() (one
+   sheet per country through pd.ExcelWriter) and with write_excel(),
+   printing the time and peak memory of each process.
+3. Checks both workbooks have the same content.
+4. Writes a table one row longer than an Excel sheet allows with
+   write_excel() to show the Parquet/CSV fallback.
+
+Files go to a temporary folder.
+
+How to use:
+1. Adjust TARGET_ROWS and COUNTRIES below if needed.
+2. Run: python src/common/benchmark_excel_writer.py
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+from excel_writer import EXCEL_MAX_ROWS, write_excel
+
+TARGET_ROWS = 1_000_000
+COUNTRIES = ["argentina", "cuba", "elsalvador", "nicaragua", "uruguay", "venezuela"]
+LABELS = ["NEWS", "GMB", "POLR", "REL", "HUMR", None]
+# Writes the tables of argv[1] with method argv[2] to argv[3]; prints seconds and peak RSS
+RUN = """
+import sys, json, time, resource, pandas as pd
+from excel_writer import write_excel
+sheets = pd.read_pickle(sys.argv[1])
+start = time.perf_counter()
+if sys.argv[2] == "to_excel":
+    with pd.ExcelWriter(sys.argv[3], engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+else:
+    write_excel(sheets, sys.argv[3])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def synthetic_report(rows, seed=0):
+    """
+    Return a merged-report-like DataFrame of rows rows.
+    """
+    rng = np.random.default_rng(seed)
+    domains = np.array([f"site{i}.com" for i in range(rows // 10 or 1)], dtype=object)
+    start = pd.Timestamp("2024-01-01").value
+    return pd.DataFrame({
+        "input": domains[rng.integers(0, len(domains), rows)],
+        "measurement_start_time": pd.to_datetime(rng.integers(start, start + 365 * 86400 * 10**9, rows)),
+        "test_name": rng.choice(["web_connectivity", "dnscheck"], rows),
+        "accessible": rng.integers(0, 2, rows).astype(bool),
+        "blocking": rng.choice(np.array(["dns", "tcp_ip", "http-diff", None], dtype=object), rows),
+        "runtime": rng.random(rows).round(3),
+        "deduccion": rng.choice(np.array(LABELS, dtype=object), rows),
+    })
+
+
+def run(method, pickle_path, output_path):
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", RUN, pickle_path, method, output_path],
+                            env=env, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def same_workbooks(old_path, new_path):
+    old, new = pd.read_excel(old_path, sheet_name=None), pd.read_excel(new_path, sheet_name=None)
+    return list(old) == list(new) and all(old[name].equals(new[name]) for name in old)
+
+
+def main():
+    report = synthetic_report(TARGET_ROWS)
+    country = np.arange(TARGET_ROWS) % len(COUNTRIES)
+    sheets = {name: report[country == i].reset_index(drop=True) for i, name in enumerate(COUNTRIES)}
+    print(f"{TARGET_ROWS} rows in {len(sheets)} sheets")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "sheets.pkl")
+        pd.to_pickle(sheets, pickle_path)
+        old_path, new_path = os.path.join(tmp, "to_excel.xlsx"), os.path.join(tmp, "write_excel.xlsx")
+        old = run("to_excel", pickle_path, old_path)
+        new = run("write_excel", pickle_path, new_path)
+        print(f"to_excel():    {old['seconds']:6.1f}s, peak {old['peak_mib']:7.0f} MiB")
+        print(f"write_excel(): {new['seconds']:6.1f}s, peak {new['peak_mib']:7.0f} MiB "
+              f"({old['seconds'] / new['seconds']:.1f}x faster, {old['peak_mib'] / new['peak_mib']:.1f}x less memory)")
+        print(f"Identical sheets: {same_workbooks(old_path, new_path)}")
+
+        too_long = synthetic_report(EXCEL_MAX_ROWS, seed=1)
+        written = write_excel({"all": too_long}, os.path.join(tmp, "too_long.xlsx"))
+        print(f"{len(too_long)} rows (limit {EXCEL_MAX_ROWS - 1} + header) written as: "
+              f"{', '.join(os.path.basename(path) for path in written)}")
+
+
+if __name__ == "__main__":
+    main()
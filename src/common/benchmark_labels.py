@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark majority_labels() Against the Old Per-Group Mode Lambda
+
+This script:
+1. Checks that majority_labels() picks the same label per domain as the old
+   groupby(...).agg(lambda x: x.mode()...) of load_and_prepare_manual_data()
+   on the manual classification files, ties included.
+2. Builds a synthetic table of TARGET_ROWS labelled rows over DOMAINS
+   domains (with conflicting and missing labels) and times both.
+
+How to use:
+1. Adjust TARGET_ROWS and DOMAINS below if needed.
+2. Run: python src/common/benchmark_labels.py
+"""
+
+import glob
+import time
+import numpy as np
+import pandas as pd
+
+from labels import majority_labels
+from urls import base_domains
+
+TARGET_ROWS = 2_000_000
+DOMAINS = 200_000
+LABELS = ["NEWS", "GMB", "POLR", "REL", "HUMR", "VACÍO", None]
+MANUAL_FILES = "data/csv_output/url_classification/manual_*.csv"
+
+
+def old_mode(df, key, label="deduccion"):
+    """
+    The old per-domain mode of load_and_prepare_manual_data().
+    """
+    return df.groupby(key)[label].agg(
+        lambda x: x.mode().iloc[0] if not x.mode().empty else x.iloc[0]
+    ).reset_index()
+
+
+def same_labels(old, new, label="deduccion"):
+    return old[label].fillna("<NA>").tolist() == new[label].fillna("<NA>").tolist()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    for path in sorted(glob.glob(MANUAL_FILES)):
+        df = pd.read_csv(path)
+        df["base_domain"] = base_domains(df["input"])
+        new = majority_labels(df, "base_domain")
+        print(f"{path}: {len(df)} rows, {len(new)} domains, "
+              f"{(new['agreement'] < 1).sum()} with conflicting labels, "
+              f"same labels: {same_labels(old_mode(df, 'base_domain'), new)}")
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "base_domain_id": rng.integers(0, DOMAINS, TARGET_ROWS).astype(np.int32),
+        "deduccion": rng.choice(np.array(LABELS, dtype=object), TARGET_ROWS),
+    })
+    print(f"{TARGET_ROWS} labelled rows over {df['base_domain_id'].nunique()} domains")
+    old, old_time = timed(old_mode, df, "base_domain_id")
+    new, new_time = timed(majority_labels, df, "base_domain_id")
+    print(f"mode lambda {old_time:6.2f}s, majority_labels() {new_time:6.2f}s ({old_time / new_time:.1f}x), "
+          f"same labels: {same_labels(old, new)}")
+
+
+if __name__ == "__main__":
+    main()
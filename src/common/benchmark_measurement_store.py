@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark Parquet vs CSV Loading for Measurement Tables
+
+This script:
+1. Builds a large synthetic table by repeating a real CSV (VPN and historical).
+2. Writes it as CSV and converts it with write_parquet().
+3. Times a full pd.read_csv() against read_table() of only the columns
+   a stage needs, from CSV and from Parquet.
+
+How to use:
+1. Adjust TARGET_ROWS and the sources below.
+2. Run: python src/common/benchmark_measurement_store.py
+"""
+
+import os
+import io
+import time
+import tempfile
+from contextlib import redirect_stdout
+import pandas as pd
+
+from measurement_store import PARQUET_AVAILABLE, read_table, write_parquet
+
+TARGET_ROWS = 1_000_000
+SOURCES = {
+    "vpn_measurements": (
+        "data/csv_output/vpn_measurements/venezuela_vpn.csv",
+        ["input", "accessible", "resolver_ip", "status_code"],
+    ),
+    "all_countries": (
+        "data/csv_output/ooni_historical_measurements/all_countries.csv",
+        ["input", "probe_cc", "measurement_start_time"],
+    ),
+}
+
+
+def timed(func, *args, **kwargs):
+    """
+    Return (result, seconds) for a call.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def benchmark(name, source_csv, columns, tmp):
+    """
+    Time the loaders on one synthetic table.
+    """
+    sample = pd.read_csv(source_csv)
+    repeats = max(1, TARGET_ROWS // len(sample))
+    big_csv = os.path.join(tmp, f"{name}.csv")
+    pd.concat([sample] * repeats, ignore_index=True).to_csv(big_csv, index=False)
+
+    csv_full, csv_full_time = timed(pd.read_csv, big_csv)
+    _, csv_columns_time = timed(read_table, big_csv, columns)
+    with redirect_stdout(io.StringIO()):
+        _, convert_time = timed(write_parquet, big_csv)
+    parquet_columns, parquet_time = timed(read_table, big_csv, columns)
+
+    csv_mb = os.path.getsize(big_csv) / 2**20
+    parquet_mb = os.path.getsize(os.path.splitext(big_csv)[0] + ".parquet") / 2**20
+
+    print(f"{name}: {len(csv_full):,} rows, CSV {csv_mb:.0f} MiB, Parquet {parquet_mb:.0f} MiB")
+    print(f"  full read_csv          {csv_full_time:6.2f}s")
+    print(f"  read_table (CSV)       {csv_columns_time:6.2f}s  columns={columns}")
+    print(f"  read_table (Parquet)   {parquet_time:6.2f}s  ({csv_full_time / parquet_time:.0f}x faster than full CSV)")
+    print(f"  one-off conversion     {convert_time:6.2f}s")
+    print(f"  memory: {csv_full.memory_usage(deep=True).sum() / 2**20:.0f} MiB -> "
+          f"{parquet_columns.memory_usage(deep=True).sum() / 2**20:.0f} MiB")
+
+
+def main():
+    if not PARQUET_AVAILABLE:
+        print("pyarrow is not installed; cannot benchmark Parquet.")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (source_csv, columns) in SOURCES.items():
+            benchmark(name, source_csv, columns, tmp)
+
+
+if __name__ == "__main__":
+    main()
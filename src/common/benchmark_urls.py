@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Shared URL Canonicalization Against the Old Row-by-Row Normalizers
+
+This script:
+1. Collects every distinct input/URL/domain in the CSVs under SOURCES.
+2. Repeats them into a TARGET_ROWS synthetic column.
+3. Times the old normalizers (extract_base_domain() and the .str.replace
+   chain of export_ooni_results_excel.py, applied row by row) against
+   base_domains() and canonical_urls() from common/urls.py.
+4. Lists the inputs whose base domain changed, e.g. because the old code
+   kept only the last two labels ('gob.ve', 'com.ar').
+
+How to use:
+1. Adjust TARGET_ROWS and SOURCES below if needed.
+2. Run: python src/common/benchmark_urls.py
+"""
+
+import glob
+import time
+from urllib.parse import urlparse
+import pandas as pd
+
+from urls import base_domains, canonical_urls
+
+TARGET_ROWS = 1_000_000
+SOURCES = {
+    "data/csv_output/vpn_measurements/*.csv": "input",
+    "data/csv_output/local_measurements/*.csv": "input",
+    "data/csv_output/dns_dig_results/*.csv": "Dominio",
+    "data/csv_output/url_classification/categorized_tags.csv": "url",
+    "data/csv_output/url_classification/manual_*.csv": "input",
+}
+EXAMPLES = 10
+
+
+def old_extract_base_domain(url):
+    """
+    The old extract_base_domain() of export_ooni_results_excel.py.
+    """
+    if pd.isna(url):
+        return ""
+    try:
+        url = str(url).strip().lower()
+        if not url.startswith("http"):
+            url = "http://" + url
+        netloc = urlparse(url).netloc or urlparse("http://" + url).path
+        netloc = netloc.replace("www.", "")
+        parts = netloc.split(".")
+        if len(parts) >= 2:
+            return ".".join(parts[-2:])
+        return netloc
+    except Exception:
+        return ""
+
+
+def old_normalize(series):
+    """
+    The old input_normalized chain of load_and_prepare_vpn_data().
+    """
+    return (
+        series
+        .str.replace("https://", "", regex=False)
+        .str.replace("http://", "", regex=False)
+        .str.replace("www.", "", regex=False)
+        .str.rstrip("/")
+    )
+
+
+def collect_inputs():
+    """
+    Return the distinct non-empty inputs of all the sources.
+    """
+    values = set()
+    for pattern, column in SOURCES.items():
+        for path in glob.glob(pattern):
+            df = pd.read_csv(path)
+            if column in df.columns:
+                values.update(df[column].dropna().astype(str))
+    return sorted(values)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    inputs = collect_inputs()
+    if not inputs:
+        print("No inputs found under SOURCES.")
+        return
+    repeats = max(1, TARGET_ROWS // len(inputs))
+    column = pd.Series(inputs * repeats, dtype=object)
+    print(f"{len(inputs)} distinct inputs, {len(column)} rows")
+
+    old_domains, old_domain_time = timed(lambda s: s.apply(old_extract_base_domain), column)
+    old_normalized, old_normalize_time = timed(old_normalize, column)
+    new_domains, new_domain_time = timed(base_domains, column)
+    new_normalized, new_normalize_time = timed(canonical_urls, column)
+
+    print(f"Base domain:  .apply {old_domain_time:6.2f}s, base_domains() {new_domain_time:6.2f}s "
+          f"({old_domain_time / new_domain_time:.1f}x)")
+    print(f"Normalized:   .str chain {old_normalize_time:6.2f}s, canonical_urls() {new_normalize_time:6.2f}s "
+          f"({old_normalize_time / new_normalize_time:.1f}x)")
+
+    distinct = pd.DataFrame({"input": inputs})
+    distinct["old"] = distinct["input"].apply(old_extract_base_domain)
+    distinct["new"] = base_domains(distinct["input"])
+    changed = distinct[distinct["old"] != distinct["new"]]
+    print(f"Base domain changed for {len(changed)}/{len(inputs)} inputs; "
+          f"old distinct domains {distinct['old'].nunique()}, new {distinct['new'].nunique()}")
+    print(changed.head(EXAMPLES).to_string(index=False))
+    normalized_changed = (old_normalize(distinct["input"]) != canonical_urls(distinct["input"])).sum()
+    print(f"Normalized input changed for {normalized_changed}/{len(inputs)} inputs (case, www. inside names)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Persistent Domain Dictionary: Canonical Domain/URL String <-> Integer ID
+
+Every canonical string (canonical_url() or base_domain() of an input) gets
+a compact integer ID stored in DOMAIN_IDS_PATH, next to the data. IDs never
+change once assigned, so tables written on different runs, and by
+different processes, share the same keys and can be joined on int32
+columns instead of strings.
+
+- DomainDictionary.encode() turns a Series of strings into int32 IDs
+  (-1 for missing/empty values), adding unseen strings.
+- DomainDictionary.decode() turns IDs back into strings.
+- domain_dictionary() returns the dictionary of this process.
+
+Not meant to be run.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+DOMAIN_IDS_PATH = "data/csv_output/domain_ids.sqlite"
+MISSING_ID = -1
+
+
+class DomainDictionary:
+    """
+    SQLite-backed string <-> ID dictionary, held in memory.
+
+    Several processes can add strings at once: the UNIQUE constraint makes
+    them agree on one ID per string, and each process reads back the rows
+    added since its last look.
+    """
+
+    def __init__(self, path=DOMAIN_IDS_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS domains (id INTEGER PRIMARY KEY, domain TEXT NOT NULL UNIQUE)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('created_at', ?)", (repr(time.time()),))
+        # IDs stored in files older than this were assigned by another (deleted) dictionary
+        self.created_at = float(self.conn.execute("SELECT value FROM meta WHERE key = 'created_at'").fetchone()[0])
+        self.ids = {}
+        self.domains = [""]
+        with self.lock:
+            self._load_new()
+
+    def _load_new(self):
+        # IDs only grow, so the rows this process has not seen are the ones above its last ID
+        rows = self.conn.execute(
+            "SELECT id, domain FROM domains WHERE id >= ? ORDER BY id", (len(self.domains),)
+        ).fetchall()
+        for domain_id, domain in rows:
+            self.domains.extend([""] * (domain_id - len(self.domains)))
+            self.domains.append(domain)
+            self.ids[domain] = domain_id
+
+    def encode(self, values, add=True):
+        """
+        Return the int32 IDs of a Series of strings. Unseen strings are added
+        (or get MISSING_ID with add=False); missing and empty values get MISSING_ID.
+        """
+        codes, uniques = pd.factorize(values)
+        uniques = [str(value) for value in uniques]
+        unseen = [value for value in uniques if value and value not in self.ids]
+        if unseen:
+            with self.lock:
+                if add:
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    self.conn.executemany("INSERT OR IGNORE INTO domains (domain) VALUES (?)", [(v,) for v in unseen])
+                    self.conn.execute("COMMIT")
+                self._load_new()
+        table = np.array([self.ids.get(value, MISSING_ID) if value else MISSING_ID for value in uniques]
+                         + [MISSING_ID], dtype=np.int32)
+        return pd.Series(table[codes], index=values.index, dtype=np.int32)
+
+    def decode(self, ids):
+        """
+        Return the strings of a Series of IDs ("" for MISSING_ID).
+        """
+        ids_array = ids.to_numpy()
+        if np.max(ids_array, initial=MISSING_ID) >= len(self.domains):
+            with self.lock:
+                self._load_new()
+        table = np.array(self.domains + [""], dtype=object)
+        return pd.Series(table[ids_array], index=ids.index, dtype=object)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def close(self):
+        self.conn.close()
+
+
+@lru_cache(maxsize=None)
+def domain_dictionary(path=DOMAIN_IDS_PATH):
+    """
+    Return the DomainDictionary of this process for a path (opened once).
+    """
+    return DomainDictionary(path)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Streaming Excel Writer for Large Reports
+
+write_excel() writes one or more DataFrames (one sheet each) with
+openpyxl's write-only workbook: rows are streamed to disk in chunks of
+CHUNK_ROWS instead of building every cell in memory first, as
+DataFrame.to_excel() does.
+
+A sheet with more data rows than Excel allows (EXCEL_MAX_ROWS minus the
+header) is written next to the workbook as Parquet, or as CSV without
+pyarrow, instead.
+
+Not meant to be run.
+"""
+
+import os
+import sys
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.measurement_store import PARQUET_AVAILABLE  # noqa: E402
+
+EXCEL_MAX_ROWS = 1_048_576
+CHUNK_ROWS = 50_000
+# Characters Excel does not allow in sheet names, and their maximum length
+SHEET_NAME_FORBIDDEN = str.maketrans({c: "_" for c in "[]:*?/\\"})
+SHEET_NAME_MAX = 31
+
+
+def sheet_title(name, used):
+    """
+    Return a valid sheet name for name, not in used (compared case-insensitively).
+    """
+    base = str(name).translate(SHEET_NAME_FORBIDDEN)[:SHEET_NAME_MAX] or "Sheet"
+    title, n = base, 1
+    while title.lower() in used:
+        n += 1
+        suffix = f"_{n}"
+        title = base[:SHEET_NAME_MAX - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+def excel_rows(df, chunk_rows=CHUNK_ROWS):
+    """
+    Yield the rows of a DataFrame as tuples of cell values, one chunk at a
+    time: missing values become empty cells and timezones are dropped.
+    """
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        for column in chunk.columns:
+            if isinstance(chunk[column].dtype, pd.DatetimeTZDtype):
+                chunk = chunk.assign(**{column: chunk[column].dt.tz_localize(None)})
+        chunk = chunk.astype(object)
+        yield from chunk.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def write_fallback(df, path_without_extension):
+    """
+    Write a table too long for Excel as Parquet (or CSV) and return its path.
+    """
+    if PARQUET_AVAILABLE:
+        path = f"{path_without_extension}.parquet"
+        df.to_parquet(path, index=False)
+    else:
+        path = f"{path_without_extension}.csv"
+        df.to_csv(path, index=False)
+    print(f"{len(df)} rows do not fit in an Excel sheet; written to {path}")
+    return path
+
+
+def write_excel(sheets, output_path, chunk_rows=CHUNK_ROWS):
+    """
+    Write {sheet name: DataFrame} (or a single DataFrame, as 'Sheet1') to
+    output_path and return the paths written: the workbook, if any sheet
+    fits in Excel, and one fallback file per sheet that does not.
+    """
+    if isinstance(sheets, pd.DataFrame):
+        sheets = {"Sheet1": sheets}
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    stem = os.path.splitext(output_path)[0]
+
+    written = []
+    workbook = Workbook(write_only=True)
+    used = set()
+    for name, df in sheets.items():
+        if len(df) > EXCEL_MAX_ROWS - 1:
+            written.append(write_fallback(df, stem if len(sheets) == 1 else f"{stem}_{name}"))
+            continue
+        worksheet = workbook.create_sheet(sheet_title(name, used))
+        worksheet.append([str(column) for column in df.columns])
+        for row in excel_rows(df, chunk_rows):
+            worksheet.append(row)
+
+    if used:
+        workbook.save(output_path)
+        written.insert(0, output_path)
+    return written
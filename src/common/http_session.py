@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Pooled HTTP Session Shared by the OONI API Scripts
+
+create_session() returns a requests session whose connection pool is sized
+for the workers that share it, and that retries HTTP 429/5xx responses and
+connection errors with exponential backoff (honouring Retry-After).
+
+Used by ooni/ooni_api.py and processing/extract_ooni_lock_types.py, so the
+retry policy is set here once.
+
+Not meant to be run.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+REQUEST_TIMEOUT = 60
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_session(pool_size=10):
+    """
+    Create a pooled session, sized for the workers, that retries 429/5xx
+    and connection errors with exponential backoff.
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Majority Label per Domain for the Manual Classification Files
+
+The manual classification files (manual_vpn.csv, manual_local.csv) can
+label the same domain several times, sometimes with different labels.
+majority_labels() keeps one label per key in a few vectorized steps: it
+counts each (key, label) pair once and picks the most frequent label.
+
+- Ties go to the label that sorts first, as Series.mode().iloc[0] did.
+- 'agreement' is the share of the key's labelled rows that have that
+  label (1.0 when everybody agreed).
+- Keys with no label at all keep a missing label and agreement.
+
+Not meant to be run.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def majority_labels(df, key, label="deduccion"):
+    """
+    Return one row per value of key: its most frequent label and the
+    agreement (share of labelled rows with that label).
+    """
+    # One row per (key, label) pair, sorted by key then label
+    counts = df.groupby([key, label], sort=True).size().reset_index(name="votes")
+    totals = counts.groupby(key, sort=False)["votes"].transform("sum")
+    # idxmax keeps the first of tied rows, i.e. the label that sorts first
+    best = counts.groupby(key, sort=False)["votes"].idxmax().to_numpy()
+    result = counts.loc[best, [key, label]].reset_index(drop=True)
+    result["agreement"] = counts["votes"].to_numpy()[best] / totals.to_numpy()[best]
+
+    unlabelled = df.loc[~df[key].isin(result[key]), key].drop_duplicates()
+    if len(unlabelled):
+        result = pd.concat([result, pd.DataFrame({key: unlabelled, label: np.nan, "agreement": np.nan})])
+    return result.sort_values(key, kind="stable").reset_index(drop=True)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Size-Bounded SQLite Store of Compressed Values
+
+CompressedLRUStore keeps one SQLite table of zlib-compressed values keyed
+by a string, for the local caches of downloaded data (the raw measurement
+cache of extract_ooni_lock_types.py and the page store of
+classification/page_store.py):
+- Every row records its compressed size, and the running total is kept
+  in memory.
+- Reads record the access time in memory; the times are written in one
+  statement with the next write, every ACCESS_FLUSH_EVERY reads and on
+  close(), instead of one UPDATE and commit per read.
+- Once the total goes over max_mb, the least recently used rows are
+  deleted until it is back at EVICT_TO of the limit.
+
+Not meant to be run.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import threading
+
+ACCESS_FLUSH_EVERY = 500
+EVICT_TO = 0.9
+
+
+def compress(value):
+    return zlib.compress((value or "").encode("utf-8"))
+
+
+def decompress(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class CompressedLRUStore:
+    """
+    Thread-safe SQLite table of compressed values, evicted least recently
+    used first once their total size goes over max_mb.
+
+    columns is the SQL of the value columns; every bytes value written
+    counts towards the size of its row.
+    """
+
+    def __init__(self, path, table, key, columns, max_mb):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.table = table
+        self.key = key
+        self.max_bytes = max_mb * 1024 * 1024
+        self.accessed = {}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"{key} TEXT PRIMARY KEY, {columns}, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {table}"
+        ).fetchone()[0]
+
+    def select(self, key, columns):
+        """
+        Return the given columns of a key's row as a tuple, or None, and
+        record the access.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {columns} FROM {self.table} WHERE {self.key} = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.accessed[key] = time.time()
+                if len(self.accessed) >= ACCESS_FLUSH_EVERY:
+                    self.flush_access()
+                    self.conn.commit()
+        return row
+
+    def write(self, key, values):
+        """
+        Insert or replace a key's row and evict old rows if the store is full.
+        """
+        size = sum(len(value) for value in values.values() if isinstance(value, bytes))
+        columns = list(values) + ["size", "last_access"]
+        with self.lock:
+            self.flush_access()
+            old = self.conn.execute(
+                f"SELECT size FROM {self.table} WHERE {self.key} = ?", (key,)
+            ).fetchone()
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} ({self.key}, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+                (key, *values.values(), size, time.time()),
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+            self.conn.commit()
+
+    def update(self, key, values):
+        """
+        Set some columns of a key's row, leaving its size as it is.
+        """
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self.lock:
+            self.conn.execute(
+                f"UPDATE {self.table} SET {assignments} WHERE {self.key} = ?", (*values.values(), key)
+            )
+            self.conn.commit()
+
+    def flush_access(self):
+        """
+        Write the recorded access times (the caller holds the lock and commits).
+        """
+        if self.accessed:
+            self.conn.executemany(
+                f"UPDATE {self.table} SET last_access = ? WHERE {self.key} = ?",
+                [(accessed_at, key) for key, accessed_at in self.accessed.items()],
+            )
+            self.accessed.clear()
+
+    def evict(self):
+        """
+        Delete least recently used rows until the store is at EVICT_TO of its limit.
+        """
+        target = self.max_bytes * EVICT_TO
+        cursor = self.conn.execute(f"SELECT {self.key}, size FROM {self.table} ORDER BY last_access")
+        to_delete = []
+        for key, size in cursor:
+            if self.total_bytes <= target:
+                break
+            to_delete.append((key,))
+            self.total_bytes -= size
+        self.conn.executemany(f"DELETE FROM {self.table} WHERE {self.key} = ?", to_delete)
+
+    def close(self):
+        with self.lock:
+            self.flush_access()
+            self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Optional Parquet Storage for Measurement Tables
+
+The CSV files under data/csv_output stay the source of truth. This module
+keeps a typed Parquet copy next to each CSV (same name, .parquet extension):
+- write_parquet() converts a CSV, typing the columns and flattening the
+  stringified 'scores' dict into real scores_* columns.
+- read_table() loads only the requested columns, from the Parquet copy when
+  it is at least as new as the CSV, or from the CSV otherwise.
+
+The Parquet copy also gets int32 domain key columns (input_id, Dominio_id,
+url_id: the ID of canonical_url() of the input in common/domain_ids.py), so
+the exporters join on integers. read_table() computes them when they are
+requested from a CSV or an older copy.
+
+Parquet support needs pyarrow. Without it everything falls back to CSV.
+
+How to use:
+1. Run: python src/common/measurement_store.py <csv file or folder> [...]
+   to create Parquet copies of existing CSVs.
+2. Import read_table() / write_parquet() from the other scripts.
+"""
+
+import os
+import ast
+import sys
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.domain_ids import domain_dictionary  # noqa: E402
+from common.urls import canonical_urls  # noqa: E402
+
+# Low-cardinality text columns stored as categoricals
+CATEGORY_COLUMNS = [
+    "dns_experiment_failure",
+    "http_experiment_failure",
+    "dns_consistency",
+    "accessible",
+    "resolver_asn",
+    "resolver_ip",
+    "probe_asn",
+    "probe_cc",
+    "test_name",
+    "Status",
+    "Bloqueado",
+]
+DATETIME_COLUMNS = ["measurement_start_time"]
+# Domain key column -> the input column it is computed from
+DOMAIN_KEY_COLUMNS = {"input_id": "input", "Dominio_id": "Dominio", "url_id": "url"}
+
+
+def parquet_path(csv_path):
+    """
+    Return the path of the Parquet copy of a CSV.
+    """
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def parse_scores(value):
+    """
+    Parse a stringified scores dict into a flat {name: value} dict.
+    """
+    if pd.isna(value):
+        return {}
+    try:
+        scores = ast.literal_eval(str(value))
+    except (ValueError, SyntaxError):
+        return {}
+    if not isinstance(scores, dict):
+        return {}
+
+    flat = {}
+    for key, inner in scores.items():
+        if isinstance(inner, dict):
+            for inner_key, inner_value in inner.items():
+                flat[f"scores_{key}_{inner_key}"] = inner_value
+        else:
+            flat[f"scores_{key}"] = inner
+    return flat
+
+
+def flatten_scores(df):
+    """
+    Replace the 'scores' column with one column per score.
+
+    Each distinct scores string is parsed only once.
+    """
+    if "scores" not in df.columns:
+        return df
+    codes, uniques = pd.factorize(df["scores"])
+    parsed = pd.DataFrame([parse_scores(v) for v in uniques])
+    scores = parsed.reindex(codes).set_axis(df.index)
+    return pd.concat([df.drop(columns="scores"), scores], axis=1)
+
+
+def apply_types(df):
+    """
+    Convert known columns to categorical and datetime dtypes.
+    """
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in DATETIME_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors="coerce", utc=True)
+    return df
+
+
+def add_domain_ids(df, keys=None):
+    """
+    Add the int32 domain key columns (all whose input column is present, or
+    only keys) that the table does not have yet.
+    """
+    for key in keys or DOMAIN_KEY_COLUMNS:
+        source = DOMAIN_KEY_COLUMNS[key]
+        if key not in df.columns and source in df.columns:
+            df[key] = domain_dictionary().encode(canonical_urls(df[source]))
+    return df
+
+
+def write_parquet(csv_path):
+    """
+    Write a typed Parquet copy of a CSV and return its path.
+
+    Returns None when pyarrow is not installed or the CSV does not exist.
+    """
+    if not PARQUET_AVAILABLE or not os.path.exists(csv_path):
+        return None
+    df = add_domain_ids(apply_types(flatten_scores(pd.read_csv(csv_path))))
+    output_path = parquet_path(csv_path)
+    df.to_parquet(output_path, index=False)
+    print(f"Parquet copy written to {output_path}")
+    return output_path
+
+
+def has_fresh_parquet(csv_path):
+    """
+    Return True if a Parquet copy exists and is not older than the CSV.
+    """
+    path = parquet_path(csv_path)
+    return (
+        PARQUET_AVAILABLE
+        and os.path.exists(path)
+        and (not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path))
+    )
+
+
+def read_table(csv_path, columns=None):
+    """
+    Load a measurement table, optionally only some of its columns.
+
+    Reads the Parquet copy when it is fresh, otherwise the CSV. Either way
+    the known columns get the same dtypes, and requested domain key columns
+    (DOMAIN_KEY_COLUMNS) are filled in if the file lacks them. Note that a
+    Parquet copy has scores_* columns instead of 'scores'.
+    """
+    keys = [c for c in columns or [] if c in DOMAIN_KEY_COLUMNS]
+    fresh = has_fresh_parquet(csv_path)
+    path = parquet_path(csv_path)
+    if fresh:
+        stored = set(pq.read_schema(path).names)
+        if os.path.getmtime(path) < domain_dictionary().created_at:
+            stored -= set(DOMAIN_KEY_COLUMNS)
+        keys = [key for key in keys if key not in stored]
+    load_columns = None
+    if columns is not None:
+        load_columns = list(dict.fromkeys(
+            [c for c in columns if c not in keys] + [DOMAIN_KEY_COLUMNS[key] for key in keys]
+        ))
+    if fresh:
+        df = pd.read_parquet(path, columns=load_columns)
+    else:
+        df = apply_types(pd.read_csv(csv_path, usecols=load_columns))
+    if not keys:
+        return df
+    return add_domain_ids(df, keys)[columns]
+
+
+def main(paths):
+    if not PARQUET_AVAILABLE:
+        print("pyarrow is not installed; nothing to do.")
+        return
+
+    for path in paths:
+        if os.path.isdir(path):
+            csv_files = sorted(
+                os.path.join(path, f) for f in os.listdir(path) if f.endswith(".csv")
+            )
+        else:
+            csv_files = [path]
+        for csv_file in csv_files:
+            write_parquet(csv_file)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+URL and Domain Canonicalization Shared by All the Scripts
+
+- normalize_url() gives the key under which a page is stored or cached.
+- url_host() gives the site a URL belongs to, for per-site deduplication.
+- canonical_url() gives the join key of an input: no scheme, no "www.",
+  lowercase host, no trailing "/".
+- base_domain() gives the registrable domain of an input (e.g.
+  'cne.gob.ve', 'facebook.com'), using the public suffix list bundled in
+  public_suffix_list.dat, so ccTLD second-level suffixes such as gob.ve,
+  com.ar or org.ni are handled.
+
+The scalar functions are memoized. canonical_urls() and base_domains()
+take a pandas Series, canonicalize each distinct value once and map the
+results back.
+
+Not meant to be run.
+"""
+
+import os
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+import pandas as pd
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+PUBLIC_SUFFIX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_suffix_list.dat")
+# Distinct values remembered by each memoized function
+URL_CACHE_SIZE = 1 << 18
+
+SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://")
+# Malformed http(s) prefixes found in the inputs, e.g. "https:example.com" or "http:/example.com"
+LOOSE_HTTP_RE = re.compile(r"^(https?):/*", re.IGNORECASE)
+IPV4_RE = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+
+def _split(url):
+    # Inputs are often bare domains ("facebook.com/path"); parse them as network paths
+    url = url.strip()
+    if url.startswith("//") or SCHEME_RE.match(url):
+        return urlsplit(url)
+    loose = LOOSE_HTTP_RE.match(url)
+    if loose:
+        return urlsplit(f"{loose.group(1).lower()}://{url[loose.end():]}")
+    return urlsplit(f"//{url}")
+
+
+def _host_and_port(parts):
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port in (None, DEFAULT_PORTS.get(parts.scheme.lower())):
+        return host
+    return f"{host}:{port}"
+
+
+def _strip_www(host):
+    return host[4:] if host.startswith("www.") else host
+
+
+def normalize_url(url):
+    """
+    Return the key of a URL: lowercase scheme and host, no default port,
+    no fragment, and "/" for an empty path.
+    """
+    parts = urlsplit(url.strip())
+    netloc = _host_and_port(parts)
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or "/", parts.query, ""))
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def url_host(url):
+    """
+    Return the lowercase host of a URL without "www." (and its port if it
+    is not the default one).
+    """
+    return _strip_www(_host_and_port(_split(url)))
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def canonical_url(url):
+    """
+    Return a URL or bare domain without scheme, "www.", fragment or trailing
+    "/", with a lowercase host ('https://www.Example.com/a/' -> 'example.com/a').
+    """
+    if not isinstance(url, str) or not url.strip():
+        return ""
+    try:
+        parts = _split(url)
+        canonical = _strip_www(_host_and_port(parts)) + parts.path
+    except ValueError:
+        return ""
+    if parts.query:
+        canonical = f"{canonical}?{parts.query}"
+    return canonical.rstrip("/")
+
+
+@lru_cache(maxsize=1)
+def _suffix_trie():
+    # Nested dicts keyed by label, right to left; "" marks the end of a rule,
+    # "*" a wildcard rule and "!label" an exception rule
+    trie = {}
+    with open(PUBLIC_SUFFIX_PATH, encoding="utf-8") as f:
+        rules = [line.split()[0] for line in f if line.strip() and not line.startswith("//")]
+    for rule in rules:
+        variants = {rule}
+        try:
+            variants.add(rule.lstrip("!").encode("idna").decode("ascii"))
+        except UnicodeError:
+            pass
+        for variant in variants:
+            if rule.startswith("!") and not variant.startswith("!"):
+                variant = f"!{variant}"
+            node = trie
+            labels = variant.split(".")
+            for label in reversed(labels[1:]):
+                node = node.setdefault(label, {})
+            node.setdefault(labels[0], {})[""] = True
+    return trie
+
+
+def _suffix_length(labels):
+    # Number of labels of the public suffix of a host (at least the TLD)
+    node = _suffix_trie()
+    length = 1
+    for i, label in enumerate(reversed(labels)):
+        if f"!{label}" in node:
+            return i
+        if label in node:
+            node = node[label]
+            if "" in node:
+                length = i + 1
+        elif "*" in node:
+            return i + 1
+        else:
+            break
+    return length
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def registrable_domain(host):
+    """
+    Return the public suffix plus one label of a lowercase host
+    ('cne.gob.ve' -> 'cne.gob.ve', 'm.facebook.com' -> 'facebook.com').
+    IP addresses and hosts that are a public suffix are returned unchanged.
+    """
+    if not host or ":" in host or host.startswith("[") or IPV4_RE.match(host):
+        return host
+    labels = host.split(".")
+    length = _suffix_length(labels)
+    if len(labels) <= length:
+        return host
+    return ".".join(labels[-length - 1:])
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def base_domain(url):
+    """
+    Return the registrable domain of a URL or bare domain, or "" if it has no host.
+    """
+    if not isinstance(url, str) or not url.strip():
+        return ""
+    try:
+        host = (_split(url).hostname or "").rstrip(".")
+    except ValueError:
+        return ""
+    return registrable_domain(host)
+
+
+def _map_unique(series, function):
+    # Apply function once per distinct value; missing values become ""
+    codes, uniques = pd.factorize(series)
+    mapped = pd.Series([function(str(value)) for value in uniques] + [""], dtype=object)
+    return pd.Series(mapped.to_numpy()[codes], index=series.index, dtype=object)
+
+
+def canonical_urls(series):
+    """
+    canonical_url() of every value of a Series.
+    """
+    return _map_unique(series, canonical_url)
+
+
+def base_domains(series):
+    """
+    base_domain() of every value of a Series.
+    """
+    return _map_unique(series, base_domain)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark Write-Time Deduplication for all_countries.csv
+
+This script:
+1. Generates synthetic measurement batches with a share of repeated inputs.
+2. Appends them through save_to_csv() with the on-disk DedupIndex.
+3. Runs the old approach (plain append + pandas drop_duplicates rewrite).
+4. Prints rows/sec and peak memory for both and checks the row counts match.
+
+How to use:
+1. Adjust TOTAL_ROWS, BATCH_SIZE and DUPLICATE_RATIO below.
+2. Run: python src/ooni/benchmark_dedup_index.py
+"""
+
+import os
+import io
+import time
+import random
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+import pandas as pd
+
+from fetch_ooni_historical_inputs import DedupIndex, save_to_csv
+
+TOTAL_ROWS = 1_000_000
+BATCH_SIZE = 2000
+DUPLICATE_RATIO = 0.3
+SEED = 42
+
+
+def generate_batches(total_rows=TOTAL_ROWS, batch_size=BATCH_SIZE):
+    """
+    Yield batches of fake measurements; about DUPLICATE_RATIO of inputs repeat.
+    """
+    rng = random.Random(SEED)
+    unique_inputs = int(total_rows * (1 - DUPLICATE_RATIO))
+    for start in range(0, total_rows, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, total_rows)):
+            n = i if i < unique_inputs else rng.randrange(unique_inputs)
+            batch.append({
+                "input": f"https://site-{n}.example/",
+                "measurement_uid": f"uid_{i}",
+                "probe_cc": "UY",
+                "scores": "{'analysis': {'blocking_type': 'dns'}}",
+            })
+        yield batch
+
+
+def run_index(csv_path, index_path):
+    """
+    Append all batches through the dedup index.
+    """
+    index = DedupIndex(index_path, csv_path)
+    with redirect_stdout(io.StringIO()):
+        for batch in generate_batches():
+            save_to_csv(batch, csv_path, index)
+    index.close()
+
+
+def run_pandas(csv_path):
+    """
+    Append all batches, then deduplicate with a full pandas rewrite.
+    """
+    with redirect_stdout(io.StringIO()):
+        for batch in generate_batches():
+            save_to_csv(batch, csv_path)
+    df = pd.read_csv(csv_path)
+    df.drop_duplicates(subset="input").to_csv(csv_path, index=False)
+
+
+def measure(label, func, *args):
+    """
+    Run func and report its time and peak Python memory.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<14} {elapsed:7.2f}s  {TOTAL_ROWS / elapsed:>10,.0f} rows/s  peak {peak / 2**20:7.1f} MiB")
+
+
+def count_rows(csv_path):
+    with open(csv_path, encoding="utf-8") as f:
+        return sum(1 for _ in f) - 1
+
+
+def main():
+    print(f"Deduplicating {TOTAL_ROWS:,} rows ({DUPLICATE_RATIO:.0%} repeated inputs)")
+    with tempfile.TemporaryDirectory() as tmp:
+        index_csv = os.path.join(tmp, "index.csv")
+        pandas_csv = os.path.join(tmp, "pandas.csv")
+
+        measure("dedup index", run_index, index_csv, os.path.join(tmp, "index.sqlite"))
+        measure("pandas rewrite", run_pandas, pandas_csv)
+
+        print(f"Rows kept: index={count_rows(index_csv):,} pandas={count_rows(pandas_csv):,}")
+
+
+if __name__ == "__main__":
+    main()
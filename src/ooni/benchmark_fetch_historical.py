@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Historical OONI Fetch Engine Against a Local Stub Server
+
+This script:
+1. Starts a local HTTP server that mimics /api/v1/measurements.
+2. Runs fetch_data() serially (1 worker) and concurrently.
+3. Checks that both runs produce the same CSV.
+4. Prints the wall-clock speedup.
+5. Runs again with a manifest while the stub answers HTTP 503 for
+   FAILING_WINDOWS, checks those windows are not recorded, then reruns and
+   checks the resumed CSV has the same rows as the serial one.
+
+How to use:
+1. Adjust STUB_LATENCY, WORKERS and the window counts below if needed.
+2. Run: python src/ooni/benchmark_fetch_historical.py
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from fetch_ooni_historical_inputs import build_windows, fetch_data, load_manifest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import http_session  # noqa: E402
+
+STUB_LATENCY = 0.2
+ROWS_PER_WINDOW = 50
+WORKERS = 8
+BENCH_COUNTRIES = ["UY", "VE", "AR"]
+FAILING_WINDOWS = {("VE", "2024-03-01"), ("AR", "2024-11-01")}
+
+
+def make_measurement(country, since, index):
+    """
+    Build a fake measurement shaped like the OONI API results.
+    """
+    blocking_type = "dns" if index % 2 == 0 else "http-failure"
+    uid = f"{since.replace('-', '')}000000.{index:06d}_{country}_webconnectivity_stub"
+    return {
+        "anomaly": True,
+        "confirmed": False,
+        "failure": False,
+        "input": f"https://{country.lower()}-{since}-{index}.example/",
+        "measurement_start_time": f"{since}T00:00:00Z",
+        "measurement_uid": uid,
+        "measurement_url": f"https://api.ooni.io/api/v1/raw_measurement?measurement_uid={uid}",
+        "probe_asn": "AS0",
+        "probe_cc": country,
+        "report_id": f"stub_{country}",
+        "scores": {"analysis": {"blocking_type": blocking_type}},
+        "test_name": "web_connectivity",
+    }
+
+
+class StubMeasurementsHandler(BaseHTTPRequestHandler):
+    """
+    Serve canned /api/v1/measurements responses after a fixed delay.
+
+    (country, since) pairs in failing get HTTP 503 instead.
+    """
+
+    failing = set()
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != "/api/v1/measurements":
+            self.send_error(404)
+            return
+
+        params = parse_qs(parsed.query)
+        country = params.get("probe_cc", ["XX"])[0]
+        since = params.get("since", ["1970-01-01"])[0]
+        limit = int(params.get("limit", [ROWS_PER_WINDOW])[0])
+        offset = int(params.get("offset", [0])[0])
+        time.sleep(STUB_LATENCY)
+        if (country, since) in self.failing:
+            self.send_error(503)
+            return
+
+        results = [
+            make_measurement(country, since, i)
+            for i in range(offset, min(offset + limit, ROWS_PER_WINDOW))
+        ]
+        next_url = None
+        if offset + limit < ROWS_PER_WINDOW:
+            params["offset"] = [str(offset + limit)]
+            query = "&".join(f"{k}={v[0]}" for k, v in params.items())
+            next_url = f"http://{self.headers['Host']}{parsed.path}?{query}"
+
+        metadata = {"count": ROWS_PER_WINDOW, "next_url": next_url}
+        body = json.dumps({"metadata": metadata, "results": results}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """
+    Start the stub server in a background thread and return it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubMeasurementsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    server = start_stub_server()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1/measurements"
+    windows = build_windows(BENCH_COUNTRIES, start_year=2024, end_year=2024, end_month=12)
+    print(f"Benchmarking {len(windows)} windows against {api_url}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        serial_csv = os.path.join(tmp, "serial.csv")
+        concurrent_csv = os.path.join(tmp, "concurrent.csv")
+
+        serial_time = fetch_data(
+            windows, serial_csv, api_url, max_workers=1, requests_per_second=0,
+            manifest_file=None, dedup_index_file=None,
+        )
+        concurrent_time = fetch_data(
+            windows, concurrent_csv, api_url, max_workers=WORKERS, requests_per_second=0,
+            manifest_file=None, dedup_index_file=None,
+        )
+
+        with open(serial_csv, encoding="utf-8") as a, open(concurrent_csv, encoding="utf-8") as b:
+            identical = a.read() == b.read()
+
+        # No backoff sleeps against the stub: failing windows fail fast after the retries
+        http_session.BACKOFF_FACTOR = 0
+        resumed_csv = os.path.join(tmp, "resumed.csv")
+        manifest_file = os.path.join(tmp, "manifest.jsonl")
+        StubMeasurementsHandler.failing = FAILING_WINDOWS
+        fetch_data(
+            windows, resumed_csv, api_url, max_workers=WORKERS, requests_per_second=0,
+            manifest_file=manifest_file, dedup_index_file=os.path.join(tmp, "dedup.sqlite"),
+        )
+        recorded = {(country, since) for country, since, _ in load_manifest(manifest_file)}
+        StubMeasurementsHandler.failing = set()
+        fetch_data(
+            windows, resumed_csv, api_url, max_workers=WORKERS, requests_per_second=0,
+            manifest_file=manifest_file, dedup_index_file=os.path.join(tmp, "dedup.sqlite"),
+        )
+        with open(serial_csv, encoding="utf-8") as a, open(resumed_csv, encoding="utf-8") as b:
+            resumed_same = sorted(a) == sorted(b)
+
+    server.shutdown()
+
+    print(f"Serial:     {serial_time:.2f}s")
+    print(f"Concurrent: {concurrent_time:.2f}s ({WORKERS} workers)")
+    print(f"Speedup:    {serial_time / concurrent_time:.1f}x")
+    print(f"Identical output: {identical}")
+    print(f"Failed windows left out of the manifest: {not (recorded & FAILING_WINDOWS)}")
+    print(f"Same rows after resuming: {resumed_same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,79 +9,83 @@ This script:
 4. Fills missing labels.
 5. Exports results to Excel.
 
+In batch mode (--all) the manual classification is loaded once and every
+CSV in VPN_CSV_DIR is merged and exported in EXPORT_WORKERS processes; with
+--workbook they go to one workbook with a sheet per country. Excel files
+are streamed by common/excel_writer.py.
+
 How to use:
 1. Adjust FILE_NAME below.
-2. Run: python merge_vpn_with_manual.py
+2. Run: python src/ooni/export_ooni_results_excel.py
+   or:  python src/ooni/export_ooni_results_excel.py --all [--workbook]
 """
 
 import pandas as pd
-from urllib.parse import urlparse
 import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.domain_ids import domain_dictionary  # noqa: E402
+from common.excel_writer import write_excel  # noqa: E402
+from common.labels import majority_labels  # noqa: E402
+from common.measurement_store import read_table  # noqa: E402
+from common.urls import base_domains  # noqa: E402
 
 # without extension
 FILE_NAME = "venezuela_vpn"
 
-VPN_CSV_PATH = f"data/csv_output/vpn_measurements/{FILE_NAME}.csv"
+VPN_CSV_DIR = "data/csv_output/vpn_measurements"
+VPN_CSV_PATH = f"{VPN_CSV_DIR}/{FILE_NAME}.csv"
 MANUAL_CSV_PATH = "data/csv_output/url_classification/manual_vpn.csv"
-OUTPUT_EXCEL_PATH = f"data/excel/manual_classification/vpn/{FILE_NAME}.xlsx"
-
-
-def extract_base_domain(url):
-    """
-    Extract the base domain (e.g., 'facebook.com').
-    """
-    if pd.isna(url):
-        return ""
-    try:
-        url = str(url).strip().lower()
-        if not url.startswith("http"):
-            url = "http://" + url
-        netloc = urlparse(url).netloc or urlparse("http://" + url).path
-        netloc = netloc.replace("www.", "")
-        parts = netloc.split(".")
-        if len(parts) >= 2:
-            return ".".join(parts[-2:])
-        return netloc
-    except Exception:
-        return ""
+VPN_COLUMNS = [
+    "input",
+    "input_id",
+    "dns_experiment_failure",
+    "http_experiment_failure",
+    "accessible",
+    "resolver_asn",
+    "resolver_ip",
+    "status_code",
+]
+OUTPUT_EXCEL_DIR = "data/excel/manual_classification/vpn"
+OUTPUT_EXCEL_PATH = f"{OUTPUT_EXCEL_DIR}/{FILE_NAME}.xlsx"
+OUTPUT_WORKBOOK_PATH = f"{OUTPUT_EXCEL_DIR}/all_countries.xlsx"
+EXPORT_WORKERS = os.cpu_count() or 1
 
 
 def load_and_prepare_vpn_data(csv_path):
     """
-    Load VPN measurement CSV and add normalized columns.
+    Load VPN measurement CSV and add normalized columns and their integer keys.
     """
-    df = pd.read_csv(csv_path)
-    df["input_normalized"] = (
-        df["input"]
-        .str.replace("https://", "", regex=False)
-        .str.replace("http://", "", regex=False)
-        .str.replace("www.", "", regex=False)
-        .str.rstrip("/")
-    )
-    df["base_domain"] = df["input"].apply(extract_base_domain)
+    domains = domain_dictionary()
+    df = read_table(csv_path, columns=VPN_COLUMNS)
+    df["input_normalized"] = domains.decode(df["input_id"])
+    df["base_domain"] = base_domains(df["input"])
+    df["base_domain_id"] = domains.encode(df["base_domain"])
     return df
 
 
 def load_and_prepare_manual_data(csv_path):
     """
-    Load manual classification CSV and deduplicate by domain.
+    Load a manual classification CSV (manual_vpn.csv or manual_local.csv)
+    and keep the majority label of each domain (integer key). The agreement
+    column is dropped so the report keeps its format.
     """
     df = pd.read_csv(csv_path)
-    df["base_domain"] = df["input"].apply(lambda x: extract_base_domain(str(x)))
-
-    grouped = df.groupby("base_domain")["deduccion"].agg(
-        lambda x: x.mode().iloc[0] if not x.mode().empty else x.iloc[0]
-    ).reset_index()
+    df["base_domain_id"] = domain_dictionary().encode(base_domains(df["input"]))
+    return majority_labels(df, "base_domain_id").drop(columns="agreement")
 
-    return grouped
 
-
-def merge_and_export(vpn_df, manual_df, output_path):
+def merge_vpn_with_manual(vpn_df, manual_df):
     """
-    Merge datasets and export to Excel.
+    Merge datasets, one row per normalized input.
     """
     vpn_filtered = vpn_df[
         [
+            "input_id",
+            "base_domain_id",
             "input_normalized",
             "base_domain",
             "dns_experiment_failure",
@@ -98,30 +102,99 @@ def merge_and_export(vpn_df, manual_df, output_path):
         vpn_filtered,
         manual_df,
         how="left",
-        on="base_domain"
+        on="base_domain_id"
     )
 
     merged["deduccion"] = merged["deduccion"].fillna("NO_CLASSIFIED")
 
-    merged = merged.drop_duplicates(subset="input_normalized", keep="first")
+    merged = merged.drop_duplicates(subset="input_id", keep="first")
+    return merged.drop(columns=["input_id", "base_domain_id"])
+
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    merged.to_excel(output_path, index=False)
+def merge_and_export(vpn_df, manual_df, output_path):
+    """
+    Merge datasets and export to Excel.
+    """
+    merged = merge_vpn_with_manual(vpn_df, manual_df)
+    written = write_excel(merged, output_path)
 
-    print(f"Merged data exported to: {output_path}")
+    print(f"Merged data exported to: {', '.join(written)}")
     print(merged[["input_normalized", "base_domain", "deduccion"]].head())
 
 
-def main():
-    print(f"Loading VPN data from: {VPN_CSV_PATH}")
-    vpn_df = load_and_prepare_vpn_data(VPN_CSV_PATH)
+_manual_df = None
+
 
+def init_worker(manual_df):
+    """
+    Keep the prepared manual classification in each worker process.
+    """
+    global _manual_df
+    _manual_df = manual_df
+
+
+def export_file(vpn_csv_path, output_path=None):
+    """
+    Merge one VPN file with the worker's manual classification and export it,
+    or return the merged table if output_path is None.
+    """
+    vpn_df = load_and_prepare_vpn_data(vpn_csv_path)
+    if output_path is None:
+        return merge_vpn_with_manual(vpn_df, _manual_df)
+    merge_and_export(vpn_df, _manual_df, output_path)
+    return output_path
+
+
+def export_all(input_dir, manual_df, output_dir, workers=EXPORT_WORKERS, workbook_path=None):
+    """
+    Export every CSV of input_dir to output_dir, in parallel processes that
+    receive the prepared manual classification once. With workbook_path,
+    write one workbook with a sheet per file instead. Returns the paths written.
+    """
+    csv_files = sorted(f for f in os.listdir(input_dir) if f.endswith(".csv"))
+    # Output names are lowercase, like the existing reports (elSalvador_vpn.csv -> elsalvador_vpn.xlsx)
+    names = [os.path.splitext(f)[0].lower() for f in csv_files]
+    jobs = [
+        (os.path.join(input_dir, f), None if workbook_path else os.path.join(output_dir, f"{name}.xlsx"))
+        for f, name in zip(csv_files, names)
+    ]
+    if not jobs:
+        return []
+    if workers <= 1 or len(jobs) == 1:
+        init_worker(manual_df)
+        results = [export_file(csv_path, output_path) for csv_path, output_path in jobs]
+    else:
+        # spawn: workers open their own SQLite connection to the domain dictionary
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(manual_df,),
+        ) as executor:
+            futures = [executor.submit(export_file, csv_path, output_path) for csv_path, output_path in jobs]
+            results = [future.result() for future in futures]
+    if workbook_path:
+        return write_excel(dict(zip(names, results)), workbook_path)
+    return results
+
+
+def main(all_files=False, workbook=False):
     print(f"Loading manual classification data from: {MANUAL_CSV_PATH}")
     manual_df = load_and_prepare_manual_data(MANUAL_CSV_PATH)
 
+    if all_files:
+        print(f"Exporting every file in {VPN_CSV_DIR}...")
+        exported = export_all(VPN_CSV_DIR, manual_df, OUTPUT_EXCEL_DIR,
+                              workbook_path=OUTPUT_WORKBOOK_PATH if workbook else None)
+        print(f"Exported: {', '.join(exported)}")
+        return
+
+    print(f"Loading VPN data from: {VPN_CSV_PATH}")
+    vpn_df = load_and_prepare_vpn_data(VPN_CSV_PATH)
+
     print("Merging datasets...")
     merge_and_export(vpn_df, manual_df, OUTPUT_EXCEL_PATH)
 
 
 if __name__ == "__main__":
-    main()
+    main("--all" in sys.argv[1:], "--workbook" in sys.argv[1:])
@@ -7,15 +7,26 @@ This script:
 2. Filters for DNS blocking.
 3. Saves all data to a CSV file.
 
+Each day follows the API's next-page links and results are written page by
+page, so busy days are no longer truncated at the page limit. Requests are
+retried on 429/5xx; a page that still fails stops the run with the error
+instead of silently skipping the rest of the day.
+If pyarrow is installed, a typed Parquet copy of the CSV is written at the end.
+
 How to use:
 1. Adjust START_DATE, END_DATE, and OONI_RUN_LINK_ID below.
 2. Run: python fetch_ooni_run_results.py
 """
 
 import os
+import sys
 import csv
 from datetime import date, timedelta
-import requests
+
+from ooni_api import create_session, iter_pages
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.measurement_store import write_parquet  # noqa: E402
 
 OONI_RUN_LINK_ID = 10158
 START_DATE = date(2025, 5, 24)
@@ -23,17 +34,7 @@ END_DATE = date(2025, 5, 28)
 OUTPUT_FOLDER = "data/csv_output/ooni_run_measurements"
 OUTPUT_FILE = "ooni_run_measurements_results.csv"
 API_URL = "https://api.ooni.org/api/v1/measurements"
-
-
-def execute_query(query_url):
-    """
-    Send GET request to OONI API and return JSON data.
-    """
-    response = requests.get(query_url)
-    if response.status_code == 200:
-        return response.json()
-    print(f"Error fetching data: HTTP {response.status_code}")
-    return {}
+PAGE_LIMIT = 10000
 
 
 def filter_dns(data):
@@ -71,32 +72,36 @@ def fetch_ooni_run_results():
     Download measurements day by day and save filtered results.
     """
     current_date = START_DATE
+    session = create_session(pool_size=1)
 
     while current_date <= END_DATE:
         since_str = current_date.strftime("%Y-%m-%d")
         until_str = (current_date + timedelta(days=1)).strftime("%Y-%m-%d")
 
-        query_url = (
-            f"{API_URL}?limit=10000"
-            f"&failure=false"
-            f"&test_name=web_connectivity"
-            f"&since={since_str}"
-            f"&until={until_str}"
-            f"&anomaly=true"
-            f"&ooni_run_link_id={OONI_RUN_LINK_ID}"
-        )
+        params = {
+            "limit": PAGE_LIMIT,
+            "failure": "false",
+            "test_name": "web_connectivity",
+            "since": since_str,
+            "until": until_str,
+            "anomaly": "true",
+            "ooni_run_link_id": OONI_RUN_LINK_ID,
+        }
 
         print(f"Fetching data from {since_str} to {until_str}...")
-        data = execute_query(query_url)
-        filtered = filter_dns(data)
-        save_to_csv(filtered, os.path.join(OUTPUT_FOLDER, OUTPUT_FILE))
+        for page in iter_pages(API_URL, params, session):
+            filtered = filter_dns(page)
+            save_to_csv(filtered, os.path.join(OUTPUT_FOLDER, OUTPUT_FILE))
 
         current_date += timedelta(days=1)
 
+    session.close()
+
 
 def main():
     print(f"Downloading OONI measurements for run ID {OONI_RUN_LINK_ID}...")
     fetch_ooni_run_results()
+    write_parquet(os.path.join(OUTPUT_FOLDER, OUTPUT_FILE))
     print("Done.")
 
 
@@ -3,38 +3,55 @@
 Download and Save Historical OONI Data
 
 This script:
-1. Iterates over a set of countries and date ranges.
-2. Downloads measurements from OONI API.
+1. Iterates over a set of countries and monthly date windows, concurrently.
+2. Downloads measurements from OONI API, following next-page links.
 3. Filters DNS blocking results.
-4. Removes duplicate inputs.
-5. Saves data incrementally into a CSV.
+4. Removes duplicate inputs against an on-disk index (DEDUP_INDEX_FILE).
+5. Saves data incrementally into a CSV and records each finished window
+   in a manifest (MANIFEST_FILE).
 
 How to use:
-Just run: python fetch_historical_ooni.py
+1. Adjust MAX_WORKERS and REQUESTS_PER_SECOND below if needed.
+2. Run: python fetch_historical_ooni.py
+3. To resume a crashed run, run it again: recorded windows are skipped.
+4. For an incremental refresh, move END_YEAR / END_MONTH forward and run it.
 """
 
 import os
+import sys
 import csv
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+from datetime import date, datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import pandas as pd
+
+from ooni_api import HostRateLimiter, create_session, iter_pages
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.measurement_store import write_parquet  # noqa: E402
 
 COUNTRIES = ["UY", "VE", "HN", "AR", "CU", "SV", "NI", "GT"]
 START_YEAR = 2023
 END_YEAR = 2025
+END_MONTH = 1
 OUTPUT_FOLDER = "data/csv_output/ooni_historical_measurements"
 OUTPUT_FILE = f"{OUTPUT_FOLDER}/all_countries.csv"
+MANIFEST_FILE = f"{OUTPUT_FOLDER}/fetch_manifest.jsonl"
+DEDUP_INDEX_FILE = f"{OUTPUT_FOLDER}/dedup_index.sqlite"
+DEDUP_COLUMN = "input"
 API_URL = "https://api.ooni.org/api/v1/measurements"
 
-
-def execute_query(query_url):
-    """
-    Send GET request to OONI API and return JSON data.
-    """
-    response = requests.get(query_url)
-    if response.status_code == 200:
-        return response.json()
-    print(f"Error fetching data: HTTP {response.status_code}")
-    return {}
+# Concurrency settings (MAX_WORKERS = 1 reproduces the serial download)
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 4
+PAGE_LIMIT = 2000
+SAVE_CHUNK_ROWS = 5000
+# Rebuild the Parquet copy of OUTPUT_FILE after the download (reads the whole CSV)
+WRITE_PARQUET = False
 
 
 def filter_dns(data):
@@ -47,20 +64,6 @@ def filter_dns(data):
     ]
 
 
-def remove_duplicates(data):
-    """
-    Remove duplicate entries by 'input'.
-    """
-    seen_inputs = set()
-    unique_data = []
-    for item in data:
-        input_value = item.get("input")
-        if input_value not in seen_inputs:
-            unique_data.append(item)
-            seen_inputs.add(input_value)
-    return unique_data
-
-
 def get_month_range(year, month):
     """
     Return start and end date strings for a month.
@@ -75,74 +78,316 @@ def get_month_range(year, month):
     return start, end
 
 
-def save_to_csv(data, file_path):
+class DedupIndex:
+    """
+    Persistent set of keys already written to a CSV, stored in SQLite.
+
+    Keys are 16-byte BLAKE2 digests of the dedup column, so memory use is
+    bounded by SQLite's page cache rather than by the number of rows.
+    """
+
+    def __init__(self, index_path, csv_path, column=DEDUP_COLUMN, cache_mb=64):
+        self.column = column
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+
+        # An index without its CSV is stale; a CSV without an index is seeded below.
+        if not os.path.exists(csv_path) and os.path.exists(index_path):
+            os.remove(index_path)
+        seed = not os.path.exists(index_path) and os.path.exists(csv_path)
+
+        self.conn = sqlite3.connect(index_path)
+        self.conn.execute(f"PRAGMA cache_size = -{cache_mb * 1024}")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (key BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.conn.commit()
+
+        if seed:
+            self.seed_from_csv(csv_path)
+
+    def make_key(self, value):
+        """
+        Hash a dedup column value into a fixed-size key.
+        """
+        return hashlib.blake2b(str(value).encode("utf-8"), digest_size=16).digest()
+
+    def seed_from_csv(self, csv_path):
+        """
+        Add every key of an existing CSV to the index, streaming row by row.
+        """
+        print(f"Building dedup index from {csv_path}...")
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (key) VALUES (?)",
+                ((self.make_key(row.get(self.column)),) for row in reader),
+            )
+        self.conn.commit()
+
+    def filter_new(self, rows):
+        """
+        Return the rows whose key is not in the index and mark them as seen.
+
+        The new keys stay uncommitted until commit() is called.
+        """
+        new_rows = []
+        cursor = self.conn.cursor()
+        for row in rows:
+            cursor.execute(
+                "INSERT OR IGNORE INTO seen (key) VALUES (?)",
+                (self.make_key(row.get(self.column)),),
+            )
+            if cursor.rowcount == 1:
+                new_rows.append(row)
+        return new_rows
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+def save_to_csv(data, file_path, dedup_index=None):
     """
     Append data to CSV, creating header if needed.
+
+    With a DedupIndex, rows already present in the file are dropped first.
+    Returns the number of rows written.
     """
+    if dedup_index is not None:
+        data = dedup_index.filter_new(data)
+
     if not data:
         print("No data to save.")
-        return
+        return 0
 
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
     write_header = not os.path.exists(file_path)
 
-    with open(file_path, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=data[0].keys())
-        if write_header:
-            writer.writeheader()
-        writer.writerows(data)
+    try:
+        with open(file_path, mode="a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=data[0].keys())
+            if write_header:
+                writer.writeheader()
+            writer.writerows(data)
+    except Exception:
+        if dedup_index is not None:
+            dedup_index.rollback()
+        raise
+
+    if dedup_index is not None:
+        dedup_index.commit()
 
     print(f"Saved {len(data)} rows to {file_path}")
+    return len(data)
 
 
-def fetch_data():
+def build_windows(
+    countries=COUNTRIES, start_year=START_YEAR, end_year=END_YEAR, end_month=END_MONTH
+):
     """
-    Download and save data month by month for all countries.
+    Return the ordered list of (country, start_date, end_date) windows.
+
+    Months after end_month of end_year, or after the current month, are left out.
     """
-    for country in COUNTRIES:
-        year = START_YEAR
-        while year <= END_YEAR:
+    today = date.today()
+    last_month = min((end_year, end_month), (today.year, today.month))
+    windows = []
+    for country in countries:
+        for year in range(start_year, end_year + 1):
             for month in range(1, 13):
-                if year == 2025 and month == 2:
+                if (year, month) > last_month:
                     break
-
                 start_date, end_date = get_month_range(year, month)
-                query_url = (
-                    f"{API_URL}?limit=2000"
-                    f"&failure=false"
-                    f"&probe_cc={country}"
-                    f"&test_name=web_connectivity"
-                    f"&since={start_date}"
-                    f"&until={end_date}"
-                    f"&anomaly=true"
-                )
+                windows.append((country, start_date, end_date))
+    return windows
 
-                data = execute_query(query_url)
-                filtered = remove_duplicates(filter_dns(data))
-                save_to_csv(filtered, OUTPUT_FILE)
 
-            year += 1
+def is_window_closed(window):
+    """
+    Return True if the window ends before today, so its data can no longer change.
+    """
+    return window[2] < date.today().isoformat()
+
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """
+    Load the set of closed windows already saved by previous runs.
+    """
+    completed = set()
+    if not manifest_file or not os.path.exists(manifest_file):
+        return completed
+
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a partial last line.
+                continue
+            if entry.get("closed"):
+                completed.add((entry["country"], entry["since"], entry["until"]))
+    return completed
+
+
+def record_window(manifest_file, window, pages, rows, etags):
+    """
+    Append a saved window to the manifest and flush it to disk.
+    """
+    country, since, until = window
+    entry = {
+        "country": country,
+        "since": since,
+        "until": until,
+        "pages": pages,
+        "rows": rows,
+        "etags": etags,
+        "closed": is_window_closed(window),
+        "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    with open(manifest_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def build_query_params(country, start_date, end_date):
+    """
+    Build the measurements query parameters for one country and date window.
+    """
+    return {
+        "limit": PAGE_LIMIT,
+        "failure": "false",
+        "probe_cc": country,
+        "test_name": "web_connectivity",
+        "since": start_date,
+        "until": end_date,
+        "anomaly": "true",
+    }
+
 
+def fetch_window(window, spool_dir, session=None, limiter=None, api_url=API_URL):
+    """
+    Download every page of one window into a JSON-lines spool file.
+
+    Rows are filtered and deduplicated by 'input' page by page. Returns the
+    spool path, the number of pages and their ETags. If a page fails the
+    spool file is removed and the error is raised.
+    """
+    params = build_query_params(*window)
+    spool_path = os.path.join(spool_dir, "_".join(window) + ".jsonl")
+    seen_inputs = set()
+    etags = []
+    pages = 0
+    try:
+        with open(spool_path, "w", encoding="utf-8") as f:
+            for page in iter_pages(api_url, params, session, limiter):
+                pages += 1
+                for item in filter_dns(page):
+                    if item.get("input") not in seen_inputs:
+                        seen_inputs.add(item.get("input"))
+                        f.write(json.dumps(item) + "\n")
+                etag = page.get("metadata", {}).get("etag")
+                if etag:
+                    etags.append(etag)
+    except Exception:
+        os.remove(spool_path)
+        raise
+    return spool_path, pages, etags
+
+
+def read_spool(spool_path, chunk_rows=SAVE_CHUNK_ROWS):
+    """
+    Yield the rows of a spooled window in lists of at most chunk_rows.
+    """
+    chunk = []
+    with open(spool_path, "r", encoding="utf-8") as f:
+        for line in f:
+            chunk.append(json.loads(line))
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
 
-def deduplicate_final_csv():
+
+def fetch_data(
+    windows=None,
+    output_file=OUTPUT_FILE,
+    api_url=API_URL,
+    max_workers=MAX_WORKERS,
+    requests_per_second=REQUESTS_PER_SECOND,
+    manifest_file=MANIFEST_FILE,
+    dedup_index_file=DEDUP_INDEX_FILE,
+):
     """
-    After all data is collected, remove duplicates again.
+    Download and save data month by month for all countries.
+
+    Windows are fetched concurrently but saved in their original order.
+    Failed windows are skipped and not recorded, so a rerun retries them.
+    Closed windows already in the manifest are skipped; pass
+    manifest_file=None to download everything without a manifest, and
+    dedup_index_file=None to save rows without cross-window deduplication.
     """
-    if not os.path.exists(OUTPUT_FILE):
-        print("No CSV to deduplicate.")
-        return
+    if windows is None:
+        windows = build_windows()
+
+    completed = load_manifest(manifest_file)
+    pending = [window for window in windows if window not in completed]
+    if len(pending) < len(windows):
+        print(f"Skipping {len(windows) - len(pending)} window(s) already in the manifest.")
+
+    dedup_index = None
+    if dedup_index_file:
+        dedup_index = DedupIndex(dedup_index_file, output_file)
+
+    session = create_session(max_workers)
+    limiter = HostRateLimiter(requests_per_second)
+    start = time.perf_counter()
+
+    # Spool next to the output: /tmp may be a RAM-backed tmpfs
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="spool_", dir=os.path.dirname(output_file) or ".") as spool_dir:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(fetch_window, window, spool_dir, session, limiter, api_url)
+                for window in pending
+            ]
+            failed = []
+            for window, future in zip(pending, futures):
+                try:
+                    spool_path, pages, etags = future.result()
+                except requests.RequestException as e:
+                    print(f"{' '.join(window)}: failed, will be retried on the next run ({e})")
+                    failed.append(window)
+                    continue
+                saved = sum(
+                    save_to_csv(chunk, output_file, dedup_index) for chunk in read_spool(spool_path)
+                )
+                os.remove(spool_path)
+                print(f"{' '.join(window)}: {pages} page(s), {saved} new row(s)")
+                if manifest_file:
+                    record_window(manifest_file, window, pages, saved, etags)
 
-    df = pd.read_csv(OUTPUT_FILE)
-    df_clean = df.drop_duplicates(subset="input")
-    df_clean.to_csv(OUTPUT_FILE, index=False)
-    print("Final deduplication completed.")
+    session.close()
+    if dedup_index is not None:
+        dedup_index.close()
+    elapsed = time.perf_counter() - start
+    print(f"Fetched {len(pending) - len(failed)} windows with {max_workers} worker(s) in {elapsed:.1f}s.")
+    if failed:
+        print(f"{len(failed)} window(s) failed and were not recorded in the manifest.")
+    return elapsed
 
 
 def main():
     print("Fetching historical OONI data...")
     fetch_data()
-    print("Removing duplicates...")
-    deduplicate_final_csv()
+    if WRITE_PARQUET:
+        write_parquet(OUTPUT_FILE)
     print("Done.")
 
 
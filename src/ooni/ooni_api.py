@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Shared Helpers for the OONI Measurements API
+
+This module is imported by the fetch scripts in this folder and provides:
+1. A per-host rate limiter, and create_session() (common/http_session.py),
+   a pooled session that retries 429/5xx with exponential backoff.
+2. execute_query(), a GET wrapper that returns JSON data and raises
+   requests.RequestException once a request has definitely failed.
+3. iter_pages(), a generator that follows the API's metadata.next_url links
+   one page at a time and splits date windows that hit the page limit.
+
+It is not meant to be run directly.
+"""
+
+import os
+import sys
+import time
+import threading
+from datetime import date
+from urllib.parse import urlparse, urlencode
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.http_session import REQUEST_TIMEOUT, create_session  # noqa: E402,F401
+
+
+class HostRateLimiter:
+    """
+    Thread-safe limiter that spaces out requests to the same host.
+    """
+
+    def __init__(self, requests_per_second):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url):
+        """
+        Block until a request to the URL's host is allowed.
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def execute_query(query_url, session=None, limiter=None):
+    """
+    Send GET request to OONI API and return JSON data.
+
+    If the response carries an ETag it is stored in data["metadata"]["etag"].
+    Timeouts, connection errors and non-200 responses (after the session's
+    retries) raise requests.RequestException instead of returning partial data.
+    """
+    if limiter is not None:
+        limiter.wait(query_url)
+    response = (session or requests).get(query_url, timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        raise requests.HTTPError(f"HTTP {response.status_code} for {query_url}", response=response)
+    data = response.json()
+    etag = response.headers.get("ETag")
+    if etag and isinstance(data, dict):
+        data.setdefault("metadata", {})["etag"] = etag
+    return data
+
+
+def split_window(since, until):
+    """
+    Split a [since, until) date window in two halves.
+
+    Returns None when the window is too short to split.
+    """
+    start = date.fromisoformat(since)
+    end = date.fromisoformat(until)
+    if (end - start).days < 2:
+        return None
+    middle = (start + (end - start) // 2).isoformat()
+    return (since, middle), (middle, until)
+
+
+def iter_pages(api_url, params, session=None, limiter=None):
+    """
+    Yield every page (raw JSON dict) returned for a query window.
+
+    If the first page is full and the window spans several days, the window
+    is split in half and each half is queried separately. Otherwise the
+    metadata.next_url links are followed until the last page.
+
+    A page that cannot be downloaded raises requests.RequestException, so a
+    window is never silently cut short.
+    """
+    data = execute_query(f"{api_url}?{urlencode(params)}", session, limiter)
+
+    limit = int(params.get("limit", 0))
+    if limit and len(data.get("results", [])) >= limit:
+        halves = split_window(params["since"], params["until"])
+        if halves:
+            print(f"Page limit hit for {params['since']}..{params['until']}, splitting window.")
+            for since, until in halves:
+                yield from iter_pages(
+                    api_url, {**params, "since": since, "until": until}, session, limiter
+                )
+            return
+
+    while data:
+        yield data
+        next_url = data.get("metadata", {}).get("next_url")
+        if not next_url:
+            break
+        data = execute_query(next_url, session, limiter)
+
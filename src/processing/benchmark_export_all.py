@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Batch (--all) Mode of the Dig and VPN Exporters
+
+This script:
+1. Exports every file of dns_dig_results/ and vpn_measurements/ the old
+   way: one full run of the script per country (a new interpreter that
+   loads and prepares the classification, loads the country file, merges
+   and writes Excel), one after another.
+2. Exports them again with export_all() in this process: the
+   classification is prepared once and the countries are merged and
+   written in WORKERS worker processes.
+3. Prints both timings and checks the Excel files have the same content.
+
+Outputs go to a temporary folder.
+
+How to use:
+1. Adjust WORKERS below if needed.
+2. Run: python src/processing/benchmark_export_all.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ooni"))
+import export_dig_results_excel as dig  # noqa: E402
+import export_ooni_results_excel as vpn  # noqa: E402
+
+WORKERS = os.cpu_count() or 1
+# One run of a script with its path constants pointed at one country
+DIG_RUN = """
+import sys, export_dig_results_excel as d
+d.DIG_CSV_PATH, d.OUTPUT_EXCEL_PATH = sys.argv[1:]
+d.main()
+"""
+VPN_RUN = """
+import sys, export_ooni_results_excel as v
+v.VPN_CSV_PATH, v.OUTPUT_EXCEL_PATH = sys.argv[1:]
+v.main()
+"""
+
+
+def run_per_country(script, module, input_dir, output_name, output_dir):
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(module.__file__)))
+    for f in sorted(os.listdir(input_dir)):
+        if f.endswith(".csv"):
+            output_path = os.path.join(output_dir, output_name(os.path.splitext(f)[0]))
+            subprocess.run([sys.executable, "-c", script, os.path.join(input_dir, f), output_path],
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def sequential_dig(output_dir):
+    run_per_country(DIG_RUN, dig, dig.DIG_CSV_DIR, lambda stem: f"{stem}_dig_classification.xlsx", output_dir)
+
+
+def sequential_vpn(output_dir):
+    run_per_country(VPN_RUN, vpn, vpn.VPN_CSV_DIR, lambda stem: f"{stem.lower()}.xlsx", output_dir)
+
+
+def batch_dig(output_dir):
+    dig.export_all(dig.DIG_CSV_DIR, dig.load_and_prepare_classification(dig.CLASSIFICATION_CSV_PATH), output_dir, WORKERS)
+
+
+def batch_vpn(output_dir):
+    vpn.export_all(vpn.VPN_CSV_DIR, vpn.load_and_prepare_manual_data(vpn.MANUAL_CSV_PATH), output_dir, WORKERS)
+
+
+def timed(func, output_dir):
+    """
+    Run func(output_dir) with stdout (also the workers') silenced; returns seconds.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            start = time.perf_counter()
+            func(output_dir)
+            return time.perf_counter() - start
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def same_outputs(old_dir, new_dir):
+    names = sorted(os.listdir(old_dir))
+    return names == sorted(os.listdir(new_dir)) and all(
+        pd.read_excel(os.path.join(old_dir, n)).equals(pd.read_excel(os.path.join(new_dir, n))) for n in names
+    )
+
+
+def main():
+    print(f"Exporting all countries, {WORKERS} worker processes")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, sequential, batch in [("Dig", sequential_dig, batch_dig), ("VPN", sequential_vpn, batch_vpn)]:
+            old_dir, new_dir = os.path.join(tmp, f"{name}_old"), os.path.join(tmp, f"{name}_new")
+            old_time = timed(sequential, old_dir)
+            new_time = timed(batch, new_dir)
+            print(f"{name}: one run per country {old_time:6.2f}s, --all {new_time:6.2f}s "
+                  f"({old_time / new_time:.1f}x), {len(os.listdir(new_dir))} files, "
+                  f"identical: {same_outputs(old_dir, new_dir)}")
+
+
+if __name__ == "__main__":
+    main()
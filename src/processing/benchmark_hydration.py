@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark Raw Measurement Hydration Against a Local Stub Server
+
+This script:
+1. Starts a local HTTP server that serves canned /api/v1/raw_measurement JSON.
+2. Makes some UIDs fail once with HTTP 429 or 503 to exercise the retries.
+3. Runs process_measurements() serially (1 worker) and concurrently.
+4. Checks that both runs produce the same per-resolver CSVs and prints the speedup.
+5. Times a rerun served entirely from the raw measurement cache.
+
+How to use:
+1. Adjust STUB_LATENCY, MEASUREMENTS and WORKERS below if needed.
+2. Run: python src/processing/benchmark_hydration.py
+"""
+
+import os
+import io
+import csv
+import json
+import time
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from extract_ooni_lock_types import process_measurements
+
+STUB_LATENCY = 0.05
+MEASUREMENTS = 300
+WORKERS = 8
+RESOLVER_IPS = ["190.2.2.3", "200.40.53.101", "172.70.81.192"]
+
+
+def make_raw_measurement(uid):
+    """
+    Build a fake raw measurement with the fields extract_measurement_row() reads.
+    """
+    index = int(uid.rsplit("_", 1)[1])
+    return {
+        "input": f"https://site-{index}.example/",
+        "resolver_asn": "AS0",
+        "resolver_ip": RESOLVER_IPS[index % len(RESOLVER_IPS)],
+        "test_keys": {
+            "dns_experiment_failure": "android_dns_cache_no_data",
+            "http_experiment_failure": None,
+            "dns_consistency": "inconsistent",
+            "accessible": False,
+            "control": {"http_request": {"status_code": 200}},
+        },
+    }
+
+
+class StubRawMeasurementHandler(BaseHTTPRequestHandler):
+    """
+    Serve canned raw measurements; every 10th UID fails on its first attempt.
+    """
+
+    attempts = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != "/api/v1/raw_measurement":
+            self.send_error(404)
+            return
+
+        uid = parse_qs(parsed.query)["measurement_uid"][0]
+        with self.lock:
+            self.attempts[uid] = self.attempts.get(uid, 0) + 1
+            attempt = self.attempts[uid]
+        time.sleep(STUB_LATENCY)
+
+        index = int(uid.rsplit("_", 1)[1])
+        if index % 10 == 0 and attempt == 1:
+            self.send_response(429 if index % 20 == 0 else 503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps(make_raw_measurement(uid)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """
+    Start the stub server in a background thread and return it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRawMeasurementHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_uid_csv(path):
+    """
+    Write an input CSV with MEASUREMENTS fake measurement_uids.
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["measurement_uid"])
+        for i in range(MEASUREMENTS):
+            writer.writerow([f"20250524125446.540715_VE_webconnectivity_{i}"])
+
+
+def read_outputs(folder):
+    """
+    Return {file name: contents} for the per-resolver CSVs in a folder.
+    """
+    outputs = {}
+    for name in sorted(os.listdir(folder)):
+        # Skip the Parquet copies written next to each CSV
+        if not name.endswith(".csv"):
+            continue
+        with open(os.path.join(folder, name), encoding="utf-8") as f:
+            outputs[name] = f.read()
+    return outputs
+
+
+def run(input_csv, output_base, api_url, workers, cache_path=None):
+    """
+    Run process_measurements() quietly and return its elapsed time.
+    """
+    StubRawMeasurementHandler.attempts.clear()
+    with redirect_stdout(io.StringIO()):
+        return process_measurements(
+            input_csv, output_base, api_url, max_workers=workers, cache_path=cache_path
+        )
+
+
+def main():
+    server = start_stub_server()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1/raw_measurement"
+    print(f"Hydrating {MEASUREMENTS} measurements from {api_url}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, "uids.csv")
+        write_uid_csv(input_csv)
+
+        serial_dir = os.path.join(tmp, "serial")
+        concurrent_dir = os.path.join(tmp, "concurrent")
+        serial_time = run(input_csv, serial_dir, api_url, 1)
+        concurrent_time = run(input_csv, concurrent_dir, api_url, WORKERS)
+        identical = read_outputs(serial_dir) == read_outputs(concurrent_dir)
+        rows = sum(len(c.splitlines()) - 1 for c in read_outputs(concurrent_dir).values())
+
+        cache_path = os.path.join(tmp, "cache.sqlite")
+        run(input_csv, os.path.join(tmp, "warm"), api_url, WORKERS, cache_path)
+        cached_dir = os.path.join(tmp, "cached")
+        cached_time = run(input_csv, cached_dir, api_url, WORKERS, cache_path)
+        requests_on_rerun = len(StubRawMeasurementHandler.attempts)
+        identical = identical and read_outputs(cached_dir) == read_outputs(concurrent_dir)
+
+    server.shutdown()
+
+    print(f"Serial:     {serial_time:.2f}s ({MEASUREMENTS / serial_time:.0f} measurements/s)")
+    print(f"Concurrent: {concurrent_time:.2f}s ({MEASUREMENTS / concurrent_time:.0f} measurements/s, {WORKERS} workers)")
+    print(f"Speedup:    {serial_time / concurrent_time:.1f}x")
+    print(f"Cached rerun: {cached_time:.2f}s ({requests_on_rerun} requests to the API)")
+    print(f"Rows saved: {rows}/{MEASUREMENTS}, identical output: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark Per-Resolver CSV Writing
+
+This script:
+1. Generates synthetic measurement rows spread over several resolver IPs.
+2. Writes them with save_row_by_resolver_ip(), the old writer of
+   extract_ooni_lock_types.py (open/append/close per row).
+3. Writes them with ResolverWriterPool (buffered handles, LRU-capped).
+4. Prints rows/sec for both and checks the output files are identical.
+
+How to use:
+1. Adjust ROWS, RESOLVERS and MAX_OPEN below.
+2. Run: python src/processing/benchmark_resolver_writer.py
+"""
+
+import os
+import io
+import csv
+import time
+import tempfile
+from contextlib import redirect_stdout
+
+from extract_ooni_lock_types import ResolverWriterPool
+
+ROWS = 50_000
+RESOLVERS = 20
+MAX_OPEN = 64
+
+
+def save_row_by_resolver_ip(row, output_base):
+    """
+    The old per-row writer of extract_ooni_lock_types.py: save the row to
+    a CSV file named after the resolver_ip.
+    """
+    resolver_ip = row.get("resolver_ip", "Unknown")
+    os.makedirs(output_base, exist_ok=True)
+    output_path = os.path.join(output_base, f"{resolver_ip}.csv")
+
+    write_header = not os.path.exists(output_path)
+
+    with open(output_path, mode="a", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=row.keys())
+        if write_header:
+            writer.writeheader()
+        writer.writerow(row)
+
+    print(f"Saved measurement UID {row['measurement_uid']} to {output_path}")
+
+
+def generate_rows():
+    """
+    Build ROWS fake rows shaped like extract_measurement_row() output.
+    """
+    return [
+        {
+            "measurement_uid": f"20250524125446.540715_VE_webconnectivity_{i}",
+            "input": f"https://site-{i}.example/",
+            "dns_experiment_failure": "android_dns_cache_no_data",
+            "http_experiment_failure": "None",
+            "dns_consistency": "inconsistent",
+            "accessible": False,
+            "resolver_asn": "AS0",
+            "resolver_ip": f"10.0.{(i * 7919) % RESOLVERS // 256}.{(i * 7919) % RESOLVERS % 256}",
+            "status_code": 200,
+        }
+        for i in range(ROWS)
+    ]
+
+
+def read_outputs(folder):
+    """
+    Return {file name: contents} for the CSVs in a folder.
+    """
+    outputs = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), encoding="utf-8") as f:
+            outputs[name] = f.read()
+    return outputs
+
+
+def main():
+    rows = generate_rows()
+    print(f"Writing {ROWS:,} rows to {RESOLVERS} resolver files")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_row_dir = os.path.join(tmp, "per_row")
+        pool_dir = os.path.join(tmp, "pool")
+
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for row in rows:
+                save_row_by_resolver_ip(row, per_row_dir)
+        per_row_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ResolverWriterPool(pool_dir, max_open=MAX_OPEN) as writers:
+            for row in rows:
+                writers.write(row)
+        pool_time = time.perf_counter() - start
+
+        identical = read_outputs(per_row_dir) == read_outputs(pool_dir)
+
+    print(f"Open per row: {ROWS / per_row_time:>10,.0f} rows/s ({per_row_time:.2f}s)")
+    print(f"Writer pool:  {ROWS / pool_time:>10,.0f} rows/s ({pool_time:.2f}s, {MAX_OPEN} open files)")
+    print(f"Speedup:      {per_row_time / pool_time:.1f}x")
+    print(f"Identical output: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,92 +9,159 @@ This script:
 4. Joins both datasets.
 5. Exports the combined result to Excel.
 
+In batch mode (--all) the classification is loaded once and every CSV in
+DIG_CSV_DIR is merged and exported in EXPORT_WORKERS processes; with
+--workbook they go to one workbook with a sheet per country. Excel files
+are streamed by common/excel_writer.py.
+
 How to use:
 1. Set COUNTRY_NAME below.
-2. Run: python merge_dig_with_classification.py
+2. Run: python src/processing/export_dig_results_excel.py
+   or:  python src/processing/export_dig_results_excel.py --all [--workbook]
 """
 
 import pandas as pd
 import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.excel_writer import write_excel  # noqa: E402
+from common.measurement_store import read_table  # noqa: E402
 
 COUNTRY_NAME = "venezuela"
 
 # 👉 Paths
-DIG_CSV_PATH = f"data/csv_output/dns_dig_results/{COUNTRY_NAME}.csv"
+DIG_CSV_DIR = "data/csv_output/dns_dig_results"
+DIG_CSV_PATH = f"{DIG_CSV_DIR}/{COUNTRY_NAME}.csv"
 CLASSIFICATION_CSV_PATH = "data/csv_output/url_classification/categorized_tags.csv"
-OUTPUT_EXCEL_PATH = f"data/excel/manual_classification/dig/{COUNTRY_NAME}_dig_classification.xlsx"
-
-
-def normalize_url(url):
-    """
-    Remove scheme and www from URL or domain.
-    """
-    if pd.isna(url):
-        return ""
-    url = str(url)
-    url = url.replace("http://", "").replace("https://", "")
-    url = url.replace("www.", "").strip().rstrip("/")
-    return url
+OUTPUT_EXCEL_DIR = "data/excel/manual_classification/dig"
+OUTPUT_EXCEL_PATH = f"{OUTPUT_EXCEL_DIR}/{COUNTRY_NAME}_dig_classification.xlsx"
+OUTPUT_WORKBOOK_PATH = f"{OUTPUT_EXCEL_DIR}/all_countries_dig_classification.xlsx"
+EXPORT_WORKERS = os.cpu_count() or 1
 
 
 def load_and_prepare_dig(csv_path):
     """
     Load Dig CSV and prepare columns.
     """
-    df = pd.read_csv(csv_path)
+    df = read_table(csv_path, columns=["Dominio", "Dominio_id", "Status", "Bloqueado"])
     df_filtered = df[df["Bloqueado"] == "Sí"].copy()
     df_filtered["domain"] = df_filtered["Dominio"]
     df_filtered["status"] = df_filtered["Status"]
     df_filtered["accessible"] = "No"
-    df_filtered["normalized_domain"] = df_filtered["domain"].apply(normalize_url)
+    df_filtered["domain_id"] = df_filtered["Dominio_id"]
     return df_filtered
 
 
 def load_and_prepare_classification(csv_path):
     """
-    Load classification CSV and normalize URLs.
+    Load classification CSV with the integer key of each normalized URL.
     """
-    df = pd.read_csv(csv_path)
-    df["normalized_url"] = df["url"].apply(normalize_url)
-    return df[["normalized_url", "deduccion primaria", "deduccion secundaria"]].copy()
+    df = read_table(csv_path, columns=["url_id", "deduccion primaria", "deduccion secundaria"])
+    return df[df["url_id"] >= 0].copy()
 
 
 def merge_data(dig_df, class_df):
     """
-    Merge Dig and classification dataframes on normalized URL/domain.
+    Merge Dig and classification dataframes on the normalized URL/domain key.
     """
     merged = pd.merge(
-        dig_df[["domain", "status", "accessible", "normalized_domain"]],
+        dig_df[["domain", "status", "accessible", "domain_id"]],
         class_df,
         how="left",
-        left_on="normalized_domain",
-        right_on="normalized_url"
+        left_on="domain_id",
+        right_on="url_id"
     )
-    merged.drop(columns=["normalized_domain", "normalized_url"], inplace=True)
+    merged.drop(columns=["domain_id", "url_id"], inplace=True)
     return merged
 
 
-def main():
-    if not os.path.exists(DIG_CSV_PATH):
+_class_df = None
+
+
+def init_worker(class_df):
+    """
+    Keep the prepared classification in each worker process.
+    """
+    global _class_df
+    _class_df = class_df
+
+
+def export_file(dig_csv_path, output_path=None):
+    """
+    Merge one Dig file with the worker's classification and export it, or
+    return the merged table if output_path is None.
+    """
+    result_df = merge_data(load_and_prepare_dig(dig_csv_path), _class_df)
+    if output_path is None:
+        return result_df
+    written = write_excel(result_df, output_path)
+    print(f"Exported: {', '.join(written)}")
+    return output_path
+
+
+def export_all(input_dir, class_df, output_dir, workers=EXPORT_WORKERS, workbook_path=None):
+    """
+    Export every CSV of input_dir to output_dir, in parallel processes that
+    receive the prepared classification once. With workbook_path, write one
+    workbook with a sheet per file instead. Returns the paths written.
+    """
+    names = [os.path.splitext(f)[0] for f in sorted(os.listdir(input_dir)) if f.endswith(".csv")]
+    jobs = [
+        (os.path.join(input_dir, f"{name}.csv"),
+         None if workbook_path else os.path.join(output_dir, f"{name}_dig_classification.xlsx"))
+        for name in names
+    ]
+    if not jobs:
+        return []
+    if workers <= 1 or len(jobs) == 1:
+        init_worker(class_df)
+        results = [export_file(csv_path, output_path) for csv_path, output_path in jobs]
+    else:
+        # spawn: workers open their own SQLite connection to the domain dictionary
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(class_df,),
+        ) as executor:
+            futures = [executor.submit(export_file, csv_path, output_path) for csv_path, output_path in jobs]
+            results = [future.result() for future in futures]
+    if workbook_path:
+        return write_excel(dict(zip(names, results)), workbook_path)
+    return results
+
+
+def main(all_files=False, workbook=False):
+    if not all_files and not os.path.exists(DIG_CSV_PATH):
         print(f"Dig file not found: {DIG_CSV_PATH}")
         return
     if not os.path.exists(CLASSIFICATION_CSV_PATH):
         print(f"Classification file not found: {CLASSIFICATION_CSV_PATH}")
         return
 
-    print(f"Loading Dig data from: {DIG_CSV_PATH}")
-    dig_df = load_and_prepare_dig(DIG_CSV_PATH)
-
     print(f"Loading classification data from: {CLASSIFICATION_CSV_PATH}")
     class_df = load_and_prepare_classification(CLASSIFICATION_CSV_PATH)
 
+    if all_files:
+        print(f"Exporting every file in {DIG_CSV_DIR}...")
+        exported = export_all(DIG_CSV_DIR, class_df, OUTPUT_EXCEL_DIR,
+                              workbook_path=OUTPUT_WORKBOOK_PATH if workbook else None)
+        print(f"Exported: {', '.join(exported)}")
+        return
+
+    print(f"Loading Dig data from: {DIG_CSV_PATH}")
+    dig_df = load_and_prepare_dig(DIG_CSV_PATH)
+
     print("Merging datasets...")
     result_df = merge_data(dig_df, class_df)
 
     print(f"Exporting merged data to Excel: {OUTPUT_EXCEL_PATH}")
-    result_df.to_excel(OUTPUT_EXCEL_PATH, index=False)
+    write_excel(result_df, OUTPUT_EXCEL_PATH)
     print("Done.")
 
 
 if __name__ == "__main__":
-    main()
+    main("--all" in sys.argv[1:], "--workbook" in sys.argv[1:])
@@ -8,26 +8,105 @@ This script:
 3. Extracts key fields.
 4. Saves each row to a CSV named after the 'resolver_ip'.
 
+Raw measurements are downloaded by a bounded thread pool sharing one pooled
+session. Responses with HTTP 429 or 5xx are retried with exponential
+backoff, and progress and throughput are printed every PROGRESS_EVERY rows.
+
+Raw measurements never change once published, so every downloaded one is
+stored zlib-compressed in a local SQLite cache keyed by measurement_uid
+(CACHE_PATH). Reruns read from the cache instead of the API. When the cache
+grows past CACHE_MAX_MB, the least recently used entries are evicted.
+
+Rows are written through ResolverWriterPool, which keeps one buffered file
+handle per resolver IP (at most MAX_OPEN_FILES at a time) and flushes every
+FLUSH_ROWS rows or FLUSH_SECONDS seconds, instead of reopening the file for
+every row. If pyarrow is installed, each resolver CSV also gets a typed
+Parquet copy at the end.
+
 How to use:
-1. Set INPUT_CSV_PATH below.
+1. Set INPUT_CSV_PATH (and MAX_WORKERS if needed) below.
 2. Run: python fetch_measurements_by_resolver.py
 """
 
 import os
+import sys
 import csv
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 import requests
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.http_session import REQUEST_TIMEOUT, create_session  # noqa: E402
+from common.lru_store import CompressedLRUStore, compress, decompress  # noqa: E402
+from common.measurement_store import write_parquet  # noqa: E402
+
 INPUT_CSV_PATH = "data/csv_output/ooni_run_measurements/ooni_run_measurements_results.csv"
 OONI_API_URL = "https://api.ooni.org/api/v1/raw_measurement"
+OUTPUT_BASE = "data/csv_output/lists"
+CACHE_PATH = "data/cache/raw_measurements.sqlite"
+CACHE_MAX_MB = 2048
+
+# Writer pool settings
+MAX_OPEN_FILES = 64
+FLUSH_ROWS = 500
+FLUSH_SECONDS = 5.0
 
+# Hydration settings (MAX_WORKERS = 1 reproduces the serial download)
+MAX_WORKERS = 8
+PROGRESS_EVERY = 100
 
-def execute_query(query_url):
+
+class RawMeasurementCache(CompressedLRUStore):
+    """
+    Thread-safe SQLite cache of compressed raw measurements keyed by measurement_uid.
+
+    Entries are evicted least-recently-used first once the total compressed
+    size goes over max_mb (see common/lru_store.py).
+    """
+
+    def __init__(self, path=CACHE_PATH, max_mb=CACHE_MAX_MB):
+        super().__init__(path, "measurements", "uid", "data BLOB NOT NULL", max_mb)
+
+    def get(self, uid):
+        """
+        Return the cached measurement for a UID, or None.
+        """
+        row = self.select(uid, "data")
+        return None if row is None else json.loads(decompress(row[0]))
+
+    def put(self, uid, data):
+        """
+        Store a measurement and evict old entries if the cache is full.
+        """
+        self.write(uid, {"data": compress(json.dumps(data))})
+
+
+def execute_query(query_url, session=None, cache=None):
     """
     Send GET request to OONI API and return JSON data.
+
+    If a cache is given and the URL has a measurement_uid, the cached copy
+    is returned when present and fresh responses are stored in it.
     """
-    response = requests.get(query_url)
+    uid = parse_qs(urlparse(query_url).query).get("measurement_uid", [None])[0]
+    if cache is not None and uid:
+        data = cache.get(uid)
+        if data is not None:
+            return data
+
+    try:
+        response = (session or requests).get(query_url, timeout=REQUEST_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching data: {e}")
+        return {}
     if response.status_code == 200:
-        return response.json()
+        data = response.json()
+        if cache is not None and uid and data:
+            cache.put(uid, data)
+        return data
     print(f"Error fetching data: HTTP {response.status_code}")
     return {}
 
@@ -67,46 +146,156 @@ def extract_measurement_row(uid, data):
     }
 
 
-def save_row_by_resolver_ip(row, output_base="data/csv_output/lists"):
+class ResolverWriterPool:
     """
-    Save the row to a CSV file named after the resolver_ip.
+    Append rows to per-resolver CSVs through a pool of buffered file handles.
+
+    At most max_open files are kept open; the least recently used one is
+    closed when another is needed. Buffers are flushed every flush_rows
+    rows, after flush_seconds seconds, and on close().
     """
-    resolver_ip = row.get("resolver_ip", "Unknown")
-    os.makedirs(output_base, exist_ok=True)
-    output_path = os.path.join(output_base, f"{resolver_ip}.csv")
 
-    write_header = not os.path.exists(output_path)
+    def __init__(
+        self,
+        output_base=OUTPUT_BASE,
+        max_open=MAX_OPEN_FILES,
+        flush_rows=FLUSH_ROWS,
+        flush_seconds=FLUSH_SECONDS,
+    ):
+        self.output_base = output_base
+        self.max_open = max_open
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.handles = OrderedDict()
+        self.pending_rows = 0
+        self.last_flush = time.monotonic()
+        self.rows_written = {}
+        os.makedirs(output_base, exist_ok=True)
 
-    with open(output_path, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=row.keys())
+    def get_writer(self, resolver_ip, fieldnames):
+        """
+        Return the CSV writer for a resolver IP, opening its file if needed.
+        """
+        if resolver_ip in self.handles:
+            self.handles.move_to_end(resolver_ip)
+            return self.handles[resolver_ip][1]
+
+        if len(self.handles) >= self.max_open:
+            _, (old_file, _) = self.handles.popitem(last=False)
+            old_file.close()
+
+        output_path = os.path.join(self.output_base, f"{resolver_ip}.csv")
+        write_header = not os.path.exists(output_path)
+        file = open(output_path, mode="a", newline="", encoding="utf-8")
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
         if write_header:
             writer.writeheader()
-        writer.writerow(row)
+        self.handles[resolver_ip] = (file, writer)
+        return writer
+
+    def write(self, row):
+        """
+        Buffer a row for the CSV named after its resolver_ip.
+        """
+        resolver_ip = row.get("resolver_ip", "Unknown")
+        self.get_writer(resolver_ip, row.keys()).writerow(row)
+        self.rows_written[resolver_ip] = self.rows_written.get(resolver_ip, 0) + 1
+        self.pending_rows += 1
+
+        if (
+            self.pending_rows >= self.flush_rows
+            or time.monotonic() - self.last_flush >= self.flush_seconds
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Flush every open file to disk.
+        """
+        for file, _ in self.handles.values():
+            file.flush()
+        self.pending_rows = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Flush and close every open file.
+        """
+        for file, _ in self.handles.values():
+            file.close()
+        self.handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-    print(f"Saved measurement UID {row['measurement_uid']} to {output_path}")
 
+def hydrate_measurements(
+    uids, session, api_url=OONI_API_URL, max_workers=MAX_WORKERS, cache=None
+):
+    """
+    Yield (uid, raw measurement data) pairs, downloaded concurrently.
+
+    Results are yielded in the same order as the input UIDs.
+    """
+    def fetch(uid):
+        return uid, execute_query(f"{api_url}?measurement_uid={uid}", session, cache)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(fetch, uids)
 
-def process_measurements(input_csv):
+
+def process_measurements(
+    input_csv,
+    output_base=OUTPUT_BASE,
+    api_url=OONI_API_URL,
+    max_workers=MAX_WORKERS,
+    cache_path=CACHE_PATH,
+):
     """
     Main processing function.
+
+    Pass cache_path=None to always download from the API.
     """
     uids = load_measurement_uids(input_csv)
     if not uids:
         print("No measurement_uids found in input CSV.")
         return
 
-    print(f"Processing {len(uids)} measurement(s)...")
+    print(f"Processing {len(uids)} measurement(s) with {max_workers} worker(s)...")
+
+    session = create_session(max_workers)
+    cache = RawMeasurementCache(cache_path) if cache_path else None
+    start = time.perf_counter()
+    failed = 0
+
+    hydrated = hydrate_measurements(uids, session, api_url, max_workers, cache)
+    with ResolverWriterPool(output_base) as writers:
+        for done, (uid, data) in enumerate(hydrated, 1):
+            if not data:
+                print(f"Skipping UID {uid}: no data returned.")
+                failed += 1
+            else:
+                writers.write(extract_measurement_row(uid, data))
 
-    for uid in uids:
-        query_url = f"{OONI_API_URL}?measurement_uid={uid}"
-        data = execute_query(query_url)
+            if done % PROGRESS_EVERY == 0 or done == len(uids):
+                elapsed = time.perf_counter() - start
+                print(
+                    f"Progress: {done}/{len(uids)} measurements, {failed} failed, "
+                    f"{done / elapsed:.1f} measurements/s"
+                )
 
-        if not data:
-            print(f"Skipping UID {uid}: no data returned.")
-            continue
+    for resolver_ip, count in sorted(writers.rows_written.items()):
+        output_path = os.path.join(output_base, f"{resolver_ip}.csv")
+        print(f"Saved {count} row(s) to {output_path}")
+        write_parquet(output_path)
 
-        row = extract_measurement_row(uid, data)
-        save_row_by_resolver_ip(row)
+    session.close()
+    if cache is not None:
+        cache.close()
+    return time.perf_counter() - start
 
 
 if __name__ == "__main__":
@@ -6,8 +6,13 @@ This script processes all CSV files in a given directory,
 finds domains present in every file that are consistently blocked,
 and marks them as 'NOACCESIBLEPORMETODO'.
 
+All files are indexed in one pass into a domain -> per-file blocked table
+(with a bitmask and a count), which also answers "blocked in at least k of
+n files". A summary per k is printed, and MIN_BLOCKED_FILES picks which
+domains get marked.
+
 How to use:
-1. Adjust DIRECTORY_TO_PROCESS below.
+1. Adjust DIRECTORY_TO_PROCESS and MIN_BLOCKED_FILES below.
 2. Run: python mark_common_blocked_domains.py
 """
 
@@ -16,6 +21,11 @@ import pandas as pd
 
 DIRECTORY_TO_PROCESS = "data/csv_output/dns_dig_results"
 
+# Mark domains blocked in at least this many files (None = every file)
+MIN_BLOCKED_FILES = None
+# Optional CSV with the per-domain blocked table (None = don't write it)
+SUMMARY_CSV_PATH = None
+
 
 def load_csvs(directory):
     """
@@ -29,15 +39,17 @@ def load_csvs(directory):
         print("No CSV files were found in the directory.")
         return [], []
 
+    valid_files = []
     dataframes = []
     for path in csv_files:
         df = pd.read_csv(path)
         if 'Dominio' in df.columns and 'Bloqueado' in df.columns:
             df['Dominio'] = df['Dominio'].astype(str).str.strip()
+            valid_files.append(path)
             dataframes.append(df)
         else:
             print(f"Skipping {path}: missing required columns.")
-    return csv_files, dataframes
+    return valid_files, dataframes
 
 
 def find_common_domains(dataframes):
@@ -50,18 +62,50 @@ def find_common_domains(dataframes):
     return common_domains
 
 
-def find_blocked_domains(common_domains, dataframes):
+def build_blocked_table(dataframes, names=None):
     """
-    Return domains that are blocked ('Sí') in all dataframes.
+    Index every file once into a domain -> blocked table.
+
+    Returns a DataFrame indexed by domain with one boolean column per file
+    (True if any row for the domain is 'Sí'), 'blocked_count' and 'bitmask'
+    (bit i set when blocked in file i).
     """
-    blocked_domains = []
-    for domain in common_domains:
-        if all(
-            df.loc[df['Dominio'] == domain, 'Bloqueado'].eq('Sí').any()
-            for df in dataframes
-        ):
-            blocked_domains.append(domain)
-    return blocked_domains
+    if names is None:
+        names = [f"file_{i}" for i in range(len(dataframes))]
+
+    columns = {}
+    for name, df in zip(names, dataframes):
+        blocked = df.loc[df['Bloqueado'].eq('Sí'), 'Dominio'].dropna().unique()
+        columns[name] = pd.Series(True, index=blocked)
+
+    table = pd.DataFrame(columns).fillna(False).astype(bool)
+    table['blocked_count'] = table[names].sum(axis=1)
+    table['bitmask'] = 0
+    for bit, name in enumerate(names):
+        table['bitmask'] = table['bitmask'].astype(object) + table[name].astype(object) * (1 << bit)
+    return table
+
+
+def find_blocked_domains(dataframes, min_files=None, table=None):
+    """
+    Return domains blocked ('Sí') in at least min_files dataframes.
+
+    With min_files=None a domain must be blocked in all of them.
+    """
+    if table is None:
+        table = build_blocked_table(dataframes)
+    if min_files is None:
+        min_files = len(dataframes)
+    return list(table.index[table['blocked_count'] >= min_files])
+
+
+def print_threshold_summary(table, total_files):
+    """
+    Print how many domains are blocked in at least k of n files, for every k.
+    """
+    for k in range(total_files, 0, -1):
+        count = int((table['blocked_count'] >= k).sum())
+        print(f"Blocked in at least {k} of {total_files} files: {count} domains")
 
 
 def update_csvs(csv_files, dataframes, blocked_domains):
@@ -87,13 +131,21 @@ def main():
         print("Not enough valid CSV files to compare.")
         return
 
-    common_domains = find_common_domains(dataframes)
-
-    if not common_domains:
+    if MIN_BLOCKED_FILES is None and not find_common_domains(dataframes):
         print("No common domains found across all files.")
         return
 
-    blocked_domains = find_blocked_domains(common_domains, dataframes)
+    names = [os.path.splitext(os.path.basename(path))[0] for path in csv_files]
+    table = build_blocked_table(dataframes, names)
+    print_threshold_summary(table, len(dataframes))
+
+    if SUMMARY_CSV_PATH:
+        table.sort_values('blocked_count', ascending=False).to_csv(
+            SUMMARY_CSV_PATH, index_label='Dominio'
+        )
+        print(f"Blocked table saved to {SUMMARY_CSV_PATH}")
+
+    blocked_domains = find_blocked_domains(dataframes, MIN_BLOCKED_FILES, table)
 
     if not blocked_domains:
         print("No domains consistently blocked across all files.")
@@ -20,7 +20,7 @@ DIRECTORY_TO_PROCESS = "data/csv_output/local_measurements"
 def load_valid_csvs(directory):
     """
     Load CSV files that contain the required columns.
-    Returns a list of pandas DataFrames.
+    Returns the paths of the valid files and their DataFrames, in the same order.
     """
     csv_files = sorted(
         [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.csv')]
@@ -30,14 +30,16 @@ def load_valid_csvs(directory):
         print("No CSV files were found in the directory.")
         return [], []
 
+    valid_files = []
     dataframes = []
     for path in csv_files:
         df = pd.read_csv(path)
         if {'input', 'accessible'}.issubset(df.columns):
+            valid_files.append(path)
             dataframes.append(df)
         else:
             print(f"Skipping {path}: missing required columns.")
-    return csv_files, dataframes
+    return valid_files, dataframes
 
 
 def get_common_inputs(dataframes):
@@ -50,28 +52,38 @@ def get_common_inputs(dataframes):
     return common_inputs
 
 
-def is_accessible_false(value):
+def accessible_false_mask(series):
     """
-    Determine whether a value indicates 'inaccessible'.
+    Mark the values of a column that indicate 'inaccessible' ('false', '0' or 'no').
     """
-    if pd.isna(value):
-        return False
-    str_val = str(value).strip().lower()
-    return str_val in {'false', '0', 'no'}
+    normalized = series.astype(str).str.strip().str.lower()
+    return series.notna() & normalized.isin(['false', '0', 'no'])
 
 
 def find_inputs_to_update(common_inputs, dataframes):
     """
     Return the set of inputs that are inaccessible in all dataframes.
+
+    All files are stacked into one table and grouped once by (input, file),
+    instead of scanning every file for every input.
     """
-    inputs_to_update = set()
-    for inp in common_inputs:
-        if all(
-            df.loc[df['input'] == inp, 'accessible'].apply(is_accessible_false).all()
-            for df in dataframes
-        ):
-            inputs_to_update.add(inp)
-    return inputs_to_update
+    combined = pd.concat(
+        [
+            pd.DataFrame({
+                'input': df['input'],
+                'file': file_index,
+                'inaccessible': accessible_false_mask(df['accessible']),
+            })
+            for file_index, df in enumerate(dataframes)
+        ],
+        ignore_index=True,
+    )
+    combined = combined[combined['input'].isin(list(common_inputs))]
+
+    per_file = combined.groupby(['input', 'file'], sort=False)['inaccessible'].all()
+    per_input = per_file.groupby(level='input', sort=False).agg(['all', 'size'])
+    selected = per_input['all'] & (per_input['size'] == len(dataframes))
+    return set(per_input.index[selected])
 
 
 def update_csvs(csv_files, dataframes, inputs_to_update):
@@ -85,7 +97,7 @@ def update_csvs(csv_files, dataframes, inputs_to_update):
 
         before_changes = (df['accessible'] == 'NOACCESIBLEPORMETODO').sum()
 
-        df.loc[mask & df['accessible'].apply(is_accessible_false), 'accessible'] = 'NOACCESIBLEPORMETODO'
+        df.loc[mask & accessible_false_mask(df['accessible']), 'accessible'] = 'NOACCESIBLEPORMETODO'
 
         after_changes = (df['accessible'] == 'NOACCESIBLEPORMETODO').sum()
         changes_made = after_changes - before_changes